@@ -0,0 +1,80 @@
+"""
+Pool thread có giới hạn cho việc kiểm tra password.
+
+PBKDF2 tốn hàng trăm ms CPU mỗi lần: chỉ PASSWORD_HASH_WORKERS lần hash chạy cùng
+lúc, tối đa PASSWORD_HASH_QUEUE_SIZE lần khác được xếp hàng, vượt quá thì từ chối
+ngay (None) thay vì để burst login chiếm hết CPU của các request khác.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+_executor = None
+_lock = threading.Lock()
+_in_flight = 0
+_stats = {"hashes": 0, "hash_ms_total": 0.0, "hash_ms_max": 0.0, "rejected_busy": 0, "max_in_flight": 0}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+        )
+    return _executor
+
+
+def _check(user, password):
+    global _in_flight
+    start = time.perf_counter()
+    try:
+        return user.check_password(password)
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        with _lock:
+            _in_flight -= 1
+            _stats["hashes"] += 1
+            _stats["hash_ms_total"] += elapsed
+            _stats["hash_ms_max"] = max(_stats["hash_ms_max"], elapsed)
+
+
+def _submit(user, password):
+    """Future của lần kiểm tra, None nếu pool + hàng đợi đã đầy"""
+    global _in_flight
+    with _lock:
+        if _in_flight >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE:
+            _stats["rejected_busy"] += 1
+            return None
+        _in_flight += 1
+        _stats["max_in_flight"] = max(_stats["max_in_flight"], _in_flight)
+    return _get_executor().submit(_check, user, password)
+
+
+def check_password(user, password):
+    """True / False, None nếu server đang quá tải hash"""
+    future = _submit(user, password)
+    return None if future is None else future.result()
+
+
+async def acheck_password(user, password):
+    future = _submit(user, password)
+    return None if future is None else await asyncio.wrap_future(future)
+
+
+def get_stats():
+    with _lock:
+        stats = dict(_stats)
+        in_flight = _in_flight
+    workers = settings.PASSWORD_HASH_WORKERS
+    stats.update({
+        "workers": workers,
+        "running": min(in_flight, workers),
+        "queue_depth": max(0, in_flight - workers),
+        "hash_ms_avg": round(stats["hash_ms_total"] / (stats["hashes"] or 1), 3),
+        "hash_ms_total": round(stats["hash_ms_total"], 3),
+        "hash_ms_max": round(stats["hash_ms_max"], 3),
+    })
+    return stats
@@ -0,0 +1,132 @@
+"""
+Pipeline sinh ảnh thu nhỏ cho avatar / cover của UserProfile.
+
+Sau khi profile được lưu với ảnh mới, việc resize + encode chạy trong 1 thread
+pool (không chặn request). Mỗi kích thước có 1 bản JPEG/PNG và 1 bản WebP,
+tên file là hash nội dung nên có thể cache vĩnh viễn (immutable) ở CDN/web server.
+"""
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .models import UserProfile
+
+# field trên UserProfile -> (key trong image_variants, các chiều rộng cần sinh)
+VARIANT_FIELDS = {
+    "avatar": ("avatar", (48, 96, 256)),
+    "cover_image": ("cover", (640, 1280)),
+}
+VARIANT_DIR = "variants"
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS, thread_name_prefix="image-variants")
+    return _executor
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", quality=80, method=4)
+    elif fmt == "png":
+        image.save(buffer, "PNG", optimize=True)
+    else:
+        image.convert("RGB").save(buffer, "JPEG", quality=85, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _store(kind, width, fmt, data):
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    name = f"{VARIANT_DIR}/{kind}/{digest}_{width}.{'jpg' if fmt == 'jpeg' else fmt}"
+    # Cùng nội dung -> cùng tên: không ghi lại file đã có
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def build_variants(field_file, kind, widths):
+    """Sinh các bản thu nhỏ của 1 ảnh, trả về {"<width>": {"jpeg"|"png": path, "webp": path}}"""
+    with field_file.storage.open(field_file.name, "rb") as f:
+        with Image.open(f) as original:
+            original = ImageOps.exif_transpose(original)
+            has_alpha = original.mode in ("RGBA", "LA") or "transparency" in original.info
+            original = original.convert("RGBA" if has_alpha else "RGB")
+
+    fallback = "png" if has_alpha else "jpeg"
+    sizes = {}
+    for width in widths:
+        image = original
+        if original.width > width:
+            height = round(original.height * width / original.width)
+            image = original.resize((width, height), Image.Resampling.LANCZOS)
+        sizes[str(width)] = {
+            fmt: _store(kind, width, fmt, _encode(image, fmt))
+            for fmt in (fallback, "webp")
+        }
+    return sizes
+
+
+def needs_processing(profile):
+    for field, (kind, _) in VARIANT_FIELDS.items():
+        source = getattr(profile, field).name or ""
+        if profile.image_variants.get(kind, {}).get("source", "") != source:
+            return True
+    return False
+
+
+def process_profile_images(profile_id):
+    """Sinh variant cho ảnh đã đổi của 1 profile và lưu image_variants (không gửi post_save)"""
+    profile = UserProfile.objects.filter(id=profile_id).first()
+    if profile is None:
+        return None
+
+    variants = dict(profile.image_variants)
+    for field, (kind, widths) in VARIANT_FIELDS.items():
+        field_file = getattr(profile, field)
+        source = field_file.name or ""
+        if variants.get(kind, {}).get("source", "") == source:
+            continue
+        if not source:
+            variants.pop(kind, None)
+            continue
+        try:
+            variants[kind] = {"source": source, "sizes": build_variants(field_file, kind, widths)}
+        except Exception as e:
+            print(f"[ERROR] Không tạo được ảnh thu nhỏ cho {source}: {e}")
+
+    UserProfile.objects.filter(id=profile_id).update(image_variants=variants)
+    return variants
+
+
+def _process_in_thread(profile_id):
+    close_old_connections()
+    try:
+        process_profile_images(profile_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_profile_images(profile):
+    """Đưa việc sinh variant vào thread pool sau khi transaction hiện tại commit"""
+    profile_id = profile.id
+    transaction.on_commit(lambda: _get_executor().submit(_process_in_thread, profile_id))
+
+
+def variant_urls(profile, kind):
+    """[(width, fallback_url, webp_url)] tăng dần theo width, [] nếu chưa có variant"""
+    sizes = (profile.image_variants or {}).get(kind, {}).get("sizes", {})
+    result = []
+    for width, formats in sorted(sizes.items(), key=lambda item: int(item[0])):
+        fallback = formats.get("jpeg") or formats.get("png")
+        result.append((int(width), default_storage.url(fallback), default_storage.url(formats["webp"])))
+    return result
@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.accounts.models import User
+from apps.accounts.search import get_index, write_index
+
+
+class Command(BaseCommand):
+    help = "Build lại file index tìm kiếm user (trigram, mmap) từ DB"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=settings.USER_SEARCH_INDEX_PATH)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = (
+            User.objects.order_by("id")
+            .values_list("id", "username", "profile__full_name", "email")
+            .iterator(chunk_size=options["chunk_size"])
+        )
+        count = write_index(options["path"], rows)
+        # Process hiện tại (nếu có) đọc lại file mới; các process khác tự nhận ra qua mtime
+        get_index().reload_if_changed()
+        self.stdout.write(f"indexed={count} path={options['path']} in {time.perf_counter() - started:.1f}s")
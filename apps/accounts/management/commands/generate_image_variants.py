@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Q
+
+from apps.accounts.images import process_profile_images
+from apps.accounts.models import UserProfile
+
+
+def _process(profile_id):
+    try:
+        return process_profile_images(profile_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Sinh ảnh thu nhỏ + WebP cho avatar / cover đã upload trước khi có pipeline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--force", action="store_true", help="Sinh lại cả profile đã có variant")
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.filter(
+            Q(avatar__gt="") | Q(cover_image__gt="")
+        )
+        if options["force"]:
+            profiles.update(image_variants={})
+        ids = list(profiles.values_list("id", flat=True))
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            for done, _ in enumerate(executor.map(_process, ids), start=1):
+                if done % 100 == 0:
+                    self.stdout.write(f"{done}/{len(ids)}")
+        self.stdout.write(f"processed={len(ids)}")
@@ -0,0 +1,74 @@
+import logging
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.accounts.models import EmailVerificationToken, PasswordResetToken, RefreshToken
+
+logger = logging.getLogger(__name__)
+
+TOKEN_MODELS = (RefreshToken, PasswordResetToken, EmailVerificationToken)
+
+# Thống kê lần chạy gần nhất, để đọc từ shell / trang thống kê nội bộ
+PURGE_STATS_KEY = "housekeeping:purge_expired_tokens"
+
+
+def purge_expired(model, batch_size, pause=0.0):
+    """
+    Xoá các dòng đã hết hạn theo từng batch nhỏ qua index expires_at,
+    mỗi batch là 1 DELETE ngắn nên không giữ lock lâu. Trả về số dòng đã xoá.
+    """
+    cutoff = timezone.now()
+    total = 0
+    while True:
+        ids = list(
+            model.objects.filter(expires_at__lt=cutoff)
+            .order_by('expires_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        deleted, _ = model.objects.filter(id__in=ids).delete()
+        total += deleted
+        if len(ids) < batch_size:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+class Command(BaseCommand):
+    help = "Xoá refresh / reset / verification token đã hết hạn theo batch"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--pause", type=float, default=0.05, help="Số giây nghỉ giữa 2 batch")
+        parser.add_argument(
+            "--interval", type=int, default=0,
+            help="Chạy lại sau mỗi N giây (0 = chạy 1 lần rồi thoát)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.run_once(options["batch_size"], options["pause"])
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def run_once(self, batch_size, pause):
+        started = time.perf_counter()
+        stats = {}
+        for model in TOKEN_MODELS:
+            stats[model.__name__] = purge_expired(model, batch_size, pause)
+        elapsed = time.perf_counter() - started
+
+        summary = " ".join(f"{name}={count}" for name, count in stats.items())
+        self.stdout.write(f"purged {summary} in {elapsed:.2f}s")
+        logger.info("purge_expired_tokens %s elapsed=%.2fs", summary, elapsed)
+        cache.set(PURGE_STATS_KEY, {
+            "finished_at": timezone.now().isoformat(),
+            "elapsed": round(elapsed, 3),
+            "purged": stats,
+        }, None)
+        return stats
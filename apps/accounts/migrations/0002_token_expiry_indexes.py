@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailverificationtoken',
+            index=models.Index(fields=['expires_at'], name='verifytoken_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresettoken',
+            index=models.Index(fields=['expires_at'], name='resettoken_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(fields=['expires_at'], name='refreshtoken_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(fields=['user', 'is_revoked'], name='refreshtoken_user_rev_idx'),
+        ),
+    ]
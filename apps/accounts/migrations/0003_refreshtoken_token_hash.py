@@ -0,0 +1,41 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_existing_tokens(apps, schema_editor):
+    RefreshToken = apps.get_model("accounts", "RefreshToken")
+    batch = []
+    for token in RefreshToken.objects.only("id", "token").iterator(chunk_size=1000):
+        token.token_hash = hashlib.sha256(token.token.encode()).hexdigest()
+        batch.append(token)
+        if len(batch) >= 1000:
+            RefreshToken.objects.bulk_update(batch, ["token_hash"])
+            batch = []
+    if batch:
+        RefreshToken.objects.bulk_update(batch, ["token_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_token_expiry_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="refreshtoken",
+            name="token_hash",
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(hash_existing_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="refreshtoken",
+            name="token_hash",
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.RemoveField(
+            model_name="refreshtoken",
+            name="token",
+        ),
+    ]
@@ -2,6 +2,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin, Group, Permission
 from django.utils import timezone
+import hashlib
 import uuid
 
 # ---------------------------
@@ -64,6 +65,9 @@ class UserProfile(models.Model):
     full_name = models.CharField(max_length=255, blank=True)
     avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)
     cover_image = models.ImageField(upload_to="covers/", blank=True, null=True)
+    # Bản thu nhỏ / WebP do apps/accounts/images.py sinh ra:
+    # {"avatar": {"source": <tên file gốc>, "sizes": {"96": {"jpeg": path, "webp": path}}}}
+    image_variants = models.JSONField(default=dict, blank=True)
     bio = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -71,13 +75,23 @@ class UserProfile(models.Model):
 # ---------------------------
 # Refresh / Reset / Email Tokens
 # ---------------------------
+def hash_token(token_value):
+    """SHA-256 hex của token: key cố định 64 ký tự, không lưu JWT gốc"""
+    return hashlib.sha256(token_value.encode()).hexdigest()
+
 class RefreshToken(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    token = models.CharField(max_length=255, unique=True)
+    token_hash = models.CharField(max_length=64, unique=True)
     is_revoked = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='refreshtoken_expires_idx'),
+            models.Index(fields=['user', 'is_revoked'], name='refreshtoken_user_rev_idx'),
+        ]
+
 class PasswordResetToken(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     token = models.UUIDField(default=uuid.uuid4, unique=True)
@@ -85,9 +99,19 @@ class PasswordResetToken(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='resettoken_expires_idx'),
+        ]
+
 class EmailVerificationToken(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     token = models.UUIDField(default=uuid.uuid4, unique=True)
     is_used = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='verifytoken_expires_idx'),
+        ]
@@ -0,0 +1,89 @@
+# apps/accounts/revocation.py
+"""
+Revocation list used by the stateless JWT fast path.
+
+When ``JWT_STATELESS_AUTH`` is enabled the middleware trusts a valid access
+token and checks bans / revoked refresh tokens here instead of loading the user.
+The DB stays the source of truth (``User.is_banned``, and a refresh token is
+valid only while its ``RefreshToken`` row exists and is not revoked); the cache
+only remembers answers. An evicted entry (LocMemCache keeps at most 300 keys)
+or a ``cache.clear()`` therefore costs one query, it never lets a revoked token
+back in. Answers read from the DB are kept for ``JWT_REVOCATION_CACHE_TTL``
+seconds, which bounds how long another process with its own LocMemCache may
+still accept a token revoked elsewhere.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import RefreshToken, User, hash_token
+
+REVOKED_REFRESH_KEY = "auth:revoked:{}"
+BANNED_USER_KEY = "auth:banned:{}"
+
+# Refresh token sống tối đa 7 ngày, entry revoke không cần giữ lâu hơn
+REFRESH_TOKEN_LIFETIME = 7 * 24 * 60 * 60
+
+
+def _remember(key, value):
+    # add chứ không set: không ghi đè kết quả revoke / ban vừa được ghi song song
+    cache.add(key, value, settings.JWT_REVOCATION_CACHE_TTL)
+    return value
+
+
+def revoke_refresh_token(token_value, expires_at=None):
+    timeout = REFRESH_TOKEN_LIFETIME
+    if expires_at is not None:
+        timeout = max(int((expires_at - timezone.now()).total_seconds()), 1)
+    cache.set(REVOKED_REFRESH_KEY.format(hash_token(token_value)), True, timeout)
+
+
+def _active_tokens(token_hash):
+    return RefreshToken.objects.filter(token_hash=token_hash, is_revoked=False)
+
+
+def is_refresh_token_revoked(token_value):
+    token_hash = hash_token(token_value)
+    key = REVOKED_REFRESH_KEY.format(token_hash)
+    revoked = cache.get(key)
+    if revoked is None:
+        revoked = _remember(key, not _active_tokens(token_hash).exists())
+    return revoked
+
+
+async def ais_refresh_token_revoked(token_value):
+    token_hash = hash_token(token_value)
+    key = REVOKED_REFRESH_KEY.format(token_hash)
+    revoked = cache.get(key)
+    if revoked is None:
+        revoked = _remember(key, not await _active_tokens(token_hash).aexists())
+    return revoked
+
+
+def mark_user_banned(user_id):
+    cache.set(BANNED_USER_KEY.format(user_id), True, None)
+
+
+def unmark_user_banned(user_id):
+    cache.delete(BANNED_USER_KEY.format(user_id))
+
+
+def _allowed_users(user_id):
+    # User đã bị xoá cũng coi như bị chặn
+    return User.objects.filter(id=user_id, is_banned=False)
+
+
+def is_user_banned(user_id):
+    key = BANNED_USER_KEY.format(user_id)
+    banned = cache.get(key)
+    if banned is None:
+        banned = _remember(key, not _allowed_users(user_id).exists())
+    return banned
+
+
+async def ais_user_banned(user_id):
+    key = BANNED_USER_KEY.format(user_id)
+    banned = cache.get(key)
+    if banned is None:
+        banned = _remember(key, not await _allowed_users(user_id).aexists())
+    return banned
@@ -0,0 +1,420 @@
+"""
+Index tìm kiếm user (typeahead) theo trigram, không query DB khi tìm.
+
+Key của 1 user: username, full_name (cả chuỗi lẫn từng từ) và phần trước @ của email,
+đã bỏ dấu + casefold. Tìm kiếm chạy 2 bước:
+- prefix: binary search trên bảng key đã sort, đủ kết quả thì dừng (trường hợp typeahead
+  thường gặp, chỉ đọc vài chục record);
+- fuzzy: mỗi key được tách thành trigram có pad đầu ("$$j", "$jo", "joh"...), ứng viên là
+  user có đủ số trigram chung với query.
+
+Lưu trữ gồm 2 tầng:
+- base: file nhị phân do `build_user_search_index` ghi, được mmap khi đọc
+  (postings là mảng int64 đã sort, tra bằng binary search, không load vào RAM);
+- delta: thay đổi từ signal post_save/post_delete, giữ trong RAM và che các bản cũ
+  trong base. Delta là riêng từng process; build lại file định kỳ để các worker
+  thấy thay đổi của nhau. Khi mở file mới, chỉ bỏ các thay đổi cũ hơn thời điểm
+  build bắt đầu đọc DB (snapshot_at, ghi trong header), thay đổi sau đó vẫn giữ.
+
+Định dạng file (byte order của máy build, file không mang sang máy khác kiến trúc):
+    header   : magic "USIX", version u32, số trigram u64, số doc u64, số key u64,
+               snapshot_at f64 (unix time)
+    trigrams : [gram 12 bytes utf-8 pad \\0, offset u64, length u64] sort theo gram
+    docs     : [user_id i64, offset u64, length u64] sort theo user_id
+    keys     : [offset u64, length u32, user_id i64] sort theo (key, user_id)
+    postings : int64 user_id, mỗi trigram 1 dải đã sort
+    strings  : "username\\x1ffull_name\\x1femail_local" utf-8 của từng doc, rồi tới các key
+"""
+import bisect
+import heapq
+import mmap
+import os
+import struct
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from math import ceil
+
+from django.conf import settings
+
+MAGIC = b"USIX"
+VERSION = 2
+HEADER = struct.Struct("=4sIQQQd")
+GRAM_RECORD = struct.Struct("=12sQQ")
+DOC_RECORD = struct.Struct("=qQQ")
+KEY_RECORD = struct.Struct("=QIq")
+SEPARATOR = "\x1f"
+
+# Tỉ lệ trigram của query tối thiểu phải khớp để thành ứng viên (fuzzy)
+MIN_SIMILARITY = 0.5
+# Posting list dài hơn (trigram quá phổ biến) không dùng để sinh ứng viên fuzzy
+MAX_CANDIDATES_PER_LIST = 2000
+# Số ứng viên tối đa (tính theo limit) được chấm điểm đầy đủ ở mỗi bước
+CANDIDATE_FACTOR = 5
+# Signal chạy trước khi transaction commit: thay đổi trong khoảng này trước snapshot
+# có thể chưa được lần build đọc thấy nên vẫn giữ trong delta
+SNAPSHOT_OVERLAP = 60
+
+
+def normalize(value):
+    """Bỏ dấu (kể cả tiếng Việt), casefold, gộp khoảng trắng"""
+    value = unicodedata.normalize("NFKD", value or "").replace("đ", "d").replace("Đ", "D")
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return " ".join(value.casefold().split())
+
+
+def doc_keys(username, full_name, email):
+    """Các key đã normalize của 1 user"""
+    keys = [normalize(username), normalize((email or "").split("@")[0])]
+    name = normalize(full_name)
+    if name:
+        keys.append(name)
+        keys.extend(name.split(" "))
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+def trigrams(key, pad_end=True):
+    padded = "$$" + key + ("$" if pad_end else "")
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def doc_trigrams(username, full_name, email):
+    grams = set()
+    for key in doc_keys(username, full_name, email):
+        grams |= trigrams(key)
+    return grams
+
+
+def _score(query, similarity, keys):
+    """Điểm xếp hạng: khớp chính xác > prefix > prefix của 1 từ > độ giống trigram"""
+    bonus = 0
+    for key in keys:
+        if key == query:
+            bonus = 3
+            break
+        if key.startswith(query):
+            bonus = max(bonus, 2)
+        elif f" {query}" in f" {key}":
+            bonus = max(bonus, 1)
+    return similarity + bonus
+
+
+def _contains(ids, user_id):
+    """user_id có trong dãy id đã sort (posting list)"""
+    index = bisect.bisect_left(ids, user_id)
+    return index < len(ids) and ids[index] == user_id
+
+
+# ---------------------------------------------------------------------------
+# Base index: file mmap
+# ---------------------------------------------------------------------------
+
+def write_index(path, rows, snapshot_at=None):
+    """
+    Ghi file index từ rows [(user_id, username, full_name, email)].
+    snapshot_at: thời điểm bắt đầu đọc rows từ DB, mặc định là lúc gọi (rows là
+    iterator lazy nên query chạy sau đó).
+    Ghi ra file tạm rồi os.replace để process đang đọc không thấy file dở dang.
+    """
+    if snapshot_at is None:
+        snapshot_at = time.time()
+    postings = {}
+    docs = []
+    keys = []
+    for user_id, username, full_name, email in rows:
+        docs.append((user_id, SEPARATOR.join((username or "", full_name or "", (email or "").split("@")[0]))))
+        grams = set()
+        for key in doc_keys(username, full_name, email):
+            keys.append((key.encode("utf-8"), user_id))
+            grams |= trigrams(key)
+        for gram in grams:
+            postings.setdefault(gram, array("q")).append(user_id)
+
+    docs.sort()
+    keys.sort()
+    grams = sorted((gram.encode("utf-8").ljust(12, b"\0"), ids) for gram, ids in postings.items())
+
+    tmp_path = f"{path}.tmp"
+    os.makedirs(os.path.dirname(os.fspath(path)) or ".", exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(grams), len(docs), len(keys), snapshot_at))
+        tables_end = (
+            HEADER.size + GRAM_RECORD.size * len(grams)
+            + DOC_RECORD.size * len(docs) + KEY_RECORD.size * len(keys)
+        )
+        # Postings căn theo 8 byte để cast sang int64 không bị lệch
+        padding = -tables_end % 8
+        postings_start = tables_end + padding
+
+        offset = postings_start
+        for encoded, ids in grams:
+            f.write(GRAM_RECORD.pack(encoded, offset, len(ids)))
+            offset += 8 * len(ids)
+
+        encoded_docs = []
+        for user_id, text in docs:
+            data = text.encode("utf-8")
+            f.write(DOC_RECORD.pack(user_id, offset, len(data)))
+            offset += len(data)
+            encoded_docs.append(data)
+
+        for key, user_id in keys:
+            f.write(KEY_RECORD.pack(offset, len(key), user_id))
+            offset += len(key)
+
+        f.write(b"\0" * padding)
+        for _, ids in grams:
+            f.write(array("q", sorted(ids)).tobytes())
+        for data in encoded_docs:
+            f.write(data)
+        for key, _ in keys:
+            f.write(key)
+    os.replace(tmp_path, path)
+    return len(docs)
+
+
+class _RecordTable:
+    """Bảng record kích thước cố định trong mmap, tra bằng binary search theo field đầu"""
+
+    def __init__(self, buffer, start, count, record):
+        self._buffer = buffer
+        self._start = start
+        self._count = count
+        self._record = record
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        return self._record.unpack_from(self._buffer, self._start + index * self._record.size)[0]
+
+    def find(self, key):
+        index = bisect.bisect_left(self, key)
+        if index < self._count and self[index] == key:
+            return self._record.unpack_from(self._buffer, self._start + index * self._record.size)
+        return None
+
+
+class _KeyTable(_RecordTable):
+    """Bảng key: so sánh theo nội dung key (bytes) thay vì field đầu của record"""
+
+    def __getitem__(self, index):
+        offset, length, _ = self._record.unpack_from(self._buffer, self._start + index * self._record.size)
+        return self._buffer[offset:offset + length]
+
+    def user_id(self, index):
+        return self._record.unpack_from(self._buffer, self._start + index * self._record.size)[2]
+
+
+class BaseIndex:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, gram_count, doc_count, key_count, snapshot_at = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} không phải file index hợp lệ")
+        self._grams = _RecordTable(self._mmap, HEADER.size, gram_count, GRAM_RECORD)
+        docs_start = HEADER.size + GRAM_RECORD.size * gram_count
+        self._docs = _RecordTable(self._mmap, docs_start, doc_count, DOC_RECORD)
+        keys_start = docs_start + DOC_RECORD.size * doc_count
+        self._keys = _KeyTable(self._mmap, keys_start, key_count, KEY_RECORD)
+        self._view = memoryview(self._mmap)
+        self.mtime = os.fstat(self._file.fileno()).st_mtime
+        self.doc_count = doc_count
+        self.snapshot_at = snapshot_at
+
+    def postings(self, gram):
+        """Dãy user_id (sort tăng dần) chứa trigram, đọc thẳng từ mmap"""
+        record = self._grams.find(gram.encode("utf-8").ljust(12, b"\0"))
+        if record is None:
+            return ()
+        _, offset, length = record
+        return self._view[offset:offset + 8 * length].cast("q")
+
+    def prefixed(self, prefix):
+        """user_id có key bắt đầu bằng prefix, theo thứ tự key (khớp chính xác đứng đầu)"""
+        encoded = prefix.encode("utf-8")
+        # utf-8 không bao giờ chứa byte 0xff nên prefix + 0xff lớn hơn mọi key cùng prefix
+        index = bisect.bisect_left(self._keys, encoded)
+        end = bisect.bisect_left(self._keys, encoded + b"\xff", index)
+        for i in range(index, end):
+            yield self._keys.user_id(i)
+
+    def document(self, user_id):
+        record = self._docs.find(user_id)
+        if record is None:
+            return None
+        _, offset, length = record
+        return bytes(self._view[offset:offset + length]).decode("utf-8").split(SEPARATOR)
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+
+# ---------------------------------------------------------------------------
+# Index = base (mmap) + delta (RAM)
+# ---------------------------------------------------------------------------
+
+class UserSearchIndex:
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._base = None
+        self._delta_docs = {}    # user_id -> [username, full_name, email_local]
+        self._delta_grams = {}   # trigram -> set(user_id)
+        self._masked = set()     # user_id đã đổi / xoá: bỏ qua bản trong base
+        self._changed_at = {}    # user_id -> time.time() của lần đổi / xoá cuối
+        self.reload()
+
+    def reload_if_changed(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        if self._base is None or os.path.getmtime(self.path) != self._base.mtime:
+            self.reload()
+
+    def reload(self):
+        """Mở lại file base (sau khi build) và bỏ phần delta đã có trong file"""
+        with self._lock:
+            if self._base is not None:
+                self._base.close()
+                self._base = None
+            if self.path and os.path.exists(self.path):
+                try:
+                    self._base = BaseIndex(self.path)
+                except (OSError, ValueError) as e:
+                    print(f"[ERROR] Không mở được index tìm kiếm user: {e}")
+            if self._base is None:
+                return
+            since = self._base.snapshot_at - SNAPSHOT_OVERLAP
+            for user_id, changed_at in list(self._changed_at.items()):
+                if changed_at < since:
+                    del self._changed_at[user_id]
+                    self._drop_delta(user_id)
+                    self._masked.discard(user_id)
+
+    def _drop_delta(self, user_id):
+        old = self._delta_docs.pop(user_id, None)
+        if old is not None:
+            for gram in doc_trigrams(old[0], old[1], old[2]):
+                ids = self._delta_grams.get(gram)
+                if ids is not None:
+                    ids.discard(user_id)
+                    if not ids:
+                        del self._delta_grams[gram]
+
+    def update(self, user_id, username, full_name, email):
+        with self._lock:
+            self._drop_delta(user_id)
+            self._masked.add(user_id)
+            self._changed_at[user_id] = time.time()
+            email_local = (email or "").split("@")[0]
+            self._delta_docs[user_id] = [username or "", full_name or "", email_local]
+            for gram in doc_trigrams(username, full_name, email_local):
+                self._delta_grams.setdefault(gram, set()).add(user_id)
+
+    def remove(self, user_id):
+        with self._lock:
+            self._drop_delta(user_id)
+            self._masked.add(user_id)
+            self._changed_at[user_id] = time.time()
+
+    def document(self, user_id):
+        """[username, full_name, email_local] đang được index, None nếu chưa có"""
+        with self._lock:
+            return self._document(user_id)
+
+    def _document(self, user_id):
+        doc = self._delta_docs.get(user_id)
+        if doc is None and self._base is not None and user_id not in self._masked:
+            doc = self._base.document(user_id)
+        return doc
+
+    def _prefix_candidates(self, query, wanted, exclude):
+        found = []
+        for user_id, doc in self._delta_docs.items():
+            if user_id not in exclude and any(key.startswith(query) for key in doc_keys(*doc)):
+                found.append(user_id)
+        if self._base is not None:
+            for user_id in self._base.prefixed(query):
+                if len(found) >= wanted:
+                    break
+                if user_id not in self._masked and user_id not in exclude and user_id not in found:
+                    found.append(user_id)
+        return found
+
+    def _fuzzy_candidates(self, grams, wanted, exclude):
+        threshold = max(1, ceil(len(grams) * MIN_SIMILARITY))
+        counts = Counter()
+        if self._base is not None:
+            # Trigram hiếm trước: user đạt threshold chắc chắn nằm trong ít nhất 1 trong
+            # (n - threshold + 1) posting list ngắn nhất, chỉ các list này sinh ứng viên.
+            # List quá dài (trigram quá phổ biến) bị bỏ qua chứ không cắt theo id.
+            postings = sorted((self._base.postings(gram) for gram in grams), key=len)
+            seeds = len(grams) - threshold + 1
+            for ids in postings[:seeds]:
+                if len(ids) <= MAX_CANDIDATES_PER_LIST:
+                    counts.update(ids)
+            # List còn lại chỉ dùng để đếm cho ứng viên đã có (binary search)
+            for ids in postings[seeds:]:
+                for user_id in counts:
+                    if _contains(ids, user_id):
+                        counts[user_id] += 1
+            for user_id in self._masked.intersection(counts):
+                del counts[user_id]
+        for gram in grams:
+            counts.update(self._delta_grams.get(gram, ()))
+        matched = ((count, user_id) for user_id, count in counts.items()
+                   if count >= threshold and user_id not in exclude)
+        return {user_id: count for count, user_id in heapq.nlargest(wanted, matched)}
+
+    def search(self, query, limit=10, exclude=()):
+        """[{"id", "username", "full_name"}] xếp theo độ liên quan"""
+        query = normalize(query)
+        if not query:
+            return []
+        grams = trigrams(query, pad_end=False)
+        wanted = limit * CANDIDATE_FACTOR
+
+        with self._lock:
+            # Key chứa query làm prefix thì chứa mọi trigram của query (similarity = 1)
+            candidates = dict.fromkeys(self._prefix_candidates(query, wanted, exclude), len(grams))
+            if len(candidates) < limit:
+                for user_id, count in self._fuzzy_candidates(grams, wanted, exclude).items():
+                    candidates.setdefault(user_id, count)
+
+            ranked = []
+            for user_id, matched in candidates.items():
+                doc = self._document(user_id)
+                if doc is None:
+                    continue
+                keys = doc_keys(*doc)
+                ranked.append((-_score(query, matched / len(grams), keys), len(doc[0]), user_id, doc))
+
+        ranked.sort()
+        return [
+            {"id": user_id, "username": doc[0], "full_name": doc[1]}
+            for _, _, user_id, doc in ranked[:limit]
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Index của process, tự mở lại khi file base được build lại"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = UserSearchIndex(settings.USER_SEARCH_INDEX_PATH)
+        else:
+            _index.reload_if_changed()
+    return _index
+
+
+def search_users(query, limit=10, exclude=()):
+    return get_index().search(query, limit, exclude)
@@ -1,19 +1,23 @@
 from os import error
+import uuid
 import jwt
 from datetime import datetime, timedelta
 from django.conf import settings
-from .models import RefreshToken, PasswordResetToken
+from .models import RefreshToken, PasswordResetToken, hash_token
 from django.utils import timezone
 from django.utils import timezone
 from datetime import timedelta
-from django.core.mail import send_mail
+from apps.core.services import enqueue_email
 from .models import User, EmailVerificationToken, UserProfile
+from .revocation import revoke_refresh_token
+from .throttle import allow_login
+from . import hashing
 from django.conf import settings
 
 JWT_SECRET = settings.SECRET_KEY
 JWT_ALGORITHM = 'HS256'
 
-def create_jwt_pair_for_user(user):
+def _jwt_pair(user):
     access_payload = {
         'user_id': user.id,
         'email': user.email,
@@ -26,16 +30,29 @@ def create_jwt_pair_for_user(user):
         'user_id': user.id,
         'email': user.email,
         'exp': (timezone.now() + timedelta(days=7)),
-        'type': 'refresh'
+        'type': 'refresh',
+        # jti để 2 lần login trong cùng 1 giây không sinh ra cùng 1 token
+        'jti': uuid.uuid4().hex,
     }
     refresh_token = jwt.encode(refresh_payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return access_token, refresh_token
 
+def create_jwt_pair_for_user(user):
+    access_token, refresh_token = _jwt_pair(user)
     RefreshToken.objects.create(
         user=user,
-        token=refresh_token,
+        token_hash=hash_token(refresh_token),
         expires_at=timezone.now() + timedelta(days=7)
     )
+    return access_token, refresh_token
 
+async def acreate_jwt_pair_for_user(user):
+    access_token, refresh_token = _jwt_pair(user)
+    await RefreshToken.objects.acreate(
+        user=user,
+        token_hash=hash_token(refresh_token),
+        expires_at=timezone.now() + timedelta(days=7)
+    )
     return access_token, refresh_token
 
 def decode_jwt(token, verify_exp=True):
@@ -74,9 +91,9 @@ def register_user(username, email, password):
         user=user,
         expires_at=timezone.now() + timedelta(hours=1)
     )
-    # Gửi mail
+    # Gửi mail qua outbox, worker send_queued_emails sẽ gửi
     verify_url = f"http://127.0.0.1:8080/accounts/verify-email?token={token.token}"
-    send_mail('Verify email', f'Click: {verify_url}', settings.EMAIL_HOST_USER, [user.email])
+    enqueue_email('Verify email', f'Click: {verify_url}', [user.email])
 
     return user, None
 
@@ -116,13 +133,23 @@ def verify_email_token(token_value):
 
     return True, "Email đã được xác thực thành công! Bạn có thể đăng nhập ngay bây giờ.", user
 
-def login_user(email, password):
+# Lỗi khi login bị chặn trước khi hash password (view trả 429)
+LOGIN_THROTTLED = "Too many login attempts. Please try again later."
+LOGIN_BUSY = "Server is busy. Please try again in a moment."
+
+def login_user(email, password, ip=None):
+    if not allow_login(ip, email):
+        return None, LOGIN_THROTTLED
     try:
         user = User.objects.get(email=email)
         error = None
     except User.DoesNotExist:
         return None, "Invalid email or password"
-    if not user.check_password(password):
+    # Hash chạy trên pool giới hạn (apps/accounts/hashing.py)
+    valid = hashing.check_password(user, password)
+    if valid is None:
+        return None, LOGIN_BUSY
+    if not valid:
         return None, "Invalid email or password"
     if not user.is_active:
         return None, "Account is not active"
@@ -132,12 +159,36 @@ def login_user(email, password):
      # Tạo JWT
     return user, error
 
+async def alogin_user(email, password, ip=None):
+    """
+    Bản async của login_user. Throttle theo IP / tài khoản trước, hash password
+    (PBKDF2, hàng trăm ms CPU) chạy trên pool giới hạn, không chặn event loop.
+    """
+    if not allow_login(ip, email):
+        return None, LOGIN_THROTTLED
+    try:
+        user = await User.objects.aget(email=email)
+    except User.DoesNotExist:
+        return None, "Invalid email or password"
+    valid = await hashing.acheck_password(user, password)
+    if valid is None:
+        return None, LOGIN_BUSY
+    if not valid:
+        return None, "Invalid email or password"
+    if not user.is_active:
+        return None, "Account is not active"
+    if user.is_banned:
+        return None, "Account is banned"
+    return user, None
+
 def logout_user(refresh_token_value):
     try:
-        token = RefreshToken.objects.get(token=refresh_token_value)
+        token = RefreshToken.objects.get(token_hash=hash_token(refresh_token_value))
+        revoke_refresh_token(refresh_token_value, token.expires_at)
         token.delete()
         return True
     except RefreshToken.DoesNotExist:
+        revoke_refresh_token(refresh_token_value)
         return False
     except Exception as e:
         print(f"[ERROR] Lỗi khi đăng xuất: {e}")
@@ -149,7 +200,7 @@ def refresh_jwt_token(refresh_token_value):
         return None, "Invalid refresh token"
 
     try:
-        token_record = RefreshToken.objects.get(token=refresh_token_value)
+        token_record = RefreshToken.objects.get(token_hash=hash_token(refresh_token_value))
     except RefreshToken.DoesNotExist:
         return None, "Refresh token not found"
 
@@ -160,6 +211,7 @@ def refresh_jwt_token(refresh_token_value):
     new_access_token, new_refresh_token = create_jwt_pair_for_user(user)
 
     # Xoá token cũ
+    revoke_refresh_token(refresh_token_value, token_record.expires_at)
     token_record.delete()
 
     return (new_access_token, new_refresh_token), None
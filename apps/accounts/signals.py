@@ -1,6 +1,72 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
-from django.contrib.auth import get_user_model
-from .models import UserProfile
+from django.db.models.signals import post_delete, post_save
+from .models import User, UserProfile, RefreshToken
+from .images import needs_processing, schedule_profile_images
+from .search import get_index
+from .revocation import mark_user_banned, unmark_user_banned
+from apps.core.pagecache import bump_user_version
+from apps.middleware.auth_context import invalidate_user_snapshot
 
-User = get_user_model()
\ No newline at end of file
+
+@receiver(post_save, sender=User)
+def sync_ban_state(sender, instance, created, **kwargs):
+    """Đồng bộ trạng thái ban sang cache revoke cho stateless auth"""
+    if instance.is_banned:
+        mark_user_banned(instance.id)
+        # Refresh token cũ không được dùng để lấy access mới nữa
+        RefreshToken.objects.filter(user=instance, is_revoked=False).update(is_revoked=True)
+    elif not created:
+        unmark_user_banned(instance.id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_snapshot(sender, instance, **kwargs):
+    invalidate_user_snapshot(instance.id)
+
+
+@receiver(post_save, sender=User)
+def bump_home_page(sender, instance, update_fields=None, **kwargs):
+    # Trang chủ hiển thị username: fragment / ETag cũ của user hết hiệu lực
+    if update_fields is None or "username" in update_fields:
+        bump_user_version(instance.id)
+
+
+@receiver(post_save, sender=UserProfile)
+def generate_image_variants(sender, instance, **kwargs):
+    # So tên file gốc với image_variants, không tốn query khi ảnh không đổi
+    if needs_processing(instance):
+        schedule_profile_images(instance)
+
+
+# ---------------------------------------------------------------------------
+# Cập nhật index tìm kiếm user (apps/accounts/search.py)
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, update_fields=None, **kwargs):
+    # Bỏ qua save chỉ đổi field không được index (vd. last_login lúc đăng nhập)
+    if update_fields is not None and not {'username', 'email'} & set(update_fields):
+        return
+    full_name = UserProfile.objects.filter(user=instance).values_list('full_name', flat=True).first()
+    get_index().update(instance.id, instance.username, full_name or "", instance.email)
+
+
+@receiver(post_save, sender=UserProfile)
+def index_profile(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'full_name' not in update_fields:
+        return
+    index = get_index()
+    # username / email lấy từ bản đang index, không query User mỗi lần lưu profile
+    doc = index.document(instance.user_id)
+    if doc is None:
+        user = instance.user
+        doc = [user.username, "", user.email]
+    elif doc[1] == (instance.full_name or ""):
+        return  # full_name không đổi (vd. chỉ sửa bio / avatar)
+    index.update(instance.user_id, doc[0], instance.full_name, doc[2])
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    get_index().remove(instance.id)
@@ -0,0 +1,45 @@
+from django import template
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.html import format_html, format_html_join
+
+from apps.accounts.images import variant_urls
+
+register = template.Library()
+
+FIELDS = {"avatar": "avatar", "cover": "cover_image"}
+
+
+@register.simple_tag
+def profile_image(user, kind="avatar", size=40, css_class=""):
+    """
+    <picture> với srcset WebP + JPEG/PNG của các variant, trình duyệt tự chọn bản
+    vừa với `size` (px) và mật độ điểm ảnh. Rỗng nếu user chưa có ảnh.
+    Dùng: {% load images %}{% profile_image post.author "avatar" 40 %}
+    """
+    try:
+        profile = user.profile
+    except (ObjectDoesNotExist, AttributeError):
+        return ""
+    if profile is None:
+        return ""
+
+    variants = variant_urls(profile, kind)
+    if not variants:
+        # Variant chưa sinh xong: tạm dùng ảnh gốc
+        original = getattr(profile, FIELDS[kind])
+        if not original:
+            return ""
+        return format_html(
+            '<img src="{}" class="{}" width="{}" height="{}" loading="lazy" alt="">',
+            original.url, css_class, size, size,
+        )
+
+    webp = format_html_join(", ", "{} {}w", ((url, width) for width, _, url in variants))
+    fallback = format_html_join(", ", "{} {}w", ((url, width) for width, url, _ in variants))
+    # src mặc định: bản nhỏ nhất không nhỏ hơn size
+    src = next((url for width, url, _ in variants if width >= size), variants[-1][1])
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}px">'
+        '<img src="{}" srcset="{}" sizes="{}px" class="{}" width="{}" height="{}" loading="lazy" alt=""></picture>',
+        webp, size, src, fallback, size, css_class, size, size,
+    )
@@ -1,3 +1,201 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+
+from . import hashing, search, throttle
+from .models import RefreshToken, User, UserProfile
+from .search import SNAPSHOT_OVERLAP, UserSearchIndex, get_index, write_index
+from .services import LOGIN_BUSY, LOGIN_THROTTLED
+from .signals import index_profile
+
+
+def usernames(results):
+    return [row["username"] for row in results]
+
+
+class UserSearchIndexTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "users.idx")
+        self.rows = [(1, "john", "John Smith", "john@example.com"), (2, "anna", "Anna Nguyễn", "an@example.com")]
+
+    def rebuild(self, snapshot_at):
+        write_index(self.path, self.rows, snapshot_at=snapshot_at)
+        # mtime đổi chắc chắn dù 2 lần ghi rơi vào cùng 1 tick đồng hồ
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_prefix_fuzzy_and_unaccented(self):
+        write_index(self.path, self.rows)
+        index = UserSearchIndex(self.path)
+        self.assertEqual(usernames(index.search("jo")), ["john"])
+        self.assertEqual(usernames(index.search("jhon smith")), ["john"])
+        self.assertEqual(usernames(index.search("nguyen")), ["anna"])
+        self.assertEqual(index.search("jo", exclude={1}), [])
+
+    def test_delta_overrides_base(self):
+        write_index(self.path, self.rows)
+        index = UserSearchIndex(self.path)
+        index.update(1, "johnny", "John Smith", "john@example.com")
+        index.update(3, "carol", "", "carol@example.com")
+        index.remove(2)
+        self.assertEqual(usernames(index.search("john")), ["johnny"])
+        self.assertEqual(usernames(index.search("car")), ["carol"])
+        self.assertEqual(index.search("anna"), [])
+
+    def test_fuzzy_is_not_biased_to_low_ids(self):
+        """Trigram phổ biến có nhiều user hơn giới hạn: user id lớn vẫn được tìm thấy"""
+        rows = [(i, f"user{i}", "Trần Văn Bình", f"u{i}@example.com") for i in range(1, 51)]
+        rows.append((1000, "khoa", "Trần Văn Khoa", "khoa@example.com"))
+        write_index(self.path, rows)
+        with mock.patch.object(search, "MAX_CANDIDATES_PER_LIST", 10):
+            index = UserSearchIndex(self.path)
+            self.assertEqual(usernames(index.search("tran van khao", limit=1)), ["khoa"])
+
+    def test_reload_keeps_changes_newer_than_snapshot(self):
+        self.rebuild(snapshot_at=time.time())
+        index = UserSearchIndex(self.path)
+        index.update(3, "carol", "", "carol@example.com")
+
+        # Build đọc DB trước khi carol được tạo: file mới chưa có carol
+        self.rebuild(snapshot_at=time.time())
+        index.reload_if_changed()
+        self.assertEqual(usernames(index.search("carol")), ["carol"])
+
+        # Build sau đó đã gộp thay đổi: delta cũ được bỏ
+        self.rebuild(snapshot_at=time.time() + SNAPSHOT_OVERLAP + 1)
+        index.reload_if_changed()
+        self.assertEqual(index.search("carol"), [])
+        self.assertEqual(usernames(index.search("john")), ["john"])
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class IndexSignalTests(TestCase):
+    def test_profile_save_updates_index_without_query(self):
+        user = User.objects.create_user(email="linh@example.com", username="linh", password="x")
+        UserProfile.objects.create(user=user, full_name="Trần Linh")
+        self.assertEqual(get_index().document(user.id), ["linh", "Trần Linh", "linh"])
+
+        profile = UserProfile.objects.get(user_id=user.id)
+        profile.full_name = "Trần Thuỳ Linh"
+        with self.assertNumQueries(0):
+            index_profile(UserProfile, profile)
+        self.assertIn(user.id, [row["id"] for row in get_index().search("thuy linh")])
+
+        # full_name không đổi: không cập nhật lại
+        with self.assertNumQueries(0):
+            index_profile(UserProfile, profile)
+
+
+@override_settings(JWT_STATELESS_AUTH=True, PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class StatelessAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="sam@example.com", username="sam", password="pw", is_active=True)
+        response = self.client.post("/accounts/login/", {"email": "sam@example.com", "password": "pw"})
+        self.assertEqual(response.status_code, 302)
+        self.cookies = {name: morsel.value for name, morsel in self.client.cookies.items()}
+
+    def get_friends(self):
+        """(status sync, status async) của 1 trang cần đăng nhập, dùng cookie lúc login"""
+        self.client.cookies.clear()
+        for name, value in self.cookies.items():
+            self.client.cookies[name] = value
+
+        async def run():
+            client = AsyncClient()
+            for name, value in self.cookies.items():
+                client.cookies[name] = value
+            return (await client.get("/friends/")).status_code
+
+        return self.client.get("/friends/").status_code, async_to_sync(run)()
+
+    def test_valid_token_is_accepted(self):
+        self.assertEqual(self.get_friends(), (200, 200))
+
+    def test_logout_revokes_refresh_token_even_after_eviction(self):
+        self.client.get("/accounts/logout/")
+        self.assertEqual(self.get_friends(), (302, 302))
+        # Entry revoke bị evict / cache bị xoá: DB (token đã bị xoá) vẫn chặn
+        cache.clear()
+        self.assertEqual(self.get_friends(), (302, 302))
+
+    def test_revoked_token_is_rejected(self):
+        self.assertEqual(self.get_friends(), (200, 200))  # "chưa revoke" được cache lại
+        RefreshToken.objects.filter(user=self.user).update(is_revoked=True)
+        cache.clear()
+        self.assertEqual(self.get_friends(), (302, 302))
+
+    def test_banned_user_is_rejected_even_after_eviction(self):
+        self.user.is_banned = True
+        self.user.save()
+        self.assertEqual(self.get_friends(), (302, 302))
+        cache.clear()
+        self.assertEqual(self.get_friends(), (302, 302))
+
+        self.user.is_banned = False
+        self.user.save()
+        RefreshToken.objects.filter(user=self.user).update(is_revoked=False)
+        self.assertEqual(self.get_friends(), (200, 200))
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_drains_and_refills(self):
+        now = [1000.0]
+        with mock.patch.object(throttle.time, "time", lambda: now[0]):
+            self.assertEqual([throttle.take("t", "a", 2, 10) for _ in range(3)], [True, True, False])
+            # Bucket khác không bị ảnh hưởng
+            self.assertTrue(throttle.take("t", "b", 2, 10))
+            now[0] += 5  # hồi 1 token
+            self.assertEqual([throttle.take("t", "a", 2, 10) for _ in range(2)], [True, False])
+            now[0] += 60  # không hồi quá capacity
+            self.assertEqual([throttle.take("t", "a", 2, 10) for _ in range(3)], [True, True, False])
+
+    @override_settings(LOGIN_THROTTLE_IP=(100, 60), LOGIN_THROTTLE_ACCOUNT=(2, 300))
+    def test_account_bucket_is_per_ip(self):
+        """Thử sai từ IP của kẻ tấn công không khoá tài khoản với IP của chủ nhân"""
+        self.assertEqual([throttle.allow_login("10.0.0.1", "Victim@example.com") for _ in range(3)], [True, True, False])
+        self.assertTrue(throttle.allow_login("10.0.0.2", "victim@example.com"))
+        self.assertTrue(throttle.allow_login("10.0.0.1", "other@example.com"))
+
+    @override_settings(LOGIN_THROTTLE_IP=(2, 60), LOGIN_THROTTLE_ACCOUNT=(100, 300))
+    def test_ip_bucket_covers_all_accounts(self):
+        self.assertTrue(throttle.allow_login("10.0.0.1", "a@example.com"))
+        self.assertTrue(throttle.allow_login("10.0.0.1", "b@example.com"))
+        self.assertFalse(throttle.allow_login("10.0.0.1", "c@example.com"))
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class LoginLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(email="kim@example.com", username="kim", password="pw", is_active=True)
+
+    def login(self, password="pw"):
+        return self.client.post("/accounts/login/", {"email": "kim@example.com", "password": password})
+
+    @override_settings(LOGIN_THROTTLE_IP=(100, 60), LOGIN_THROTTLE_ACCOUNT=(2, 300))
+    def test_throttled_login_gets_429(self):
+        self.assertEqual(self.login("wrong").status_code, 200)
+        self.assertEqual(self.login().status_code, 302)
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, LOGIN_THROTTLED, status_code=429)
+
+    def test_saturated_hash_pool_gets_503(self):
+        full = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+        with mock.patch.object(hashing, "_in_flight", full):
+            response = self.login()
+            self.assertContains(response, LOGIN_BUSY, status_code=503)
+            self.assertIsNone(hashing.check_password(User.objects.get(email="kim@example.com"), "pw"))
+        self.assertEqual(self.login().status_code, 302)
@@ -0,0 +1,56 @@
+"""
+Token bucket cho login, chặn request trước khi tốn CPU hash password.
+
+Mỗi bucket (theo IP hoặc theo cặp IP + tài khoản) lưu (số token, thời điểm cập nhật) trong
+cache, token hồi dần theo thời gian đến tối đa `capacity`. Lock chỉ có tác dụng
+trong process: với cache chung (memcached / redis) nhiều process có thể cùng trừ
+1 token, giới hạn khi đó là gần đúng, đủ để chặn burst credential stuffing.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from math import ceil
+
+from django.conf import settings
+from django.core.cache import cache
+
+BUCKET_KEY = "throttle:{}:{}"
+
+_lock = threading.Lock()
+_rejected = Counter()
+
+
+def take(scope, ident, capacity, period):
+    """
+    Lấy 1 token từ bucket (scope, ident), bucket đầy `capacity` token và hồi
+    `capacity` token sau mỗi `period` giây. Trả về False nếu đã hết token.
+    """
+    key = BUCKET_KEY.format(scope, ident)
+    rate = capacity / period
+    # time.time() chứ không phải monotonic: bucket có thể được process khác cập nhật
+    now = time.time()
+    with _lock:
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + max(0, now - updated) * rate)
+        if tokens < 1:
+            _rejected[scope] += 1
+            return False
+        # Hết timeout thì bucket đã hồi đầy, cache tự bỏ key
+        cache.set(key, (tokens - 1, now), ceil(period))
+        return True
+
+
+def allow_login(ip, email):
+    """Kiểm tra bucket theo IP rồi theo (IP, tài khoản), không hash / query gì"""
+    if ip and not take("login-ip", ip, *settings.LOGIN_THROTTLE_IP):
+        return False
+    # Bucket tài khoản gắn với IP: người khác thử sai từ IP khác không khoá được
+    # tài khoản của chủ nhân. Key cache không chứa email thô (ký tự lạ, độ dài)
+    account = f"{ip or ''}|{(email or '').strip().lower()}"
+    return take("login-account", hashlib.sha1(account.encode()).hexdigest(), *settings.LOGIN_THROTTLE_ACCOUNT)
+
+
+def get_stats():
+    with _lock:
+        return {f"rejected_{scope.replace('-', '_')}": n for scope, n in sorted(_rejected.items())}
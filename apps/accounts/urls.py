@@ -9,4 +9,5 @@ urlpatterns = [
     path("logout/", logout_view, name="logout"),
     path("forgot-password/", forgot_password_view, name="forgot_password"),
     path("reset-password/", reset_password_view, name="reset_password"),
+    path("search/", search_users_view, name="search_users"),
 ]
\ No newline at end of file
@@ -1,15 +1,18 @@
 from django.shortcuts import render, redirect
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.core.mail import send_mail
-from django.conf import settings
+from apps.core.services import enqueue_email
 
+from apps.middleware.auth_context import get_request_user
 from .models import User, PasswordResetToken
+from .search import search_users
 from .services import (
     register_user,
-    login_user,
-    create_jwt_pair_for_user,
+    alogin_user,
+    LOGIN_BUSY,
+    LOGIN_THROTTLED,
+    acreate_jwt_pair_for_user,
     logout_user,
     create_password_reset_token,
     reset_user_password,
@@ -35,23 +38,26 @@ def register_view(request):
         "message": f"User: {username} registered. Check email: {email} to verify."
     })
 
-#login
+# Login bị chặn trước khi hash: quá số lần thử / pool hash đang đầy
+LOGIN_ERROR_STATUS = {LOGIN_THROTTLED: 429, LOGIN_BUSY: 503}
+
+#login (async: chờ DB / hash password không giữ worker)
 @csrf_exempt
-def login_view(request):
+async def login_view(request):
     if request.method == "GET":
         return render(request, "accounts/login.html")
 
     email = request.POST.get("email")
     password = request.POST.get("password")
 
-    user, error = login_user(email, password)
+    user, error = await alogin_user(email, password, request.META.get("REMOTE_ADDR"))
 
     if not user:
         return render(request, "accounts/login.html", {
             "error": error or "Invalid credentials"
-        })
+        }, status=LOGIN_ERROR_STATUS.get(error, 200))
 
-    access_token, refresh_token = create_jwt_pair_for_user(user)
+    access_token, refresh_token = await acreate_jwt_pair_for_user(user)
 
     response = redirect("home")  # đổi thành URL name của bạn
     response.set_cookie("access", access_token, httponly=True, max_age=15 * 60)
@@ -85,10 +91,9 @@ def forgot_password_view(request):
         token = create_password_reset_token(user)
 
         reset_url = f"http://127.0.0.1:8080/accounts/reset-password/?token={token.token}"
-        send_mail(
+        enqueue_email(
             "Reset password",
             f"Click here: {reset_url}",
-            settings.EMAIL_HOST_USER,
             [user.email],
         )
     except User.DoesNotExist:
@@ -162,3 +167,15 @@ def verify_email_view(request):
     return render(request, "accounts/verify_email.html", {
         "message": "Email verified successfully. You can login now."
     })
+
+# Typeahead tìm user: đọc từ index trigram trong process, không query DB
+SEARCH_LIMIT = 10
+SEARCH_MAX_QUERY = 100
+
+def search_users_view(request):
+    me = get_request_user(request)
+    if me is None:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    query = (request.GET.get("q") or "")[:SEARCH_MAX_QUERY]
+    return JsonResponse({"results": search_users(query, SEARCH_LIMIT, exclude={me.id})})
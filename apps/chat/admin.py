@@ -1,3 +1,13 @@
 from django.contrib import admin
+from .models import Conversation, ConversationMember, Message
 
-# Register your models here.
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'title', 'is_group', 'created_at')
+
+@admin.register(Message)
+class MessageAdmin(admin.ModelAdmin):
+    list_display = ('conversation', 'sender', 'body', 'created_at')
+    search_fields = ('sender__email', 'body')
+
+admin.site.register(ConversationMember)
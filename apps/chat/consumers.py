@@ -0,0 +1,217 @@
+"""
+WebSocket consumer thuần ASGI cho chat.
+
+Mỗi kết nối: 1 coroutine đọc frame từ client + 1 task ghi ra socket, cả hai
+chỉ await nên kết nối idle không tốn CPU. Message gửi tới user qua broker
+(channel "user:<id>"), mọi frame ra client đều đi qua queue của kết nối để chỉ
+có 1 task gọi send().
+
+Message gửi dồn dập được MessageBatcher gom theo conversation trong 1 cửa sổ
+ngắn (CHAT_BATCH_WINDOW) rồi ghi bằng 1 bulk_create.
+
+Giao thức (JSON):
+    -> {"type": "message", "conversation": <id>, "body": "..."}
+    -> {"type": "read", "conversation": <id>, "seq": <seq>}
+    -> {"type": "ping"}
+    <- {"type": "message", "conversation", "seq", "sender", "body", "created_at"}
+    <- {"type": "pong"} / {"type": "error", "error": "..."}
+"""
+import asyncio
+import json
+import weakref
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http.cookie import parse_cookie
+
+from apps.middleware.jwt_auth import authenticate_cookies
+from .pubsub import get_broker, user_channel
+from .services import append_messages, mark_read, serialize_message
+
+CLOSE_UNAUTHORIZED = 4401
+MAX_FRAME_SIZE = 16 * 1024
+
+
+def _db(func):
+    """
+    Chạy code ORM trong thread pool, dọn connection cũ như request HTTP.
+    thread_sensitive=False: các kết nối không phải xếp hàng qua 1 thread sync chung.
+    """
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+def _get_cookies(scope):
+    for name, value in scope.get("headers", ()):
+        if name == b"cookie":
+            return parse_cookie(value.decode("latin-1"))
+    return {}
+
+
+async def broadcast(payload, user_ids):
+    broker = get_broker()
+    for user_id in user_ids:
+        await broker.publish(user_channel(user_id), payload)
+
+
+class MessageBatcher:
+    """Gom message theo conversation, flush sau `window` giây hoặc khi đủ `max_batch`"""
+
+    def __init__(self, window, max_batch):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = {}
+        # Event loop chỉ giữ weak reference tới task: giữ lại đến khi task xong
+        self._tasks = set()
+        # Các batch cùng conversation ghi lần lượt: ghi song song cũng chỉ chờ nhau ở
+        # lock dòng conversation trong DB mà giữ thêm thread. Lock tự mất khi không ai dùng
+        self._locks = weakref.WeakValueDictionary()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def submit(self, sender_id, conversation_id, body):
+        """Trả về (message, error) sau khi message đã được ghi và publish"""
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.get(conversation_id)
+        if batch is None:
+            batch = self._pending[conversation_id] = []
+            self._spawn(self._flush_later(conversation_id, batch))
+        batch.append((sender_id, body, future))
+
+        if len(batch) >= self.max_batch:
+            del self._pending[conversation_id]
+            self._spawn(self._flush(conversation_id, batch))
+        return await future
+
+    async def _flush_later(self, conversation_id, batch):
+        await asyncio.sleep(self.window)
+        # Batch có thể đã được flush sớm vì đầy
+        if self._pending.get(conversation_id) is batch:
+            del self._pending[conversation_id]
+            await self._flush(conversation_id, batch)
+
+    async def _flush(self, conversation_id, batch):
+        lock = self._locks.get(conversation_id)
+        if lock is None:
+            lock = self._locks[conversation_id] = asyncio.Lock()
+        try:
+            async with lock:
+                results, member_ids = await _db(append_messages)(
+                    conversation_id, [(sender_id, body) for sender_id, body, _ in batch]
+                )
+        except Exception as e:
+            print("[ERROR] Lỗi ghi message:", e)
+            results = [(None, "Could not send message.")] * len(batch)
+            member_ids = []
+
+        for message, _ in results:
+            if message:
+                await broadcast(serialize_message(message), member_ids)
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+_batcher = None
+
+
+def get_batcher():
+    global _batcher
+    if _batcher is None:
+        _batcher = MessageBatcher(settings.CHAT_BATCH_WINDOW, settings.CHAT_BATCH_SIZE)
+    return _batcher
+
+
+def _int_field(data, name):
+    try:
+        return int(data.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+async def _handle_frame(user_id, text):
+    """Xử lý 1 frame từ client, trả về frame phản hồi riêng cho người gửi (hoặc None)"""
+    if not text or len(text) > MAX_FRAME_SIZE:
+        return {"type": "error", "error": "Invalid frame."}
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {"type": "error", "error": "Invalid JSON."}
+    if not isinstance(data, dict):
+        return {"type": "error", "error": "Invalid frame."}
+
+    kind = data.get("type")
+    if kind == "ping":
+        return {"type": "pong"}
+
+    conversation_id = _int_field(data, "conversation")
+    if kind in ("message", "read") and conversation_id is None:
+        return {"type": "error", "error": "Invalid conversation."}
+
+    if kind == "message":
+        # Người gửi cũng là member nên nhận lại message qua channel của mình
+        _, error = await get_batcher().submit(user_id, conversation_id, data.get("body"))
+        if error:
+            return {"type": "error", "error": error}
+        return None
+
+    if kind == "read":
+        seq = _int_field(data, "seq")
+        if seq is None or seq < 0:
+            return {"type": "error", "error": "Invalid seq."}
+        await _db(mark_read)(user_id, conversation_id, seq)
+        return None
+
+    return {"type": "error", "error": "Unknown frame type."}
+
+
+async def _writer(queue, send):
+    while True:
+        payload = await queue.get()
+        await send({"type": "websocket.send", "text": json.dumps(payload)})
+
+
+async def chat_consumer(scope, receive, send):
+    event = await receive()
+    if event["type"] != "websocket.connect":
+        return
+
+    user_id = await _db(authenticate_cookies)(_get_cookies(scope))
+    if user_id is None:
+        await send({"type": "websocket.close", "code": CLOSE_UNAUTHORIZED})
+        return
+
+    await send({"type": "websocket.accept"})
+
+    broker = get_broker()
+    channel = user_channel(user_id)
+    queue = asyncio.Queue(maxsize=settings.CHAT_QUEUE_SIZE)
+    await broker.subscribe(channel, queue)
+    writer = asyncio.create_task(_writer(queue, send))
+
+    try:
+        while True:
+            event = await receive()
+            if event["type"] == "websocket.disconnect":
+                break
+            if event["type"] != "websocket.receive":
+                continue
+            reply = await _handle_frame(user_id, event.get("text"))
+            if reply is not None:
+                try:
+                    queue.put_nowait(reply)
+                except asyncio.QueueFull:
+                    pass
+    finally:
+        await broker.unsubscribe(channel, queue)
+        writer.cancel()
@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+
+def fill_seq(apps, schema_editor):
+    """Đánh seq cho message cũ theo thứ tự thời gian trong từng conversation"""
+    Conversation = apps.get_model("chat", "Conversation")
+    Message = apps.get_model("chat", "Message")
+    ConversationMember = apps.get_model("chat", "ConversationMember")
+    for conversation in Conversation.objects.iterator():
+        messages = list(Message.objects.filter(conversation=conversation).order_by("created_at", "id"))
+        for seq, message in enumerate(messages, start=1):
+            message.seq = seq
+        Message.objects.bulk_update(messages, ["seq"], batch_size=1000)
+        conversation.last_seq = len(messages)
+        conversation.save(update_fields=["last_seq"])
+        # Message cũ coi như đã đọc
+        ConversationMember.objects.filter(conversation=conversation).update(last_read_seq=len(messages))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="last_seq",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="conversationmember",
+            name="last_read_seq",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="seq",
+            field=models.PositiveBigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_seq, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="message",
+            name="message_conv_recent_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="message",
+            constraint=models.UniqueConstraint(fields=("conversation", "seq"), name="message_conv_seq_unique"),
+        ),
+    ]
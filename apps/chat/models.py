@@ -1,3 +1,55 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+User = settings.AUTH_USER_MODEL
+
+class Conversation(models.Model):
+    title = models.CharField(max_length=255, blank=True)
+    is_group = models.BooleanField(default=False)
+    # "low:high" cho chat 1-1, để mỗi cặp user chỉ có 1 conversation
+    direct_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    # seq của message mới nhất, cấp phát tăng dần khi ghi message
+    last_seq = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.title or f"Conversation {self.id}"
+
+
+class ConversationMember(models.Model):
+    conversation = models.ForeignKey(Conversation, related_name='members', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='conversation_memberships', on_delete=models.CASCADE)
+    # Số unread = conversation.last_seq - last_read_seq, không cần COUNT(*)
+    last_read_seq = models.PositiveBigIntegerField(default=0)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='conversation_member_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'conversation'], name='member_user_conv_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.conversation_id}"
+
+
+class Message(models.Model):
+    """
+    Append-only: message chỉ được thêm vào cuối conversation với seq = last_seq + 1.
+    Index (conversation, seq) cho phép đọc N message cuối / scrollback bằng 1 range scan.
+    """
+    conversation = models.ForeignKey(Conversation, related_name='messages', on_delete=models.CASCADE)
+    seq = models.PositiveBigIntegerField()
+    sender = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'seq'], name='message_conv_seq_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender_id}: {self.body[:50]}"
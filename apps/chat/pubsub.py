@@ -0,0 +1,73 @@
+"""
+Pub/sub backend cho chat realtime.
+
+Mỗi kết nối WebSocket subscribe đúng 1 channel "user:<id>" bằng 1 asyncio.Queue,
+nên kết nối idle chỉ tốn 1 queue + 1 coroutine đang chờ, không polling.
+Backend chọn qua settings.CHAT_BROKER; InMemoryBroker dùng cho 1 node và test,
+triển khai nhiều node cần 1 backend chung (vd. redis) cùng interface.
+"""
+import asyncio
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+class BaseBroker(ABC):
+    @abstractmethod
+    async def subscribe(self, channel, queue):
+        """Đưa message của channel vào asyncio.Queue `queue`"""
+
+    @abstractmethod
+    async def unsubscribe(self, channel, queue):
+        """Ngừng đưa message vào queue, gọi khi kết nối đóng"""
+
+    @abstractmethod
+    async def publish(self, channel, message):
+        """Gửi message tới mọi queue đang subscribe channel, không chờ người nhận"""
+
+
+class InMemoryBroker(BaseBroker):
+    """Broker trong process, chỉ dùng từ event loop của ASGI worker"""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+
+    async def subscribe(self, channel, queue):
+        self._subscribers[channel].add(queue)
+
+    async def unsubscribe(self, channel, queue):
+        queues = self._subscribers.get(channel)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[channel]
+
+    async def publish(self, channel, message):
+        for queue in tuple(self._subscribers.get(channel, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Client đọc quá chậm: bỏ message thay vì làm nghẽn người gửi
+                pass
+
+    def subscriber_count(self, channel=None):
+        if channel is not None:
+            return len(self._subscribers.get(channel, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.CHAT_BROKER)()
+    return _broker
@@ -0,0 +1,14 @@
+from .consumers import chat_consumer
+
+WEBSOCKET_ROUTES = {
+    "/ws/chat/": chat_consumer,
+}
+
+
+async def websocket_application(scope, receive, send):
+    consumer = WEBSOCKET_ROUTES.get(scope["path"])
+    if consumer is None:
+        await receive()
+        await send({"type": "websocket.close", "code": 4404})
+        return
+    await consumer(scope, receive, send)
@@ -0,0 +1,163 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Greatest, Least
+
+from apps.core.pagination import paginate
+from .models import Conversation, ConversationMember, Message
+
+User = get_user_model()
+
+MAX_MESSAGE_LENGTH = 4000
+MAX_GROUP_SIZE = 500
+RECENT_MESSAGES = 50
+
+
+def direct_key(user_id, other_id):
+    low, high = sorted((user_id, other_id))
+    return f"{low}:{high}"
+
+
+def get_or_create_direct_conversation(user, other_id):
+    if user.id == other_id:
+        return None, "You cannot message yourself."
+    if not User.objects.filter(id=other_id).exists():
+        return None, "User not found."
+
+    key = direct_key(user.id, other_id)
+    conversation = Conversation.objects.filter(direct_key=key).first()
+    if conversation:
+        return conversation, None
+
+    try:
+        with transaction.atomic():
+            conversation = Conversation.objects.create(direct_key=key)
+            ConversationMember.objects.bulk_create([
+                ConversationMember(conversation=conversation, user_id=user.id),
+                ConversationMember(conversation=conversation, user_id=other_id),
+            ])
+    except IntegrityError:
+        # Người kia vừa tạo cùng lúc
+        conversation = Conversation.objects.get(direct_key=key)
+    return conversation, None
+
+
+def create_group_conversation(owner, title, member_ids):
+    title = (title or "").strip()
+    if not title:
+        return None, "Group title cannot be empty."
+
+    member_ids = set(User.objects.filter(id__in=member_ids).values_list('id', flat=True))
+    member_ids.add(owner.id)
+    if len(member_ids) < 2:
+        return None, "A group needs at least one other member."
+    if len(member_ids) > MAX_GROUP_SIZE:
+        return None, f"A group can have at most {MAX_GROUP_SIZE} members."
+
+    with transaction.atomic():
+        conversation = Conversation.objects.create(title=title, is_group=True)
+        ConversationMember.objects.bulk_create([
+            ConversationMember(conversation=conversation, user_id=uid) for uid in member_ids
+        ])
+    return conversation, None
+
+
+def get_conversation(user, conversation_id):
+    """Conversation nếu user là thành viên, ngược lại None"""
+    return Conversation.objects.filter(id=conversation_id, members__user=user).first()
+
+
+def get_user_conversations(user):
+    """Conversation của user, kèm số message chưa đọc (unread) tính từ seq"""
+    return (
+        Conversation.objects.filter(members__user=user)
+        .annotate(unread=F('last_seq') - F('members__last_read_seq'))
+        .order_by('-created_at', '-id')
+    )
+
+
+def get_message_page(conversation, cursor=None, page_size=RECENT_MESSAGES):
+    """
+    Trang message mới nhất (hoặc cũ hơn cursor) theo seq giảm dần,
+    đọc bằng 1 range scan trên index (conversation, seq).
+    """
+    queryset = Message.objects.filter(conversation=conversation).select_related('sender')
+    return paginate(queryset, cursor, page_size, ordering=('-seq',))
+
+
+def mark_read(user_id, conversation_id, seq=None):
+    """Đánh dấu đã đọc tới seq (mặc định tới message mới nhất); không bao giờ lùi"""
+    last_seq = Subquery(Conversation.objects.filter(id=OuterRef('conversation_id')).values('last_seq')[:1])
+    target = last_seq if seq is None else Least(Value(seq), last_seq)
+    ConversationMember.objects.filter(conversation_id=conversation_id, user_id=user_id).update(
+        last_read_seq=Greatest(F('last_read_seq'), target)
+    )
+
+
+def _clean_body(body):
+    body = (body or "").strip()
+    if not body:
+        return None, "Message cannot be empty."
+    if len(body) > MAX_MESSAGE_LENGTH:
+        return None, f"Message is too long (max {MAX_MESSAGE_LENGTH} characters)."
+    return body, None
+
+
+def append_messages(conversation_id, items):
+    """
+    Ghi 1 loạt message [(sender_id, body), ...] vào cuối conversation.
+
+    Cả loạt chỉ tốn 1 lần cấp phát seq + 1 bulk_create. Trả về (results, member_ids):
+    results[i] là (message, error) tương ứng items[i], member_ids là người nhận.
+    """
+    member_ids = list(
+        ConversationMember.objects.filter(conversation_id=conversation_id).values_list('user_id', flat=True)
+    )
+    members = set(member_ids)
+
+    results = []
+    valid = []
+    for sender_id, body in items:
+        body, error = _clean_body(body)
+        if error is None and sender_id not in members:
+            error = "Conversation not found."
+        if error:
+            results.append((None, error))
+            continue
+        message = Message(conversation_id=conversation_id, sender_id=sender_id, body=body)
+        results.append((message, None))
+        valid.append(message)
+
+    if not valid:
+        return results, member_ids
+
+    with transaction.atomic():
+        # UPDATE giữ lock dòng conversation tới hết transaction: các writer khác
+        # phải chờ, nên dải seq cấp cho loạt này liên tục và không trùng
+        Conversation.objects.filter(id=conversation_id).update(last_seq=F('last_seq') + len(valid))
+        last_seq = Conversation.objects.filter(id=conversation_id).values_list('last_seq', flat=True).get()
+
+        read_upto = {}
+        for seq, message in enumerate(valid, start=last_seq - len(valid) + 1):
+            message.seq = seq
+            read_upto[message.sender_id] = seq
+        Message.objects.bulk_create(valid)
+
+        # Message của chính mình coi như đã đọc
+        for sender_id, seq in read_upto.items():
+            ConversationMember.objects.filter(conversation_id=conversation_id, user_id=sender_id).update(
+                last_read_seq=Greatest(F('last_read_seq'), Value(seq))
+            )
+
+    return results, member_ids
+
+
+def serialize_message(message):
+    return {
+        "type": "message",
+        "conversation": message.conversation_id,
+        "seq": message.seq,
+        "sender": message.sender_id,
+        "body": message.body,
+        "created_at": message.created_at.isoformat(),
+    }
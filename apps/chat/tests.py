@@ -1,3 +1,121 @@
-from django.test import TestCase
+import asyncio
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from apps.accounts.models import User
+from .consumers import MessageBatcher
+from .models import ConversationMember, Message
+from .pubsub import BaseBroker, InMemoryBroker
+from .services import (
+    append_messages,
+    create_group_conversation,
+    get_message_page,
+    get_user_conversations,
+    mark_read,
+)
+
+
+class BrokerTests(SimpleTestCase):
+    def test_base_broker_is_abstract(self):
+        class PublishOnly(BaseBroker):
+            async def publish(self, channel, message):
+                pass
+
+        with self.assertRaises(TypeError):
+            BaseBroker()
+        with self.assertRaises(TypeError):
+            PublishOnly()
+
+    def test_in_memory_publish(self):
+        async def run():
+            broker = InMemoryBroker()
+            queue, full = asyncio.Queue(), asyncio.Queue(maxsize=1)
+            await broker.subscribe("user:1", queue)
+            await broker.subscribe("user:1", full)
+            await broker.publish("user:1", "a")
+            await broker.publish("user:1", "b")  # queue `full` đầy: bỏ qua, không chặn
+            await broker.publish("user:2", "c")
+            await broker.unsubscribe("user:1", queue)
+            await broker.unsubscribe("user:1", full)
+            return [queue.get_nowait(), queue.get_nowait()], full.qsize(), broker.subscriber_count()
+
+        self.assertEqual(async_to_sync(run)(), (["a", "b"], 1, 0))
+
+
+# Message được ghi qua sync_to_async + close_old_connections: không chạy được
+# trong transaction của TestCase
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class MessageBatcherTests(TransactionTestCase):
+    def test_batches_and_releases_tasks(self):
+        owner, other = [
+            User.objects.create_user(email=f"{name}@example.com", username=name, password="x")
+            for name in ("owner", "other")
+        ]
+        conversation, _ = create_group_conversation(owner, "team", [other.id])
+        batcher = MessageBatcher(window=0.05, max_batch=2)
+
+        async def run():
+            results = await asyncio.gather(*[
+                batcher.submit(owner.id, conversation.id, f"m{i}") for i in range(3)
+            ] + [batcher.submit(owner.id, conversation.id, " ")])
+            # Task còn lại (vd. _flush_later của batch đã flush sớm) chạy xong thì được bỏ khỏi set
+            await asyncio.sleep(0.1)
+            return results, len(batcher._tasks)
+
+        results, pending_tasks = async_to_sync(run)()
+        self.assertEqual(pending_tasks, 0)
+        self.assertEqual(sorted(message.seq for message, error in results if message), [1, 2, 3])
+        self.assertEqual(results[-1], (None, "Message cannot be empty."))
+        self.assertEqual(list(Message.objects.order_by("seq").values_list("body", flat=True)), ["m0", "m1", "m2"])
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class SeqUnreadTests(TestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(email=f"{name}@example.com", username=name, password="x")
+            for name in ("alice", "bob", "carol")
+        ]
+        self.conversation, _ = create_group_conversation(self.alice, "team", [self.bob.id])
+
+    def unread(self, user):
+        return {c.id: c.unread for c in get_user_conversations(user)}[self.conversation.id]
+
+    def test_batch_gets_contiguous_seq(self):
+        results, member_ids = append_messages(self.conversation.id, [
+            (self.alice.id, "one"), (self.carol.id, "not a member"), (self.bob.id, ""), (self.bob.id, "two"),
+        ])
+        self.assertEqual(sorted(member_ids), sorted([self.alice.id, self.bob.id]))
+        self.assertEqual([message.seq if message else error for message, error in results], [
+            1, "Conversation not found.", "Message cannot be empty.", 2,
+        ])
+        [(message, _)], _ = append_messages(self.conversation.id, [(self.alice.id, "three")])
+        self.assertEqual(message.seq, 3)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_seq, 3)
+
+    def test_unread_counts_and_mark_read(self):
+        append_messages(self.conversation.id, [(self.alice.id, f"m{i}") for i in range(5)])
+        # Message của chính mình coi như đã đọc
+        self.assertEqual(self.unread(self.alice), 0)
+        self.assertEqual(self.unread(self.bob), 5)
+
+        mark_read(self.bob.id, self.conversation.id, 3)
+        self.assertEqual(self.unread(self.bob), 2)
+        # Không lùi, không vượt quá message mới nhất
+        mark_read(self.bob.id, self.conversation.id, 1)
+        self.assertEqual(self.unread(self.bob), 2)
+        mark_read(self.bob.id, self.conversation.id, 99)
+        member = ConversationMember.objects.get(conversation=self.conversation, user=self.bob)
+        self.assertEqual(member.last_read_seq, 5)
+
+        append_messages(self.conversation.id, [(self.bob.id, "reply")])
+        self.assertEqual((self.unread(self.alice), self.unread(self.bob)), (1, 0))
+
+    def test_message_pages_by_seq(self):
+        append_messages(self.conversation.id, [(self.alice.id, f"m{i}") for i in range(5)])
+        first = get_message_page(self.conversation, page_size=2)
+        self.assertEqual([m.seq for m in first.items], [5, 4])
+        second = get_message_page(self.conversation, first.next_cursor, page_size=2)
+        self.assertEqual([m.seq for m in second.items], [3, 2])
@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import *
+
+app_name = "chat"
+
+urlpatterns = [
+    path("", conversation_list_view, name="list"),
+    path("direct/<int:user_id>/", start_direct_view, name="direct"),
+    path("<int:conversation_id>/", conversation_view, name="conversation"),
+]
@@ -1,3 +1,57 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import csrf_exempt
+from django.contrib import messages
+from django.http import Http404
+from .services import (
+    create_group_conversation,
+    get_conversation,
+    get_or_create_direct_conversation,
+    get_message_page,
+    get_user_conversations,
+    mark_read,
+)
 
-# Create your views here.
+@login_required
+@csrf_exempt
+def conversation_list_view(request):
+    if request.method == "POST":
+        member_ids = [int(v) for v in request.POST.get("members", "").split(",") if v.strip().isdigit()]
+        conversation, error = create_group_conversation(request.user, request.POST.get("title"), member_ids)
+        if error:
+            messages.error(request, error)
+            return redirect("chat:list")
+        return redirect("chat:conversation", conversation_id=conversation.id)
+
+    return render(request, "chat/conversation_list.html", {
+        "conversations": get_user_conversations(request.user),
+    })
+
+@login_required
+@csrf_exempt
+def start_direct_view(request, user_id):
+    if request.method == "POST":
+        conversation, error = get_or_create_direct_conversation(request.user, user_id)
+        if error:
+            messages.error(request, error)
+            return redirect("chat:list")
+        return redirect("chat:conversation", conversation_id=conversation.id)
+    return redirect("chat:list")
+
+@login_required
+def conversation_view(request, conversation_id):
+    conversation = get_conversation(request.user, conversation_id)
+    if conversation is None:
+        raise Http404
+
+    cursor = request.GET.get("cursor")
+    page = get_message_page(conversation, cursor)
+    if not cursor:
+        mark_read(request.user.id, conversation.id)
+
+    return render(request, "chat/conversation.html", {
+        "conversation": conversation,
+        # Trang lấy theo seq giảm dần, hiển thị cũ -> mới
+        "chat_messages": page.items[::-1],
+        "next_cursor": page.next_cursor,
+    })
@@ -0,0 +1,174 @@
+"""
+Tiện ích dùng chung cho các lệnh benchmark (loadtest, bench_feed...).
+
+Benchmark chạy trên test database riêng (SQLite hoặc MySQL theo DATABASES),
+seed graph tổng hợp bằng bulk_create rồi đo latency + số query cho từng request.
+"""
+import json
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.accounts.models import User
+from apps.friends.models import Friendship, FriendEdge
+
+BENCH_PASSWORD = "bench-password"
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """Tạo test database riêng cho benchmark, xoá khi xong"""
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def seed_users(count, prefix="bench", batch_size=1000):
+    """Tạo `count` user active dùng chung 1 password hash, trả về list id"""
+    password = make_password(BENCH_PASSWORD)
+    User.objects.bulk_create(
+        [
+            User(
+                email=f"{prefix}{i}@bench.local",
+                username=f"{prefix}{i}",
+                password=password,
+                is_active=True,
+            )
+            for i in range(count)
+        ],
+        batch_size=batch_size,
+    )
+    return list(User.objects.filter(username__startswith=prefix).order_by("id").values_list("id", flat=True))
+
+
+def random_pairs(user_ids, avg_degree, rng):
+    """Cặp (low, high) ngẫu nhiên, không trùng, trung bình avg_degree bạn/user"""
+    target = len(user_ids) * avg_degree // 2
+    pairs = set()
+    attempts = 0
+    while len(pairs) < target and attempts < target * 10:
+        a, b = rng.sample(user_ids, 2)
+        pairs.add((a, b) if a < b else (b, a))
+        attempts += 1
+    return pairs
+
+
+def seed_friendships(pairs, status="accepted", batch_size=1000):
+    """bulk_create Friendship (+ FriendEdge 2 chiều nếu accepted) cho các cặp cho trước"""
+    pairs = list(pairs)
+    Friendship.objects.bulk_create(
+        [
+            Friendship(from_user_id=a, to_user_id=b, user_low_id=min(a, b), user_high_id=max(a, b), status=status)
+            for a, b in pairs
+        ],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    if status == "accepted":
+        edges = []
+        for a, b in pairs:
+            edges.append(FriendEdge(user_id=a, friend_id=b))
+            edges.append(FriendEdge(user_id=b, friend_id=a))
+        FriendEdge.objects.bulk_create(edges, batch_size=batch_size, ignore_conflicts=True)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def measure(fn, iterations, expected_status=None):
+    """
+    Chạy fn(i) `iterations` lần, trả về dict p50/p99/avg (ms), throughput (req/s)
+    và số query trung bình mỗi lần.
+
+    Với expected_status, fn(i) trả về response: lần nào có status_code khác được
+    đếm vào "failures" (vd. 429 / 503 / redirect về login nhanh hơn request thật,
+    không được lẫn vào latency mà không ai biết).
+    """
+    latencies = []
+    queries = 0
+    failures = 0
+
+    # Không dùng CaptureQueriesContext: queries_log giới hạn 9000 dòng,
+    # chạy lâu sẽ đếm sai về 0
+    def count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    with connection.execute_wrapper(count_query):
+        for i in range(iterations):
+            t0 = time.perf_counter()
+            result = fn(i)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if expected_status is not None and getattr(result, "status_code", None) != expected_status:
+                failures += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 0.5), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "avg_ms": round(sum(latencies) / max(iterations, 1), 3),
+        "throughput_rps": round(iterations / elapsed, 1) if elapsed else 0.0,
+        "avg_queries": round(queries / max(iterations, 1), 2),
+        "failures": failures,
+    }
+
+
+def format_results(results):
+    lines = [f"{'scenario':<18}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>10}{'failed':>8}"]
+    for name, row in results.items():
+        lines.append(
+            f"{name:<18}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+            f"{row['throughput_rps']:>10.1f}{row['avg_queries']:>10.2f}{row.get('failures', 0):>8}"
+        )
+    return "\n".join(lines)
+
+
+def find_failures(results):
+    """Mô tả các kịch bản có request trả về status không mong đợi"""
+    return [
+        f"{name}: {row['failures']}/{row['iterations']} requests got an unexpected status"
+        for name, row in results.items()
+        if row.get("failures")
+    ]
+
+
+def find_regressions(results, baseline, tolerance):
+    """
+    So với baseline: p99 chậm hơn quá `tolerance` (tỉ lệ) hoặc số query tăng
+    đều bị coi là regression. Trả về list mô tả.
+    """
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if row["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {row['p99_ms']}ms > baseline {base['p99_ms']}ms")
+        if row["avg_queries"] > base["avg_queries"]:
+            regressions.append(f"{name}: queries {row['avg_queries']} > baseline {base['avg_queries']}")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
@@ -0,0 +1,128 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from apps.core.bench import (
+    BENCH_PASSWORD,
+    benchmark_database,
+    find_failures,
+    find_regressions,
+    format_results,
+    load_baseline,
+    measure,
+    random_pairs,
+    save_baseline,
+    seed_friendships,
+    seed_users,
+)
+from apps.accounts.models import User
+from apps.friends.models import Friendship, FriendEdge
+from apps.notifications import pipeline
+
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+# Mọi bench client đều login từ 127.0.0.1: tắt throttle login để không bị 429
+# sau LOGIN_THROTTLE_IP lần, và để kịch bản "login" đo chi phí login thật
+NO_LOGIN_THROTTLE = {"LOGIN_THROTTLE_IP": (10**9, 1), "LOGIN_THROTTLE_ACCOUNT": (10**9, 1)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark login, JWT middleware, friend list và accept/reject friend request "
+        "trên graph tổng hợp, so sánh với baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--friends", type=int, default=20, help="Số bạn trung bình mỗi user")
+        parser.add_argument("--pending", type=int, default=200, help="Số lời mời chờ duyệt để accept/reject")
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--fast-hasher", action="store_true", help="Dùng MD5 hasher để bỏ qua chi phí PBKDF2")
+        parser.add_argument("--keepdb", action="store_true", help="Giữ lại test database sau khi chạy")
+        parser.add_argument("--baseline", help="File JSON baseline để so sánh")
+        parser.add_argument("--save-baseline", help="Ghi kết quả ra file JSON làm baseline mới")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Mức chậm hơn cho phép so với baseline (0.2 = 20%%)")
+
+    def handle(self, *args, **options):
+        hashers = {"PASSWORD_HASHERS": FAST_HASHERS} if options["fast_hasher"] else {}
+        with override_settings(**hashers), benchmark_database(keepdb=options["keepdb"]):
+            results = self.run_scenarios(options)
+
+        self.stdout.write(format_results(results))
+
+        # Latency của request lỗi (429, redirect về login...) không phản ánh gì:
+        # không so / ghi baseline từ kết quả này
+        failures = find_failures(results)
+        if failures:
+            raise CommandError("Unexpected responses:\n" + "\n".join(failures))
+
+        if options["save_baseline"]:
+            save_baseline(options["save_baseline"], results)
+            self.stdout.write(f"baseline saved to {options['save_baseline']}")
+
+        if options["baseline"]:
+            regressions = find_regressions(results, load_baseline(options["baseline"]), options["tolerance"])
+            if regressions:
+                raise CommandError("Performance regression:\n" + "\n".join(regressions))
+            self.stdout.write("no regression against baseline")
+
+    @override_settings(**NO_LOGIN_THROTTLE)
+    def run_scenarios(self, options):
+        rng = random.Random(options["seed"])
+        iterations = options["iterations"]
+
+        user_ids = seed_users(options["users"])
+        seed_friendships(random_pairs(user_ids, options["friends"], rng))
+
+        # Lời mời kết bạn gửi tới 1 user "inbox" từ những người chưa là bạn
+        inbox_id = user_ids[0]
+        inbox_friends = set(FriendEdge.objects.filter(user_id=inbox_id).values_list("friend_id", flat=True))
+        senders = [uid for uid in user_ids[1:] if uid not in inbox_friends][: options["pending"]]
+        seed_friendships([(sender, inbox_id) for sender in senders], status="pending")
+        pending_ids = list(
+            Friendship.objects.filter(to_user_id=inbox_id, status="pending").values_list("id", flat=True)
+        )
+        self.stdout.write(f"seeded users={len(user_ids)} pending={len(pending_ids)}")
+
+        sample = rng.sample(user_ids, min(len(user_ids), 50))
+        emails = dict(User.objects.filter(id__in=sample + [inbox_id]).values_list("id", "email"))
+        clients = {uid: self.logged_in_client(emails[uid]) for uid in sample}
+        inbox = self.logged_in_client(emails[inbox_id])
+
+        results = {}
+        results["login"] = measure(
+            lambda i: Client().post("/accounts/login/", {
+                "email": emails[sample[i % len(sample)]],
+                "password": BENCH_PASSWORD,
+            }),
+            iterations,
+            expected_status=302,
+        )
+        results["jwt_middleware"] = measure(
+            lambda i: clients[sample[i % len(sample)]].get("/"), iterations, expected_status=200
+        )
+        results["friend_list"] = measure(
+            lambda i: clients[sample[i % len(sample)]].get("/friends/"), iterations, expected_status=200
+        )
+
+        half = len(pending_ids) // 2
+        accept_ids, reject_ids = pending_ids[:half], pending_ids[half:]
+        if accept_ids:
+            results["friend_accept"] = measure(
+                lambda i: inbox.post(f"/friends/accept/{accept_ids[i]}/"), len(accept_ids), expected_status=302
+            )
+        if reject_ids:
+            results["friend_reject"] = measure(
+                lambda i: inbox.post(f"/friends/reject/{reject_ids[i]}/"), len(reject_ids), expected_status=302
+            )
+        # Ghi notification còn trong buffer trước khi test database bị xoá
+        pipeline.flush()
+        return results
+
+    def logged_in_client(self, email):
+        client = Client()
+        response = client.post("/accounts/login/", {"email": email, "password": BENCH_PASSWORD})
+        if response.status_code != 302:
+            raise CommandError(f"Không đăng nhập được {email}")
+        return client
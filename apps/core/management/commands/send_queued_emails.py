@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.services import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = "Gửi email trong outbox theo batch qua 1 kết nối SMTP, có retry"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument("--loop", action="store_true", help="Chạy liên tục như 1 worker thay vì gửi hết rồi thoát")
+        parser.add_argument("--interval", type=float, default=2.0, help="Số giây nghỉ khi outbox rỗng")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_emails(options["batch_size"], options["max_attempts"])
+            if sent or failed:
+                self.stdout.write(f"sent={sent} failed={failed}")
+
+            # Batch đầy nghĩa là còn email đến hạn: gửi tiếp ngay
+            if sent + failed < options["batch_size"]:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
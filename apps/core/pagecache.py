@@ -0,0 +1,68 @@
+"""
+Cache cho trang chủ (URL được gọi nhiều nhất).
+
+- Khách: cả trang được render 1 lần và giữ trong cache cùng ETag (hash nội dung)
+  và Last-Modified, request có If-None-Match / If-Modified-Since khớp nhận 304.
+- Đã đăng nhập: ETag ghép từ user_id, version của user, số thông báo chưa đọc và
+  fingerprint của template, đều đọc từ cache nên 304 không cần render hay query.
+  Phần phụ thuộc user trong template là fragment {% cache %} theo cùng version.
+
+Version của user là timestamp (µs) lúc bump: đổi username... làm version tăng nên
+fragment và ETag cũ tự hết hiệu lực, không cần xoá key.
+"""
+import hashlib
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+
+HOME_TEMPLATE = "home.html"
+ANON_PAGE_KEY = "home:anon:{}"
+USER_VERSION_KEY = "home:version:{}"
+
+
+@lru_cache(maxsize=None)
+def template_fingerprint(name):
+    """Hash nội dung file template: deploy template mới thì ETag cũ không còn khớp"""
+    origin = get_template(name).origin
+    with open(origin.name, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()[:12]
+
+
+def get_user_version(user_id):
+    key = USER_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns() // 1000
+        if not cache.add(key, version, None):
+            version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    key = USER_VERSION_KEY.format(user_id)
+    version = max(time.time_ns() // 1000, (cache.get(key) or 0) + 1)
+    cache.set(key, version, None)
+
+
+def user_etag(user_id, version, unread):
+    raw = f"{user_id}:{version}:{unread}:{template_fingerprint(HOME_TEMPLATE)}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_anon_page():
+    """{"content", "etag", "modified"} của trang cho khách, None nếu chưa có trong cache"""
+    return cache.get(ANON_PAGE_KEY.format(template_fingerprint(HOME_TEMPLATE)))
+
+
+def store_anon_page(content):
+    page = {
+        "content": content,
+        "etag": hashlib.md5(content.encode()).hexdigest(),
+        # Last-Modified chỉ có độ chính xác tới giây
+        "modified": int(time.time()),
+    }
+    cache.set(ANON_PAGE_KEY.format(template_fingerprint(HOME_TEMPLATE)), page, settings.HOME_ANON_CACHE_TTL)
+    return page
@@ -0,0 +1,94 @@
+"""
+Keyset (cursor) pagination.
+
+Thay vì OFFSET, mỗi trang lọc theo giá trị (created_at, id) của dòng cuối trang
+trước: WHERE (created_at, id) < (c, i) ORDER BY created_at DESC, id DESC LIMIT n.
+Với index composite tương ứng, trang N tốn như trang 1. Cursor là chuỗi
+base64 mờ, client chỉ việc gửi lại.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import NamedTuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_ORDERING = ("-created_at", "-id")
+DEFAULT_PAGE_SIZE = 20
+
+
+class Page(NamedTuple):
+    items: list
+    next_cursor: str | None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def _split(ordering):
+    return [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+
+def encode_cursor(values):
+    # isoformat() đầy đủ microsecond, so sánh keyset không được làm tròn
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, model, ordering=DEFAULT_ORDERING):
+    """Giá trị Python của cursor theo field của model, None nếu cursor rỗng / hỏng"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        fields = _split(ordering)
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        return [
+            model._meta.get_field(name).to_python(value)
+            for (name, _), value in zip(fields, values)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def cursor_for(obj, ordering=DEFAULT_ORDERING):
+    return encode_cursor(getattr(obj, name) for name, _ in _split(ordering))
+
+
+def apply_cursor(queryset, values, ordering=DEFAULT_ORDERING):
+    """Sắp xếp theo ordering và chỉ giữ các dòng đứng sau `values`"""
+    queryset = queryset.order_by(*ordering)
+    if values is None:
+        return queryset
+
+    fields = _split(ordering)
+    condition = Q()
+    for i, (name, desc) in enumerate(fields):
+        lookup = {prev: value for (prev, _), value in zip(fields[:i], values)}
+        lookup[f"{name}__{'lt' if desc else 'gt'}"] = values[i]
+        condition |= Q(**lookup)
+    return queryset.filter(condition)
+
+
+def paginate(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, ordering=DEFAULT_ORDERING):
+    values = decode_cursor(cursor, queryset.model, ordering)
+    rows = list(apply_cursor(queryset, values, ordering)[: page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return Page(rows, cursor_for(rows[-1], ordering))
+    return Page(rows, None)
+
+
+async def apaginate(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, ordering=DEFAULT_ORDERING):
+    """Bản async của paginate() cho view async (async ORM, không giữ thread)"""
+    values = decode_cursor(cursor, queryset.model, ordering)
+    rows = [row async for row in apply_cursor(queryset, values, ordering)[: page_size + 1]]
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return Page(rows, cursor_for(rows[-1], ordering))
+    return Page(rows, None)
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+# Thời gian 1 worker "giữ" email trước khi worker khác được phép gửi lại
+SEND_LEASE = timedelta(minutes=5)
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    """Đưa email vào outbox, không mở kết nối SMTP trong request"""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        recipients=list(recipients),
+    )
+
+
+def _claim_batch(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for email in batch:
+            email.attempts += 1
+            email.next_attempt_at = now + SEND_LEASE
+        OutboundEmail.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+
+def _mark_failure(email, error, max_attempts):
+    email.last_error = str(error)
+    if email.attempts >= max_attempts:
+        email.status = 'failed'
+    else:
+        # Backoff lũy thừa: 1, 2, 4, 8... phút
+        email.next_attempt_at = timezone.now() + timedelta(minutes=2 ** (email.attempts - 1))
+
+
+def send_queued_emails(batch_size=50, max_attempts=5):
+    """
+    Gửi 1 batch email đến hạn qua 1 kết nối SMTP dùng chung.
+    Trả về (sent, failed) của batch.
+    """
+    batch = _claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        print(f"[ERROR] Không mở được kết nối email: {e}")
+        for email in batch:
+            _mark_failure(email, e, max_attempts)
+        failed = len(batch)
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email, email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+                except Exception as e:
+                    _mark_failure(email, e, max_attempts)
+                    failed += 1
+        finally:
+            connection.close()
+
+    OutboundEmail.objects.bulk_update(
+        batch, ['status', 'sent_at', 'last_error', 'next_attempt_at']
+    )
+    return sent, failed
@@ -1,3 +1,260 @@
-from django.test import TestCase
+import re
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.core.management.commands.loadtest import FAST_HASHERS, Command as LoadtestCommand
+from apps.friends.models import Friendship, FriendEdge
+from apps.friends.services import accept_friend_request, send_friend_request
+from apps.posts.models import Post, TimelineEntry
+from apps.posts.services import create_post
+from .bench import find_failures, format_results, measure
+from .models import OutboundEmail
+from .pagination import cursor_for, decode_cursor, encode_cursor, paginate
+from .services import SEND_LEASE, _claim_batch, enqueue_email, send_queued_emails
+
+
+class FailingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("smtp down")
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class OutboxTests(TestCase):
+    def _make_due(self):
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    def test_enqueue_does_not_send(self):
+        email = enqueue_email("Hi", "Body", ["a@example.com"], from_email="noreply@example.com")
+        self.assertEqual(email.status, "pending")
+        self.assertEqual(email.recipients, ["a@example.com"])
+        self.assertEqual(mail.outbox, [])
+
+    def test_send_batch(self):
+        for i in range(3):
+            enqueue_email(f"Hi {i}", "Body", [f"u{i}@example.com"], from_email="noreply@example.com")
+
+        self.assertEqual(send_queued_emails(batch_size=2), (2, 0))
+        self.assertEqual(send_queued_emails(batch_size=2), (1, 0))
+        self.assertEqual(send_queued_emails(batch_size=2), (0, 0))
+
+        self.assertEqual(sorted(m.subject for m in mail.outbox), ["Hi 0", "Hi 1", "Hi 2"])
+        self.assertEqual(OutboundEmail.objects.filter(status="sent", attempts=1).count(), 3)
+
+    def test_retry_with_backoff_then_failed(self):
+        email = enqueue_email("Hi", "Body", ["a@example.com"], from_email="noreply@example.com")
+
+        with override_settings(EMAIL_BACKEND="apps.core.tests.FailingEmailBackend"):
+            before = timezone.now()
+            self.assertEqual(send_queued_emails(max_attempts=3), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ("pending", 1))
+            self.assertIn("smtp down", email.last_error)
+            self.assertGreaterEqual(email.next_attempt_at, before + timedelta(minutes=1))
+            # Chưa tới hạn retry
+            self.assertEqual(send_queued_emails(max_attempts=3), (0, 0))
+
+            self._make_due()
+            before = timezone.now()
+            send_queued_emails(max_attempts=3)
+            email.refresh_from_db()
+            self.assertGreaterEqual(email.next_attempt_at, before + timedelta(minutes=2))
+
+            self._make_due()
+            send_queued_emails(max_attempts=3)
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ("failed", 3))
+
+        self._make_due()
+        self.assertEqual(send_queued_emails(max_attempts=3), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_claim_leases_batch(self):
+        email = enqueue_email("Hi", "Body", ["a@example.com"], from_email="noreply@example.com")
+        before = timezone.now()
+        self.assertEqual([e.id for e in _claim_batch(10)], [email.id])
+        email.refresh_from_db()
+        self.assertEqual(email.attempts, 1)
+        self.assertGreaterEqual(email.next_attempt_at, before + SEND_LEASE)
+
+        # Email đang bị worker khác giữ: không được nhận / gửi lại
+        self.assertEqual(_claim_batch(10), [])
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+        # Worker giữ lease chết: hết lease thì email được gửi
+        self._make_due()
+        self.assertEqual(send_queued_emails(), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("sent", 2))
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class LoadtestTests(TestCase):
+    def test_logs_in_more_bench_users_than_ip_throttle(self):
+        options = {"users": 40, "friends": 2, "pending": 4, "iterations": 30, "seed": 1}
+        command = LoadtestCommand(stdout=StringIO())
+        # 40 client + inbox đều login từ 127.0.0.1, vượt LOGIN_THROTTLE_IP (20 / 60s)
+        results = command.run_scenarios(options)
+        self.assertEqual(set(results), {"login", "jwt_middleware", "friend_list", "friend_accept", "friend_reject"})
+        self.assertEqual(find_failures(results), [])
+
+
+class MeasureTests(TestCase):
+    def test_counts_unexpected_status(self):
+        statuses = [200, 429, 200, 503]
+        row = measure(lambda i: HttpResponse(status=statuses[i]), len(statuses), expected_status=200)
+        self.assertEqual((row["iterations"], row["failures"]), (4, 2))
+        self.assertEqual(find_failures({"login": row}), ["login: 2/4 requests got an unexpected status"])
+        self.assertIn("failed", format_results({"login": row}))
+
+        # Không có expected_status (đo service trực tiếp): không kiểm tra
+        self.assertEqual(measure(lambda i: None, 3)["failures"], 0)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(email="page@example.com", username="page", password="x")
+        self.posts = [Post.objects.create(author=self.author, content=f"p{i}") for i in range(7)]
+
+    def walk(self, page_size):
+        pages, cursor = [], None
+        while True:
+            page = paginate(Post.objects.all(), cursor, page_size)
+            pages.append([post.id for post in page.items])
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_cursor_round_trip(self):
+        post = self.posts[3]
+        post.created_at = post.created_at.replace(microsecond=123456)
+        values = decode_cursor(cursor_for(post), Post)
+        self.assertEqual(values, [post.created_at, post.id])
+        self.assertEqual(decode_cursor(encode_cursor(values), Post), values)
+
+    def test_ties_on_created_at(self):
+        Post.objects.update(created_at=timezone.now())
+        pages = self.walk(page_size=3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), sorted((post.id for post in self.posts), reverse=True))
+
+    def test_invalid_cursor_gives_first_page(self):
+        first = paginate(Post.objects.all(), None, 3)
+        for cursor in ("%%%", "bm90IGpzb24", encode_cursor([1]), encode_cursor(["not a date", 1]), encode_cursor({})):
+            self.assertIsNone(decode_cursor(cursor, Post))
+            self.assertEqual(paginate(Post.objects.all(), cursor, 3).items, first.items)
+
+
+# Notification được ghi ngay trong request thay vì thread của buffer
+@override_settings(NOTIFICATION_FLUSH_INTERVAL=0, PASSWORD_HASHERS=FAST_HASHERS)
+class CursorViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.me = User.objects.create_user(email="me@example.com", username="me", password="pw", is_active=True)
+        self.client.post("/accounts/login/", {"email": "me@example.com", "password": "pw"})
+
+    def make_users(self, prefix, count):
+        return [
+            User.objects.create_user(email=f"{prefix}{i}@example.com", username=f"{prefix}{i}", password="x")
+            for i in range(count)
+        ]
+
+    def walk(self, url, param, pattern):
+        """Đi theo link "more" của view, trả về nội dung khớp `pattern` của từng trang"""
+        pages, query = [], ""
+        while True:
+            html = self.client.get(url + query).content.decode()
+            pages.append(re.findall(pattern, html))
+            match = re.search(rf'href="\?{param}=([\w-]+)"', html)
+            if match is None:
+                return pages
+            query = f"?{param}={match.group(1)}"
+
+    def test_friend_and_request_pages(self):
+        for friend in self.make_users("f", 5):
+            friendship, _ = send_friend_request(friend, self.me.id)
+            with self.captureOnCommitCallbacks(execute=True):
+                accept_friend_request(self.me, friendship.id)
+        for sender in self.make_users("r", 5):
+            send_friend_request(sender, self.me.id)
+        now = timezone.now()
+        FriendEdge.objects.update(created_at=now)
+        Friendship.objects.update(created_at=now)
+
+        with mock.patch("apps.friends.views.PAGE_SIZE", 2):
+            friends = self.walk("/friends/", "friends_cursor", r"<strong>(f\d)</strong>")
+            requests = self.walk("/friends/", "pending_cursor", r"<strong>(r\d)</strong>")
+        self.assertEqual([len(page) for page in friends], [2, 2, 1])
+        self.assertEqual(sorted(sum(friends, [])), [f"f{i}" for i in range(5)])
+        self.assertEqual([len(page) for page in requests], [2, 2, 1])
+        self.assertEqual(sum(requests, []), [f"r{i}" for i in reversed(range(5))])
+
+    def test_feed_pages(self):
+        for i in range(5):
+            create_post(self.me, f"post {i}")
+        now = timezone.now()
+        Post.objects.update(created_at=now)
+        TimelineEntry.objects.update(created_at=now)
+
+        with mock.patch("apps.posts.views.PAGE_SIZE", 2):
+            pages = self.walk("/posts/", "cursor", r'<p class="post-content">([^<]+)</p>')
+        self.assertEqual(pages, [["post 4", "post 3"], ["post 2", "post 1"], ["post 0"]])
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class HomePageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def login(self):
+        self.user = User.objects.create_user(email="home@example.com", username="home", password="pw", is_active=True)
+        self.client.post("/accounts/login/", {"email": "home@example.com", "password": "pw"})
+
+    def test_anonymous_page_gets_304(self):
+        first = self.client.get("/")
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first["ETag"])
+        self.assertTrue(first["Last-Modified"])
+
+        cached = self.client.get("/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+        cached = self.client.get("/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_user_page_gets_304_without_render(self):
+        self.login()
+        first = self.client.get("/")
+        self.assertContains(first, "home")
+        self.assertTrue(first["ETag"])
+        self.assertIn("private", first["Cache-Control"])
+
+        with self.assertTemplateNotUsed("home.html"):
+            cached = self.client.get("/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+
+    def test_username_change_invalidates_page(self):
+        self.login()
+        etag = self.client.get("/")["ETag"]
+
+        # Save không đổi username (vd. last_login lúc đăng nhập): ETag giữ nguyên
+        self.user.save(update_fields=["last_login"])
+        self.assertEqual(self.client.get("/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.user.username = "renamed"
+        self.user.save()
+        response = self.client.get("/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertContains(response, "renamed")
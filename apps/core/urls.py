@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('internal/stats/', views.perf_stats, name='perf_stats'),
 ]
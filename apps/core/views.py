@@ -1,31 +1,85 @@
-import jwt
+from datetime import datetime, timezone
+
 from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
-from apps.accounts.models import User
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+from apps.middleware.auth_context import get_access_payload, get_request_user
+from apps.accounts import hashing, throttle
+from apps.middleware.perf import get_stats
+from apps.notifications.services import get_unread_count
+from .pagecache import (
+    HOME_TEMPLATE, get_anon_page, get_user_version, store_anon_page, user_etag,
+)
+
+def _home_user_id(request):
+    # Payload đã được middleware decode, không query DB
+    payload = get_access_payload(request)
+    return payload.get("user_id") if payload else None
+
+def _home_anon_page(request):
+    if not hasattr(request, "_home_anon_page"):
+        request._home_anon_page = get_anon_page()
+    return request._home_anon_page
+
+def _home_etag(request):
+    user_id = _home_user_id(request)
+    if user_id is None:
+        page = _home_anon_page(request)
+        return page["etag"] if page else None
+    return user_etag(user_id, get_user_version(user_id), get_unread_count(user_id))
+
+def _home_last_modified(request):
+    # Chỉ trang khách có Last-Modified: trang của user đổi theo badge thông báo,
+    # không có mốc thời gian tin cậy nên chỉ dựa vào ETag
+    if _home_user_id(request) is not None:
+        return None
+    page = _home_anon_page(request)
+    return datetime.fromtimestamp(page["modified"], tz=timezone.utc) if page else None
+
+@condition(etag_func=_home_etag, last_modified_func=_home_last_modified)
+def _home_page(request):
+    # Chỉ chạy khi ETag / Last-Modified của client không còn khớp
+    user_id = _home_user_id(request)
+    if user_id is None:
+        page = _home_anon_page(request)
+        if page is None:
+            page = store_anon_page(render_to_string(HOME_TEMPLATE, {"is_authenticated": False}))
+        response = HttpResponse(page["content"])
+        response["ETag"] = quote_etag(page["etag"])
+        response["Last-Modified"] = http_date(page["modified"])
+        return response
+
+    return render(request, HOME_TEMPLATE, {
+        # Snapshot chỉ được load khi fragment của user chưa có trong cache
+        "user": SimpleLazyObject(lambda: get_request_user(request)),
+        "is_authenticated": True,
+        "user_id": user_id,
+        "home_version": get_user_version(user_id),
+        "unread_notifications": get_unread_count(user_id),
+        "fragment_ttl": settings.HOME_FRAGMENT_TTL,
+    })
 
 def home(request):
-    access_token = request.COOKIES.get("access")
-
-    user = None
-    is_authenticated = False
-
-    if access_token:
-        try:
-            payload = jwt.decode(
-                access_token,
-                settings.SECRET_KEY,
-                algorithms=["HS256"]
-            )
-            user_id = payload.get("user_id")
-            user = User.objects.get(id=user_id)
-            is_authenticated = True
-
-        except jwt.ExpiredSignatureError:
-            pass  # access token hết hạn
-        except (jwt.InvalidTokenError, User.DoesNotExist):
-            pass
-
-    return render(request, "home.html", {
-        "user": user,
-        "is_authenticated": is_authenticated
+    response = _home_page(request)
+    # Cùng URL cho khách và user: cache trung gian phải tách theo cookie,
+    # trình duyệt luôn hỏi lại server (thường nhận 304)
+    patch_vary_headers(response, ("Cookie",))
+    if _home_user_id(request) is None:
+        patch_cache_control(response, public=True, no_cache=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def perf_stats(request):
+    """Histogram hiệu năng theo view + số liệu login (hash, throttle) của process hiện tại (chỉ staff)"""
+    if not request.user.is_staff:
+        raise Http404
+    return JsonResponse({
+        "views": get_stats(),
+        "login": {"hashing": hashing.get_stats(), "throttle": throttle.get_stats()},
     })
@@ -0,0 +1,105 @@
+"""
+Cache HTML đã render cho từng section của trang bạn bè.
+
+Key fragment chứa version của user; mọi service thay đổi quan hệ bạn bè gọi
+bump_version() cho cả 2 phía nên fragment cũ tự bị bỏ qua, không cần xoá.
+TTL chỉ giới hạn độ cũ của phần phụ thuộc người khác (bạn chung, gợi ý, username).
+Cursor trong key được decode và encode lại (độ dài cố định theo field); cursor hỏng
+không tạo key mới mà section được render không qua cache.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from apps.core.pagination import decode_cursor, encode_cursor
+from .models import Friendship, FriendEdge
+
+VERSION_KEY = "friends:version:{}"
+FRAGMENT_KEY = "friends:fragment:{}:{}:{}:{}"
+
+SECTIONS = {
+    "pending": "friends/_pending_requests.html",
+    "suggestions": "friends/_suggestions.html",
+    "friends": "friends/_friends.html",
+}
+# Model mà cursor của section phân trang theo
+CURSOR_MODELS = {
+    "pending": Friendship,
+    "friends": FriendEdge,
+}
+
+
+def _new_version():
+    # Dựa trên thời gian để không trùng version cũ khi key version bị evict
+    return time.time_ns() // 1000
+
+
+def get_version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key)
+    return version
+
+
+def bump_version(*user_ids):
+    for user_id in user_ids:
+        key = VERSION_KEY.format(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def _cursor_key(name, cursor):
+    """Phần cursor của key: "" cho trang đầu, cursor chuẩn hoá, None nếu cursor hỏng"""
+    if not cursor:
+        return ""
+    values = decode_cursor(cursor, CURSOR_MODELS[name]) if name in CURSOR_MODELS else None
+    return None if values is None else encode_cursor(values)
+
+
+def _cached_sections(user_id, cursors):
+    version = get_version(user_id)
+    keys = {}
+    for name in SECTIONS:
+        cursor_key = _cursor_key(name, cursors.get(name))
+        if cursor_key is not None:
+            keys[name] = FRAGMENT_KEY.format(name, user_id, version, cursor_key)
+    cached = cache.get_many(keys.values())
+    html = {name: cached[key] for name, key in keys.items() if key in cached}
+    return keys, html
+
+
+def _store_sections(request, keys, html, missing, context):
+    if missing:
+        rendered = {name: render_to_string(SECTIONS[name], context, request=request) for name in missing}
+        cache.set_many({keys[name]: str(value) for name, value in rendered.items() if name in keys},
+                       settings.FRIENDS_FRAGMENT_TTL)
+        html.update(rendered)
+    return {name: mark_safe(value) for name, value in html.items()}
+
+
+def render_sections(request, user_id, cursors, builders):
+    """
+    HTML của các section, {name: html}.
+    cursors: {name: cursor}; builders: {name: fn(missing) -> context}, chỉ gọi cho
+    section chưa có trong cache (missing là danh sách section cần render).
+    """
+    keys, html = _cached_sections(user_id, cursors)
+    missing = [name for name in SECTIONS if name not in html]
+    context = builders(missing) if missing else {}
+    return _store_sections(request, keys, html, missing, context)
+
+
+async def arender_sections(request, user_id, cursors, builders):
+    """Như render_sections nhưng builders là coroutine function (view async)"""
+    keys, html = _cached_sections(user_id, cursors)
+    missing = [name for name in SECTIONS if name not in html]
+    context = await builders(missing) if missing else {}
+    return _store_sections(request, keys, html, missing, context)
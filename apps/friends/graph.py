@@ -0,0 +1,104 @@
+"""
+Adjacency index của friend graph.
+
+Mỗi user có 1 mảng friend id đã sort (array 'q') lưu trong cache. Khi accept /
+unfriend, key của 2 user bị xoá sau khi transaction commit (không sửa mảng tại
+chỗ: 2 request đọc - sửa - ghi cùng lúc sẽ làm mất cạnh, và rollback sẽ để lại
+cạnh không có trong DB). Cache miss sẽ build lại từ bảng FriendEdge bằng 1 range
+read cho cả batch user.
+"""
+import heapq
+from array import array
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import FriendEdge
+
+FRIEND_IDS_KEY = "friends:ids:{}"
+FRIEND_DEGREE_KEY = "friends:degree:{}"
+FRIEND_IDS_TTL = 24 * 60 * 60
+
+
+def _load_friend_ids(user_ids):
+    adjacency = {uid: [] for uid in user_ids}
+    rows = FriendEdge.objects.filter(user_id__in=user_ids).values_list('user_id', 'friend_id')
+    for user_id, friend_id in rows:
+        adjacency[user_id].append(friend_id)
+    return {uid: array('q', sorted(ids)) for uid, ids in adjacency.items()}
+
+
+def get_friend_ids_many(user_ids):
+    """Trả về {user_id: array friend id đã sort} cho cả batch"""
+    keys = {FRIEND_IDS_KEY.format(uid): uid for uid in user_ids}
+    result = {keys[key]: ids for key, ids in cache.get_many(keys).items()}
+
+    missing = [uid for uid in keys.values() if uid not in result]
+    if missing:
+        loaded = _load_friend_ids(missing)
+        cache.set_many(
+            {FRIEND_IDS_KEY.format(uid): ids for uid, ids in loaded.items()},
+            FRIEND_IDS_TTL,
+        )
+        result.update(loaded)
+    return result
+
+
+def get_friend_ids(user_id):
+    return get_friend_ids_many([user_id])[user_id]
+
+
+def get_degrees(user_ids):
+    """{user_id: số bạn}, không cần load cả mảng friend id"""
+    keys = {FRIEND_DEGREE_KEY.format(uid): uid for uid in user_ids}
+    result = {keys[key]: n for key, n in cache.get_many(keys).items()}
+
+    missing = [uid for uid in keys.values() if uid not in result]
+    if missing:
+        loaded = dict.fromkeys(missing, 0)
+        loaded.update(
+            FriendEdge.objects.filter(user_id__in=missing)
+            .values_list('user_id')
+            .annotate(n=Count('id'))
+            .values_list('user_id', 'n')
+        )
+        cache.set_many(
+            {FRIEND_DEGREE_KEY.format(uid): n for uid, n in loaded.items()},
+            FRIEND_IDS_TTL,
+        )
+        result.update(loaded)
+    return result
+
+
+def forget_users(user_ids):
+    """Bỏ mảng friend id + số bạn trong cache, lần đọc sau load lại từ FriendEdge"""
+    keys = []
+    for uid in user_ids:
+        keys += [FRIEND_IDS_KEY.format(uid), FRIEND_DEGREE_KEY.format(uid)]
+    cache.delete_many(keys)
+
+
+def forget_on_commit(*user_ids):
+    """Gọi trong transaction ghi FriendEdge: xoá cache của các user khi commit, rollback thì giữ nguyên"""
+    transaction.on_commit(lambda: forget_users(user_ids))
+
+
+def rank_suggestions(user_id, limit=10):
+    """
+    Bạn của bạn bè, xếp theo số bạn chung giảm dần.
+    Trả về list (user_id, mutual_count), chỉ top-N id, chưa hydrate User.
+    """
+    friend_ids = get_friend_ids(user_id)
+    if not friend_ids:
+        return []
+
+    excluded = set(friend_ids)
+    excluded.add(user_id)
+
+    counts = Counter()
+    for ids in get_friend_ids_many(list(friend_ids)).values():
+        counts.update(fid for fid in ids if fid not in excluded)
+
+    return heapq.nlargest(limit, counts.items(), key=lambda item: (item[1], -item[0]))
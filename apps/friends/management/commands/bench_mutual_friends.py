@@ -0,0 +1,80 @@
+import random
+import statistics
+import time
+from array import array
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from apps.friends.graph import FRIEND_IDS_KEY
+from apps.friends.mutual import count_mutual_friends, get_mutual_friend_counts_by_id
+
+# Id giả nằm ngoài khoảng id thật để không đụng tới dữ liệu trong cache/DB
+ID_OFFSET = 10 ** 12
+
+
+class Command(BaseCommand):
+    help = "Benchmark batch mutual-friend counts trên graph tổng hợp (không cần DB)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--friends", type=int, default=10000, help="Số bạn của viewer")
+        parser.add_argument("--candidates", type=int, default=200, help="Số candidate mỗi batch")
+        parser.add_argument("--candidate-friends", type=int, default=10000, help="Số bạn của mỗi candidate")
+        parser.add_argument("--overlap", type=float, default=0.1, help="Tỉ lệ bạn của candidate trùng với viewer")
+        parser.add_argument("--population", type=int, default=1000000, help="Tổng số user trong graph")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        population = range(ID_OFFSET + 1, ID_OFFSET + options["population"])
+
+        viewer_id = ID_OFFSET
+        viewer_friends = sorted(rng.sample(population, options["friends"]))
+
+        candidate_arrays = {}
+        for i in range(options["candidates"]):
+            shared = int(options["candidate_friends"] * options["overlap"])
+            ids = set(rng.sample(viewer_friends, min(shared, len(viewer_friends))))
+            while len(ids) < options["candidate_friends"]:
+                ids.add(rng.choice(population))
+            candidate_arrays[ID_OFFSET + options["population"] + i] = array("q", sorted(ids))
+
+        self.stdout.write(
+            f"viewer friends={len(viewer_friends)} candidates={len(candidate_arrays)} "
+            f"friends/candidate={options['candidate_friends']}"
+        )
+
+        pure = self._measure(
+            lambda: count_mutual_friends(viewer_friends, candidate_arrays),
+            options["repeat"],
+        )
+        self._report("set intersection", pure)
+
+        keys = {FRIEND_IDS_KEY.format(viewer_id): array("q", viewer_friends)}
+        keys.update({FRIEND_IDS_KEY.format(cid): ids for cid, ids in candidate_arrays.items()})
+        cache.set_many(keys, 600)
+        try:
+            cached = self._measure(
+                lambda: get_mutual_friend_counts_by_id(viewer_id, list(candidate_arrays)),
+                options["repeat"],
+            )
+            self._report("cache + intersection", cached)
+        finally:
+            cache.delete_many(list(keys))
+
+    def _measure(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def _report(self, label, timings):
+        timings = sorted(timings)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f"{label:<22} p50={statistics.median(timings):8.2f}ms "
+            f"p99={p99:8.2f}ms min={timings[0]:8.2f}ms"
+        )
@@ -0,0 +1,145 @@
+import csv
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.friends.fragments import bump_version
+from apps.friends.graph import forget_users
+from apps.friends.models import Friendship, FriendEdge
+
+User = get_user_model()
+
+
+def read_csv(stream):
+    """Cặp (user_id, friend_id) từ CSV 2 cột, bỏ qua dòng header / dòng hỏng"""
+    for row in csv.reader(stream):
+        try:
+            yield int(row[0]), int(row[1])
+        except (IndexError, ValueError):
+            continue
+
+
+def read_jsonl(stream):
+    """Cặp từ JSONL: {"user_id": 1, "friend_id": 2} mỗi dòng"""
+    for line in stream:
+        try:
+            row = json.loads(line)
+            yield int(row["user_id"]), int(row["friend_id"])
+        except (ValueError, KeyError, TypeError):
+            continue
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tình bạn (đã accept) từ CSV / JSONL theo kiểu streaming, ghi theo chunk bằng "
+        "bulk_create(ignore_conflicts=True). Quan hệ đã có trong DB được giữ nguyên; "
+        "không backfill timeline / gửi notification cho cạnh được import."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File CSV / JSONL, '-' để đọc stdin")
+        parser.add_argument("--format", choices=sorted(READERS), help="Mặc định đoán theo đuôi file")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--report-every", type=int, default=100000, help="In tiến độ sau mỗi N dòng")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        if path == "-" and not options["format"]:
+            raise CommandError("Đọc từ stdin cần --format")
+
+        self.started = time.perf_counter()
+        self.stats = {"read": 0, "pairs": 0, "self": 0, "duplicate": 0, "missing_user": 0}
+        before = Friendship.objects.filter(status="accepted").count()
+        # Cặp đang pending / rejected được giữ nguyên và không được tạo cạnh. Số dòng
+        # chưa accept nhỏ hơn nhiều so với số tình bạn nên nạp 1 lần vào set, thay vì
+        # mỗi chunk tra lại DB theo cặp (chi phí tỉ lệ với số bạn của các user trong chunk).
+        # Lời mời gửi trong lúc import không có trong set: nên chạy lúc ít traffic
+        self.not_accepted = set(
+            Friendship.objects.exclude(status="accepted")
+            .values_list("user_low_id", "user_high_id")
+            .iterator(chunk_size=options["chunk_size"])
+        )
+
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            chunk = {}
+            next_report = options["report_every"]
+            for user_id, friend_id in READERS[fmt](stream):
+                self.stats["read"] += 1
+                if user_id == friend_id:
+                    self.stats["self"] += 1
+                    continue
+                # Cặp đối xứng (a, b) / (b, a) là 1 tình bạn, giữ chiều gặp đầu tiên
+                pair = Friendship.pair(user_id, friend_id)
+                if pair in chunk:
+                    self.stats["duplicate"] += 1
+                    continue
+                chunk[pair] = (user_id, friend_id)
+                if len(chunk) >= options["chunk_size"]:
+                    self._write(chunk)
+                    chunk = {}
+                if self.stats["read"] >= next_report:
+                    self._report()
+                    next_report += options["report_every"]
+            if chunk:
+                self._write(chunk)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        created = Friendship.objects.filter(status="accepted").count() - before
+        self._report(final=True, created=created)
+
+    def _write(self, chunk):
+        """Ghi 1 chunk trong 1 transaction: Friendship, rồi 2 FriendEdge cho mỗi cặp đã accept"""
+        user_ids = {uid for pair in chunk for uid in pair}
+        existing = set(User.objects.filter(id__in=user_ids).values_list("id", flat=True))
+        rows = {
+            pair: direction for pair, direction in chunk.items()
+            if pair[0] in existing and pair[1] in existing
+        }
+        self.stats["missing_user"] += len(chunk) - len(rows)
+        if not rows:
+            return
+
+        now = timezone.now()
+        with transaction.atomic():
+            # bulk_create không gọi save(): tự set cặp low / high
+            Friendship.objects.bulk_create(
+                [
+                    Friendship(
+                        from_user_id=from_id, to_user_id=to_id,
+                        user_low_id=low, user_high_id=high, status="accepted",
+                    )
+                    for (low, high), (from_id, to_id) in rows.items()
+                ],
+                ignore_conflicts=True,
+            )
+            accepted = [pair for pair in rows if pair not in self.not_accepted]
+            edges = []
+            for low, high in accepted:
+                edges.append(FriendEdge(user_id=low, friend_id=high, created_at=now))
+                edges.append(FriendEdge(user_id=high, friend_id=low, created_at=now))
+            FriendEdge.objects.bulk_create(edges, ignore_conflicts=True)
+
+        touched = {uid for pair in accepted for uid in pair}
+        forget_users(touched)
+        bump_version(*touched)
+        self.stats["pairs"] += len(rows)
+
+    def _report(self, final=False, created=None):
+        elapsed = time.perf_counter() - self.started
+        rate = self.stats["read"] / elapsed if elapsed else 0
+        line = " ".join(f"{name}={value}" for name, value in self.stats.items())
+        if final:
+            line += f" created={created}"
+        self.stdout.write(f"{line} in {elapsed:.1f}s ({rate:,.0f} rows/s)")
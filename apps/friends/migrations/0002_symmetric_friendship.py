@@ -0,0 +1,138 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+STATUS_PRIORITY = {"accepted": 0, "pending": 1, "rejected": 2}
+
+
+def fill_pairs(apps, schema_editor):
+    """Điền (user_low, user_high) và bỏ các record trùng cặp theo chiều ngược lại"""
+    Friendship = apps.get_model("friends", "Friendship")
+    keep = {}
+    duplicates = []
+    for rel in Friendship.objects.order_by("-updated_at").iterator():
+        pair = tuple(sorted((rel.from_user_id, rel.to_user_id)))
+        current = keep.get(pair)
+        if current is None:
+            keep[pair] = rel
+        elif STATUS_PRIORITY[rel.status] < STATUS_PRIORITY[current.status]:
+            duplicates.append(current.id)
+            keep[pair] = rel
+        else:
+            duplicates.append(rel.id)
+
+    Friendship.objects.filter(id__in=duplicates).delete()
+    for (low, high), rel in keep.items():
+        rel.user_low_id, rel.user_high_id = low, high
+    Friendship.objects.bulk_update(list(keep.values()), ["user_low", "user_high"], batch_size=1000)
+
+
+def fill_edges(apps, schema_editor):
+    Friendship = apps.get_model("friends", "Friendship")
+    FriendEdge = apps.get_model("friends", "FriendEdge")
+    edges = []
+    for a, b, created_at in Friendship.objects.filter(status="accepted").values_list(
+        "from_user_id", "to_user_id", "updated_at"
+    ).iterator():
+        edges.append(FriendEdge(user_id=a, friend_id=b, created_at=created_at))
+        edges.append(FriendEdge(user_id=b, friend_id=a, created_at=created_at))
+    FriendEdge.objects.bulk_create(edges, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("friends", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="friendship",
+            name="user_low",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="friendship",
+            name="user_high",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(fill_pairs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="friendship",
+            name="user_low",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="friendship",
+            name="user_high",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="friendship",
+            constraint=models.UniqueConstraint(
+                fields=("user_low", "user_high"), name="friendship_pair_unique"
+            ),
+        ),
+        migrations.CreateModel(
+            name="FriendEdge",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "friend",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="friend_edges",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "friend"), name="friend_edge_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_edges, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('friends', '0002_symmetric_friendship'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='friendship',
+            options={},
+        ),
+        migrations.AddIndex(
+            model_name='friendedge',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='friend_edge_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendship',
+            index=models.Index(fields=['to_user', 'status', '-created_at', '-id'], name='friendship_inbox_idx'),
+        ),
+    ]
@@ -13,13 +13,52 @@ class Friendship(models.Model):
 
     from_user = models.ForeignKey(User, related_name='sent_requests', on_delete=models.CASCADE)
     to_user = models.ForeignKey(User, related_name='received_requests', on_delete=models.CASCADE)
+    # Cặp id chuẩn hoá (nhỏ, lớn): tra cứu theo chiều nào cũng chỉ là 1 index seek
+    user_low = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    user_high = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('from_user', 'to_user') # Ngăn spam request trùng lặp
-        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user_low', 'user_high'], name='friendship_pair_unique'),
+        ]
+        indexes = [
+            # Keyset pagination cho lời mời đang chờ duyệt
+            models.Index(fields=['to_user', 'status', '-created_at', '-id'], name='friendship_inbox_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.from_user} -> {self.to_user} ({self.status})"
\ No newline at end of file
+        return f"{self.from_user} -> {self.to_user} ({self.status})"
+
+    @staticmethod
+    def pair(user1_id, user2_id):
+        return (user1_id, user2_id) if user1_id < user2_id else (user2_id, user1_id)
+
+    def save(self, *args, **kwargs):
+        self.user_low_id, self.user_high_id = self.pair(self.from_user_id, self.to_user_id)
+        super().save(*args, **kwargs)
+
+
+class FriendEdge(models.Model):
+    """
+    Bảng cạnh đối xứng: mỗi tình bạn đã accept có 2 dòng (a, b) và (b, a).
+    Danh sách bạn của 1 user là 1 range read trên (user, friend).
+    """
+    user = models.ForeignKey(User, related_name='friend_edges', on_delete=models.CASCADE)
+    friend = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'friend'], name='friend_edge_unique'),
+        ]
+        indexes = [
+            # Keyset pagination cho danh sách bạn bè
+            models.Index(fields=['user', '-created_at', '-id'], name='friend_edge_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} <-> {self.friend_id}"
@@ -0,0 +1,32 @@
+"""
+Đếm số bạn chung theo batch.
+
+Mọi mảng friend id (viewer + các candidate) được lấy bằng 1 lần cache.get_many
+và tối đa 1 query cho phần cache miss, sau đó chỉ là set intersection.
+"""
+from .graph import get_friend_ids_many
+
+
+def count_mutual_friends(viewer_friend_ids, candidate_friend_ids):
+    """{candidate_id: số bạn chung} từ các mảng friend id có sẵn"""
+    viewer_set = set(viewer_friend_ids)
+    return {
+        candidate_id: len(viewer_set.intersection(friend_ids))
+        for candidate_id, friend_ids in candidate_friend_ids.items()
+    }
+
+
+def get_mutual_friend_counts_by_id(viewer_id, candidate_ids):
+    candidate_ids = [cid for cid in dict.fromkeys(candidate_ids) if cid != viewer_id]
+    if not candidate_ids:
+        return {}
+    arrays = get_friend_ids_many([viewer_id, *candidate_ids])
+    return count_mutual_friends(
+        arrays[viewer_id],
+        {cid: arrays[cid] for cid in candidate_ids},
+    )
+
+
+def get_mutual_friend_counts(viewer, candidate_ids):
+    """Số bạn chung giữa viewer và từng candidate, số query không phụ thuộc số candidate"""
+    return get_mutual_friend_counts_by_id(viewer.id, candidate_ids)
@@ -1,14 +1,54 @@
-from django.db.models import Q
-from .models import Friendship
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from apps.core.pagination import Page, apaginate, paginate
+from .models import Friendship, FriendEdge
+from .fragments import bump_version
+from .graph import forget_on_commit, forget_users, get_friend_ids, rank_suggestions
+from .signals import friend_request_sent, friendship_accepted, friendship_removed
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Số dòng mỗi câu bulk_create / filter id__in khi xử lý hàng loạt
+BULK_CHUNK_SIZE = 1000
+
 def get_friendship(user1, user2):
-    """Tìm mối quan hệ giữa 2 người bất kể chiều nào"""
-    return Friendship.objects.filter(
-        Q(from_user=user1, to_user=user2) | Q(from_user=user2, to_user=user1)
-    ).first()
+    """Tìm mối quan hệ giữa 2 người bất kể chiều nào (1 seek trên cặp low/high)"""
+    low, high = Friendship.pair(user1.id, user2.id)
+    return Friendship.objects.filter(user_low_id=low, user_high_id=high).first()
+
+def _add_edges(user1_id, user2_id):
+    FriendEdge.objects.bulk_create([
+        FriendEdge(user_id=user1_id, friend_id=user2_id),
+        FriendEdge(user_id=user2_id, friend_id=user1_id),
+    ], ignore_conflicts=True)
+    forget_on_commit(user1_id, user2_id)
+
+def _remove_edges(user1_id, user2_id):
+    FriendEdge.objects.filter(
+        user_id__in=(user1_id, user2_id), friend_id__in=(user1_id, user2_id)
+    ).delete()
+    forget_on_commit(user1_id, user2_id)
+
+def _accept(friendship):
+    with transaction.atomic():
+        friendship.status = 'accepted'
+        friendship.save()
+        _add_edges(friendship.from_user_id, friendship.to_user_id)
+
+def _unfriend(friendship, user_id, target_user_id):
+    with transaction.atomic():
+        friendship.delete() # Xóa hẳn record để sau này có thể kết bạn lại từ đầu
+        _remove_edges(user_id, target_user_id)
+
+def _create_request(from_user_id, to_user_id):
+    """Tạo lời mời mới; None nếu request song song đã tạo cặp này trước (unique low/high)"""
+    try:
+        with transaction.atomic():
+            return Friendship.objects.create(from_user_id=from_user_id, to_user_id=to_user_id, status='pending')
+    except IntegrityError:
+        return None
 
 def send_friend_request(from_user, to_user_id):
     if from_user.id == int(to_user_id):
@@ -34,18 +74,27 @@ def send_friend_request(from_user, to_user_id):
             existing_relation.from_user = from_user # Reset người gửi là người hiện tại
             existing_relation.to_user = to_user
             existing_relation.save()
+            bump_version(from_user.id, to_user.id)
+            friend_request_sent.send(sender=Friendship, from_user_id=from_user.id, to_user_id=to_user.id)
             return existing_relation, None
 
     # Tạo mới
-    friendship = Friendship.objects.create(from_user=from_user, to_user=to_user, status='pending')
+    friendship = _create_request(from_user.id, to_user.id)
+    if friendship is None:
+        return None, "A friend request is already pending."
+    bump_version(from_user.id, to_user.id)
+    friend_request_sent.send(sender=Friendship, from_user_id=from_user.id, to_user_id=to_user.id)
     return friendship, None
 
 def accept_friend_request(user, request_id):
     try:
         # Chỉ người nhận (to_user) mới được accept
         friendship = Friendship.objects.get(id=request_id, to_user=user, status='pending')
-        friendship.status = 'accepted'
-        friendship.save()
+        _accept(friendship)
+        bump_version(friendship.from_user_id, friendship.to_user_id)
+        friendship_accepted.send(
+            sender=Friendship, user_id=friendship.to_user_id, friend_id=friendship.from_user_id
+        )
         return True, "Friend request accepted."
     except Friendship.DoesNotExist:
         return False, "Request not found or you don't have permission."
@@ -55,6 +104,7 @@ def reject_friend_request(user, request_id):
         friendship = Friendship.objects.get(id=request_id, to_user=user, status='pending')
         friendship.status = 'rejected'
         friendship.save()
+        bump_version(friendship.from_user_id, friendship.to_user_id)
         return True, "Friend request rejected."
     except Friendship.DoesNotExist:
         return False, "Request not found."
@@ -65,65 +115,189 @@ def unfriend_user(user, target_user_id):
         friendship = get_friendship(user, target_user)
         
         if friendship and friendship.status == 'accepted':
-            friendship.delete() # Xóa hẳn record để sau này có thể kết bạn lại từ đầu
+            _unfriend(friendship, user.id, target_user.id)
+            bump_version(user.id, target_user.id)
+            friendship_removed.send(sender=Friendship, user_id=user.id, friend_id=target_user.id)
             return True, "Unfriended successfully."
         return False, "You are not friends."
     except Exception as e:
         return False, str(e)
 
+def _chunks(items, size=BULK_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def accept_all_friend_requests(user):
+    """Accept mọi lời mời đang chờ: vài câu update / bulk_create thay vì 1 vòng get + save mỗi lời mời"""
+    with transaction.atomic():
+        # Khoá các dòng để lời mời bị huỷ / reject song song không được tạo cạnh
+        pending = list(
+            Friendship.objects.select_for_update()
+            .filter(to_user_id=user.id, status='pending')
+            .values_list('id', 'from_user_id')
+        )
+        if not pending:
+            return 0, "No pending requests."
+        for chunk in _chunks(pending):
+            Friendship.objects.filter(id__in=[fid for fid, _ in chunk]).update(status='accepted', updated_at=timezone.now())
+            FriendEdge.objects.bulk_create(
+                [FriendEdge(user_id=user.id, friend_id=from_id) for _, from_id in chunk]
+                + [FriendEdge(user_id=from_id, friend_id=user.id) for _, from_id in chunk],
+                ignore_conflicts=True,
+            )
+
+    friend_ids = [from_id for _, from_id in pending]
+    forget_users([user.id, *friend_ids])
+    bump_version(user.id, *friend_ids)
+    for friend_id in friend_ids:
+        friendship_accepted.send(sender=Friendship, user_id=user.id, friend_id=friend_id)
+    return len(pending), f"{len(pending)} friend request(s) accepted."
+
+def reject_all_friend_requests(user):
+    with transaction.atomic():
+        pending = list(
+            Friendship.objects.select_for_update()
+            .filter(to_user_id=user.id, status='pending')
+            .values_list('id', 'from_user_id')
+        )
+        if not pending:
+            return 0, "No pending requests."
+        for chunk in _chunks(pending):
+            Friendship.objects.filter(id__in=[fid for fid, _ in chunk]).update(status='rejected', updated_at=timezone.now())
+
+    bump_version(user.id, *[from_id for _, from_id in pending])
+    return len(pending), f"{len(pending)} friend request(s) rejected."
+
 def get_friend_list(user):
-    """Lấy danh sách bạn bè đã accept (cả 2 chiều)"""
-    friends_rel = Friendship.objects.filter(
-        (Q(from_user=user) | Q(to_user=user)) & Q(status='accepted')
-    ).select_related('from_user', 'to_user')
-
-    friends = []
-    friend_ids = []
-    for rel in friends_rel:
-        if rel.from_user == user:
-            friends.append(rel.to_user)
-            friend_ids.append(rel.to_user.id)
-        else:
-            friends.append(rel.from_user)
-            friend_ids.append(rel.from_user.id)
-            
+    """Lấy danh sách bạn bè đã accept (cả 2 chiều), id lấy từ adjacency index"""
+    friend_ids = list(get_friend_ids(user.id))
+    friends = list(User.objects.filter(id__in=friend_ids).order_by('id')) if friend_ids else []
     return friends, friend_ids
 
+def get_friend_page(user, cursor=None, page_size=20):
+    """1 trang bạn bè, mới kết bạn trước; keyset theo (created_at, id) của FriendEdge"""
+    page = paginate(FriendEdge.objects.filter(user_id=user.id).only('id', 'friend_id', 'created_at'), cursor, page_size)
+    users = User.objects.in_bulk([edge.friend_id for edge in page.items])
+    return Page([users[edge.friend_id] for edge in page.items if edge.friend_id in users], page.next_cursor)
+
 def get_pending_requests(user):
     """Lấy danh sách lời mời kết bạn ĐANG CHỜ TÔI DUYỆT"""
-    return Friendship.objects.filter(to_user=user, status='pending').select_related('from_user')
+    return Friendship.objects.filter(
+        to_user=user, status='pending'
+    ).select_related('from_user').order_by('-created_at', '-id')
+
+def get_pending_request_page(user, cursor=None, page_size=20):
+    """1 trang lời mời đang chờ duyệt, keyset theo (created_at, id)"""
+    return paginate(
+        Friendship.objects.filter(to_user_id=user.id, status='pending').select_related('from_user'),
+        cursor,
+        page_size,
+    )
 
-def get_friend_suggestions(user):
+def get_friend_suggestions(user, limit=10):
     """
     Gợi ý bạn bè dựa trên: Bạn của bạn bè (Mutual Friends).
+    Xếp hạng trên mảng friend id trong cache, chỉ hydrate top-N User.
     """
-    current_friends, current_friend_ids = get_friend_list(user)
-    
+    ranked = rank_suggestions(user.id, limit)
+
     # Nếu chưa có bạn bè, gợi ý random (trừ bản thân)
-    if not current_friend_ids:
+    if not ranked and not get_friend_ids(user.id):
         return User.objects.exclude(id=user.id)[:5]
 
-    # Tìm bạn của những người bạn hiện tại
-    # Logic: Lấy tất cả quan hệ accepted của friends tôi, loại trừ tôi và những người đã là bạn tôi
+    users = User.objects.in_bulk([uid for uid, _ in ranked])
     suggestions = []
-    checked_ids = set(current_friend_ids)
-    checked_ids.add(user.id) # Không gợi ý chính mình
-
-    # Lấy các quan hệ của bạn bè tôi
-    friends_of_friends_rel = Friendship.objects.filter(
-        (Q(from_user__in=current_friends) | Q(to_user__in=current_friends)) & Q(status='accepted')
-    ).distinct()
-
-    for rel in friends_of_friends_rel:
-        potential_friend = None
-        if rel.from_user in current_friends:
-            potential_friend = rel.to_user
-        else:
-            potential_friend = rel.from_user
-        
-        # Nếu người này chưa nằm trong danh sách bạn bè và không phải là tôi
-        if potential_friend.id not in checked_ids:
-            suggestions.append(potential_friend)
-            checked_ids.add(potential_friend.id) # Tránh duplicate trong list gợi ý
+    for uid, mutual_count in ranked:
+        if uid in users:
+            users[uid].mutual_count = mutual_count
+            suggestions.append(users[uid])
+    return suggestions
+
+
+# ---------------------------------------------------------------------------
+# Bản async cho view async (ASGI): dùng async ORM nên không giữ thread trong
+# lúc chờ DB. transaction.atomic chưa có bản async, phần ghi cần atomic chạy
+# trong 1 lần sync_to_async.
+# ---------------------------------------------------------------------------
+
+async def aget_friendship(user1_id, user2_id):
+    low, high = Friendship.pair(user1_id, user2_id)
+    return await Friendship.objects.filter(user_low_id=low, user_high_id=high).afirst()
+
+async def asend_friend_request(from_user, to_user_id):
+    to_user_id = int(to_user_id)
+    if from_user.id == to_user_id:
+        return None, "You cannot send a friend request to yourself."
+
+    if not await User.objects.filter(id=to_user_id).aexists():
+        return None, "User not found."
+
+    existing_relation = await aget_friendship(from_user.id, to_user_id)
+    if existing_relation:
+        if existing_relation.status == 'accepted':
+            return None, "You are already friends."
+        if existing_relation.status == 'pending':
+            return None, "A friend request is already pending."
+        # rejected: cho gửi lại bằng cách update record cũ
+        existing_relation.status = 'pending'
+        existing_relation.from_user_id = from_user.id
+        existing_relation.to_user_id = to_user_id
+        await existing_relation.asave()
+        friendship = existing_relation
+    else:
+        friendship = await sync_to_async(_create_request)(from_user.id, to_user_id)
+        if friendship is None:
+            return None, "A friend request is already pending."
+
+    bump_version(from_user.id, to_user_id)
+    await friend_request_sent.asend(sender=Friendship, from_user_id=from_user.id, to_user_id=to_user_id)
+    return friendship, None
+
+async def aaccept_friend_request(user, request_id):
+    try:
+        friendship = await Friendship.objects.aget(id=request_id, to_user_id=user.id, status='pending')
+    except Friendship.DoesNotExist:
+        return False, "Request not found or you don't have permission."
+
+    await sync_to_async(_accept)(friendship)
+    bump_version(friendship.from_user_id, friendship.to_user_id)
+    await friendship_accepted.asend(
+        sender=Friendship, user_id=friendship.to_user_id, friend_id=friendship.from_user_id
+    )
+    return True, "Friend request accepted."
+
+async def areject_friend_request(user, request_id):
+    try:
+        friendship = await Friendship.objects.aget(id=request_id, to_user_id=user.id, status='pending')
+    except Friendship.DoesNotExist:
+        return False, "Request not found."
+
+    friendship.status = 'rejected'
+    await friendship.asave()
+    bump_version(friendship.from_user_id, friendship.to_user_id)
+    return True, "Friend request rejected."
+
+async def aunfriend_user(user, target_user_id):
+    try:
+        target_user_id = int(target_user_id)
+        friendship = await aget_friendship(user.id, target_user_id)
+        if friendship and friendship.status == 'accepted':
+            await sync_to_async(_unfriend)(friendship, user.id, target_user_id)
+            bump_version(user.id, target_user_id)
+            await friendship_removed.asend(sender=Friendship, user_id=user.id, friend_id=target_user_id)
+            return True, "Unfriended successfully."
+        return False, "You are not friends."
+    except Exception as e:
+        return False, str(e)
+
+async def aget_friend_page(user, cursor=None, page_size=20):
+    page = await apaginate(FriendEdge.objects.filter(user_id=user.id).only('id', 'friend_id', 'created_at'), cursor, page_size)
+    users = await User.objects.ain_bulk([edge.friend_id for edge in page.items])
+    return Page([users[edge.friend_id] for edge in page.items if edge.friend_id in users], page.next_cursor)
 
-    return suggestions[:10] # Trả về tối đa 10 gợi ý
\ No newline at end of file
+async def aget_pending_request_page(user, cursor=None, page_size=20):
+    return await apaginate(
+        Friendship.objects.filter(to_user_id=user.id, status='pending').select_related('from_user'),
+        cursor,
+        page_size,
+    )
@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+# Gửi sau khi lời mời kết bạn được tạo (hoặc gửi lại sau khi bị reject).
+# kwargs: from_user_id, to_user_id
+friend_request_sent = Signal()
+
+# Gửi sau khi 2 người trở thành bạn / hết là bạn.
+# kwargs: user_id, friend_id
+friendship_accepted = Signal()
+friendship_removed = Signal()
@@ -1,3 +1,250 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import User
+from apps.core.pagination import cursor_for
+from .fragments import _cached_sections
+from .graph import get_degrees, get_friend_ids, rank_suggestions
+from .mutual import count_mutual_friends, get_mutual_friend_counts
+from .models import Friendship, FriendEdge
+from . import services
+from .services import (
+    _add_edges,
+    accept_all_friend_requests,
+    accept_friend_request,
+    asend_friend_request,
+    reject_all_friend_requests,
+    send_friend_request,
+    unfriend_user,
+)
+
+
+def make_users(*names):
+    return [
+        User.objects.create_user(email=f"{name}@example.com", username=name, password="x", is_active=True)
+        for name in names
+    ]
+
+
+# Notification được ghi ngay trong request thay vì thread của buffer
+@override_settings(NOTIFICATION_FLUSH_INTERVAL=0, PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class FriendGraphTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def befriend(self, user, other):
+        friendship, error = send_friend_request(user, other.id)
+        self.assertIsNone(error)
+        with self.captureOnCommitCallbacks(execute=True):
+            accept_friend_request(other, friendship.id)
+
+
+class AdjacencyCacheTests(FriendGraphTestCase):
+    def test_accept_and_unfriend_refresh_cached_arrays(self):
+        a, b, c = make_users("a", "b", "c")
+        # Đưa mảng rỗng vào cache trước
+        self.assertEqual(list(get_friend_ids(a.id)), [])
+        self.assertEqual(get_degrees([a.id]), {a.id: 0})
+
+        self.befriend(a, b)
+        self.befriend(c, a)
+        self.assertEqual(list(get_friend_ids(a.id)), sorted([b.id, c.id]))
+        self.assertEqual(list(get_friend_ids(b.id)), [a.id])
+        self.assertEqual(get_degrees([a.id, b.id]), {a.id: 2, b.id: 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            unfriend_user(a, c.id)
+        self.assertEqual(list(get_friend_ids(a.id)), [b.id])
+        self.assertEqual(list(get_friend_ids(c.id)), [])
+        self.assertEqual(get_degrees([a.id]), {a.id: 1})
+
+    def test_rollback_leaves_cache_untouched(self):
+        a, b = make_users("a", "b")
+        self.assertEqual(list(get_friend_ids(a.id)), [])
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    _add_edges(a.id, b.id)
+                    raise RuntimeError("rollback")
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(FriendEdge.objects.exists())
+        self.assertEqual(list(get_friend_ids(a.id)), [])
+
+    def test_cache_is_not_edited_before_commit(self):
+        a, b = make_users("a", "b")
+        self.assertEqual(list(get_friend_ids(a.id)), [])
+        friendship, _ = send_friend_request(a, b.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            accept_friend_request(b, friendship.id)
+            # Chưa commit: cache giữ nguyên bản cũ
+            self.assertEqual(list(get_friend_ids(a.id)), [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(list(get_friend_ids(a.id)), [b.id])
+
+    def test_rank_suggestions_by_mutual_count(self):
+        me, f1, f2, x, y = make_users("me", "f1", "f2", "x", "y")
+        for friend in (f1, f2):
+            self.befriend(me, friend)
+        self.befriend(f1, x)
+        self.befriend(f2, x)
+        self.befriend(f1, y)
+
+        self.assertEqual(rank_suggestions(me.id), [(x.id, 2), (y.id, 1)])
+        self.assertEqual(Friendship.objects.filter(status="accepted").count(), 5)
+
+
+class MutualFriendTests(FriendGraphTestCase):
+    def test_count_from_arrays(self):
+        self.assertEqual(count_mutual_friends([1, 2, 3], {10: [2, 3, 4], 11: [], 12: [5]}), {10: 2, 11: 0, 12: 0})
+
+    def test_batch_counts_use_one_query_then_cache(self):
+        me, f1, f2, x, y = make_users("me", "f1", "f2", "x", "y")
+        for friend in (f1, f2):
+            self.befriend(me, friend)
+        self.befriend(x, f1)
+        self.befriend(x, f2)
+        self.befriend(y, f2)
+        cache.clear()
+
+        # Viewer + mọi candidate: 1 query cho phần cache miss
+        with self.assertNumQueries(1):
+            counts = get_mutual_friend_counts(me, [x.id, y.id, f1.id, x.id, me.id])
+        self.assertEqual(counts, {x.id: 2, y.id: 1, f1.id: 0})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_mutual_friend_counts(me, [x.id, y.id]), {x.id: 2, y.id: 1})
+        self.assertEqual(get_mutual_friend_counts(me, []), {})
+
+
+class FragmentCursorTests(FriendGraphTestCase):
+    def test_cursor_in_key_is_validated_and_normalized(self):
+        a, b = make_users("a", "b")
+        self.befriend(a, b)
+        edge = FriendEdge.objects.get(user_id=a.id)
+        cursor = cursor_for(edge)
+        # Cùng giá trị nhưng JSON có thêm khoảng trắng: cùng 1 key, độ dài không đổi
+        raw = json.dumps([edge.created_at.isoformat(), edge.id], indent=1000)
+        spaced = base64.urlsafe_b64encode(raw.encode()).decode()
+
+        keys, _ = _cached_sections(a.id, {"friends": cursor})
+        spaced_keys, _ = _cached_sections(a.id, {"friends": spaced})
+        self.assertEqual(keys["friends"], spaced_keys["friends"])
+        self.assertLess(len(keys["friends"]), 200)
+
+        # Cursor hỏng: section không có key, được render không qua cache
+        keys, _ = _cached_sections(a.id, {"friends": "x" * 5000, "pending": "!!"})
+        self.assertEqual(set(keys), {"suggestions"})
+
+    def test_view_renders_with_invalid_cursor(self):
+        alice, bob = make_users("alice", "bob")
+        self.befriend(alice, bob)
+        self.client.post("/accounts/login/", {"email": "alice@example.com", "password": "x"})
+        for _ in range(2):
+            response = self.client.get("/friends/", {"friends_cursor": "x" * 5000})
+            self.assertContains(response, "bob")
+
+
+class SendRequestRaceTests(FriendGraphTestCase):
+    def test_concurrent_request_is_reported_as_pending(self):
+        """Request song song tạo cặp sau lúc check: trả lỗi thay vì IntegrityError"""
+        me, other = make_users("me", "other")
+        send_friend_request(other, me.id)
+        with mock.patch.object(services, "get_friendship", return_value=None), \
+                mock.patch.object(services, "aget_friendship", mock.AsyncMock(return_value=None)):
+            self.assertEqual(send_friend_request(me, other.id), (None, "A friend request is already pending."))
+            self.assertEqual(
+                async_to_sync(asend_friend_request)(me, other.id), (None, "A friend request is already pending.")
+            )
+        self.assertEqual(Friendship.objects.count(), 1)
+        # Transaction bên ngoài vẫn dùng được sau lỗi
+        self.assertTrue(User.objects.filter(id=me.id).exists())
+
+
+class BulkRequestTests(FriendGraphTestCase):
+    def test_accept_all(self):
+        me, a, b, c, d = make_users("me", "a", "b", "c", "d")
+        for sender in (a, b, c):
+            send_friend_request(sender, me.id)
+        send_friend_request(me, d.id)
+        self.assertEqual(list(get_friend_ids(me.id)), [])
+
+        self.assertEqual(accept_all_friend_requests(me), (3, "3 friend request(s) accepted."))
+        self.assertEqual(list(get_friend_ids(me.id)), sorted([a.id, b.id, c.id]))
+        self.assertEqual(list(get_friend_ids(a.id)), [me.id])
+        self.assertEqual(FriendEdge.objects.count(), 6)
+        # Lời mời mình gửi đi không bị đụng tới
+        self.assertEqual(Friendship.objects.get(from_user=me).status, "pending")
+        self.assertEqual(accept_all_friend_requests(me), (0, "No pending requests."))
+
+    def test_reject_all(self):
+        me, a, b = make_users("me", "a", "b")
+        for sender in (a, b):
+            send_friend_request(sender, me.id)
+        self.assertEqual(reject_all_friend_requests(me)[0], 2)
+        self.assertEqual(set(Friendship.objects.values_list("status", flat=True)), {"rejected"})
+        self.assertFalse(FriendEdge.objects.exists())
+
+
+class ImportFriendshipsTests(FriendGraphTestCase):
+    def write(self, name, content):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def run_import(self, path):
+        out = StringIO()
+        call_command("import_friendships", path, chunk_size=2, stdout=out)
+        return out.getvalue()
+
+    def test_import_csv(self):
+        a, b, c, d = make_users("a", "b", "c", "d")
+        self.befriend(a, d)
+        send_friend_request(c, a.id)
+        self.assertEqual(list(get_friend_ids(a.id)), [d.id])
+        rows = [
+            "user_id,friend_id",
+            f"{a.id},{b.id}",
+            f"{b.id},{a.id}",   # trùng cặp
+            f"{c.id},{c.id}",   # tự kết bạn
+            f"{a.id},999999",   # user không tồn tại
+            f"{b.id},{c.id}",
+            f"{a.id},{c.id}",   # đang pending: giữ nguyên
+            f"{a.id},{d.id}",   # đã là bạn
+        ]
+        output = self.run_import(self.write("pairs.csv", "\n".join(rows)))
+        self.assertIn("self=1", output)
+        self.assertIn("duplicate=1", output)
+        self.assertIn("missing_user=1", output)
+        self.assertIn("created=2", output)
+
+        accepted = Friendship.objects.filter(status="accepted").count()
+        self.assertEqual(accepted, 3)
+        self.assertEqual(FriendEdge.objects.count(), 2 * accepted)
+        low, high = Friendship.pair(a.id, c.id)
+        self.assertEqual(Friendship.objects.get(user_low_id=low, user_high_id=high).status, "pending")
+        self.assertEqual(list(get_friend_ids(a.id)), sorted([b.id, d.id]))
+
+    def test_import_jsonl(self):
+        a, b = make_users("a", "b")
+        path = self.write("pairs.jsonl", json.dumps({"user_id": a.id, "friend_id": b.id}) + "\nnot json\n")
+        self.run_import(path)
+        self.assertEqual(list(get_friend_ids(b.id)), [a.id])
@@ -8,5 +8,7 @@ urlpatterns = [
     path("send/<int:user_id>/", send_request_view, name="send_request"),
     path("accept/<int:request_id>/", accept_request_view, name="accept_request"),
     path("reject/<int:request_id>/", reject_request_view, name="reject_request"),
+    path("accept-all/", accept_all_view, name="accept_all"),
+    path("reject-all/", reject_all_view, name="reject_all"),
     path("unfriend/<int:user_id>/", unfriend_view, name="unfriend"),
 ]
\ No newline at end of file
@@ -1,38 +1,86 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from .services import (
-    send_friend_request,
-    accept_friend_request,
-    reject_friend_request,
-    get_friend_list,
-    get_pending_requests,
+    asend_friend_request,
+    aaccept_friend_request,
+    areject_friend_request,
+    aget_friend_page,
+    aget_pending_request_page,
     get_friend_suggestions,
-    unfriend_user
+    aunfriend_user,
+    accept_all_friend_requests,
+    reject_all_friend_requests,
 )
+from .fragments import arender_sections
+from .graph import get_degrees
+from .mutual import get_mutual_friend_counts
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-@login_required
-def friend_list_view(request):
-    friends, _ = get_friend_list(request.user)
-    pending_requests = get_pending_requests(request.user)
-    suggestions = get_friend_suggestions(request.user)
+PAGE_SIZE = 20
+
+def _graph_context(user, missing, people):
+    """
+    Phần dựa trên adjacency index (số bạn, gợi ý, bạn chung): đọc từ cache,
+    chỉ chạm DB khi cache miss nên gom vào 1 lần sync_to_async.
+    """
+    context = {}
+    if "friends" in missing:
+        context["friend_count"] = get_degrees([user.id])[user.id]
+    if "suggestions" in missing:
+        context["suggestions"] = list(get_friend_suggestions(user))
+
+    # Số bạn chung cho cả trang, tính 1 lần theo batch
+    mutual_counts = get_mutual_friend_counts(user, [person.id for person in people])
+    for person in people:
+        person.mutual_count = mutual_counts.get(person.id, 0)
+    return context
 
-    context = {
-        "friends": friends,
-        "pending_requests": pending_requests,
-        "suggestions": suggestions
+@login_required
+async def friend_list_view(request):
+    user = request.user
+    cursors = {
+        "friends": request.GET.get("friends_cursor"),
+        "pending": request.GET.get("pending_cursor"),
     }
-    return render(request, "friends/friend_list.html", context)
+
+    async def build(missing):
+        # Chỉ chạy khi có section chưa nằm trong cache
+        context = {}
+        people = []
+        if "friends" in missing:
+            friend_page = await aget_friend_page(user, cursors["friends"], PAGE_SIZE)
+            people += friend_page.items
+            context.update({
+                "friends": friend_page.items,
+                "friends_cursor": friend_page.next_cursor,
+            })
+        if "pending" in missing:
+            pending_page = await aget_pending_request_page(user, cursors["pending"], PAGE_SIZE)
+            people += [req.from_user for req in pending_page.items]
+            context.update({
+                "pending_requests": pending_page.items,
+                "pending_cursor": pending_page.next_cursor,
+            })
+        context.update(await sync_to_async(_graph_context)(user, missing, people))
+        return context
+
+    sections = await arender_sections(request, user.id, cursors, build)
+    return render(request, "friends/friend_list.html", {
+        "pending_html": sections["pending"],
+        "suggestions_html": sections["suggestions"],
+        "friends_html": sections["friends"],
+    })
 
 @login_required
 @csrf_exempt
-def send_request_view(request, user_id):
+async def send_request_view(request, user_id):
     if request.method == "POST":
-        _, error = send_friend_request(request.user, user_id)
+        _, error = await asend_friend_request(request.user, user_id)
         if error:
             messages.error(request, error)
         else:
@@ -41,9 +89,9 @@ def send_request_view(request, user_id):
 
 @login_required
 @csrf_exempt
-def accept_request_view(request, request_id):
+async def accept_request_view(request, request_id):
     if request.method == "POST":
-        success, msg = accept_friend_request(request.user, request_id)
+        success, msg = await aaccept_friend_request(request.user, request_id)
         if success:
             messages.success(request, msg)
         else:
@@ -52,9 +100,9 @@ def accept_request_view(request, request_id):
 
 @login_required
 @csrf_exempt
-def reject_request_view(request, request_id):
+async def reject_request_view(request, request_id):
     if request.method == "POST":
-        success, msg = reject_friend_request(request.user, request_id)
+        success, msg = await areject_friend_request(request.user, request_id)
         if success:
             messages.info(request, msg)
         else:
@@ -63,11 +111,31 @@ def reject_request_view(request, request_id):
 
 @login_required
 @csrf_exempt
-def unfriend_view(request, user_id):
+async def unfriend_view(request, user_id):
     if request.method == "POST":
-        success, msg = unfriend_user(request.user, user_id)
+        success, msg = await aunfriend_user(request.user, user_id)
         if success:
             messages.warning(request, msg)
         else:
             messages.error(request, msg)
-    return redirect("friends:list")
\ No newline at end of file
+    return redirect("friends:list")
+
+@login_required
+@csrf_exempt
+async def accept_all_view(request):
+    if request.method == "POST":
+        # Ghi hàng loạt trong 1 transaction: chạy trọn trong 1 lần sync_to_async
+        count, msg = await sync_to_async(accept_all_friend_requests)(request.user)
+        if count:
+            messages.success(request, msg)
+        else:
+            messages.info(request, msg)
+    return redirect("friends:list")
+
+@login_required
+@csrf_exempt
+async def reject_all_view(request):
+    if request.method == "POST":
+        count, msg = await sync_to_async(reject_all_friend_requests)(request.user)
+        messages.info(request, msg)
+    return redirect("friends:list")
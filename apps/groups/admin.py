@@ -1,3 +1,11 @@
 from django.contrib import admin
+from .models import Group, GroupMembership
 
-# Register your models here.
+@admin.register(Group)
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('name', 'owner', 'member_count', 'created_at')
+    search_fields = ('name',)
+
+@admin.register(GroupMembership)
+class GroupMembershipAdmin(admin.ModelAdmin):
+    list_display = ('group', 'user', 'roles', 'joined_at')
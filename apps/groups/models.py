@@ -1,3 +1,54 @@
+from enum import IntFlag
+
 from django.db import models
+from django.conf import settings
+
+User = settings.AUTH_USER_MODEL
+
+
+class GroupRole(IntFlag):
+    """Quyền trong group lưu thành bitmask trên GroupMembership.roles"""
+    MEMBER = 1
+    POSTER = 2
+    MODERATOR = 4
+    ADMIN = 8
+    OWNER = 16
+
+    @classmethod
+    def default(cls):
+        return cls.MEMBER | cls.POSTER
+
+
+class Group(models.Model):
+    name = models.CharField(max_length=100)
+    description = models.TextField(blank=True)
+    owner = models.ForeignKey(User, related_name='owned_groups', on_delete=models.CASCADE)
+    # Đếm sẵn, không COUNT(*) khi hiển thị
+    member_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class GroupMembership(models.Model):
+    user = models.ForeignKey(User, related_name='group_memberships', on_delete=models.CASCADE)
+    group = models.ForeignKey(Group, related_name='memberships', on_delete=models.CASCADE)
+    roles = models.PositiveSmallIntegerField(default=int(GroupRole.default()))
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # (user, group): "group của tôi" + check quyền
+            models.UniqueConstraint(fields=['user', 'group'], name='membership_user_group_unique'),
+        ]
+        indexes = [
+            # (group, user): danh sách thành viên của group
+            models.Index(fields=['group', 'user'], name='membership_group_user_idx'),
+        ]
+
+    def has_role(self, role):
+        return bool(self.roles & role)
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.user_id} in {self.group_id} ({GroupRole(self.roles)!r})"
@@ -0,0 +1,161 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from apps.core.pagination import paginate
+from apps.posts.models import Post
+from apps.posts.services import create_post
+from .models import Group, GroupMembership, GroupRole
+
+MEMBERSHIP_KEY = "groups:member:{}:{}"
+MEMBERSHIP_VERSION_KEY = "groups:member:version:{}"
+MAX_NAME_LENGTH = 100
+# OWNER chỉ được gán lúc tạo group
+ASSIGNABLE_ROLES = GroupRole.MEMBER | GroupRole.POSTER | GroupRole.MODERATOR | GroupRole.ADMIN
+
+
+# ---------------------------------------------------------------------------
+# Membership map trong cache: {group_id: roles} của 1 user.
+# Check quyền trên hot path (xem post group, đăng bài...) chỉ là 1 cache get.
+#
+# Key map gắn version của user. Invalidate = bump version thay vì delete:
+# request đọc DB trước khi membership đổi rồi mới cache.set chỉ ghi vào key
+# version cũ, không ai đọc lại. Version là timestamp (µs) nên kể cả khi key
+# version bị evict, version mới vẫn lớn hơn mọi version cũ.
+# ---------------------------------------------------------------------------
+
+def _membership_version(user_id):
+    key = MEMBERSHIP_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns() // 1000
+        if not cache.add(key, version, None):
+            version = cache.get(key)
+    return version
+
+
+def get_membership_map(user_id):
+    key = MEMBERSHIP_KEY.format(user_id, _membership_version(user_id))
+    memberships = cache.get(key)
+    if memberships is None:
+        memberships = dict(GroupMembership.objects.filter(user_id=user_id).values_list('group_id', 'roles'))
+        cache.set(key, memberships, settings.GROUP_MEMBERSHIP_TTL)
+    return memberships
+
+
+def invalidate_membership(*user_ids):
+    now = time.time_ns() // 1000
+    for user_id in user_ids:
+        key = MEMBERSHIP_VERSION_KEY.format(user_id)
+        cache.set(key, max(now, (cache.get(key) or 0) + 1), None)
+
+
+def get_roles(user_id, group_id):
+    return GroupRole(get_membership_map(user_id).get(group_id, 0))
+
+
+def has_role(user_id, group_id, role):
+    return bool(get_roles(user_id, group_id) & role)
+
+
+def is_member(user_id, group_id):
+    return group_id in get_membership_map(user_id)
+
+
+# ---------------------------------------------------------------------------
+
+def create_group(owner, name, description=""):
+    name = (name or "").strip()
+    if not name:
+        return None, "Group name cannot be empty."
+    if len(name) > MAX_NAME_LENGTH:
+        return None, f"Group name is too long (max {MAX_NAME_LENGTH} characters)."
+
+    roles = GroupRole.default() | GroupRole.MODERATOR | GroupRole.ADMIN | GroupRole.OWNER
+    with transaction.atomic():
+        group = Group.objects.create(name=name, description=(description or "").strip(), owner=owner, member_count=1)
+        GroupMembership.objects.create(user_id=owner.id, group=group, roles=int(roles))
+    invalidate_membership(owner.id)
+    return group, None
+
+
+def join_group(user, group_id):
+    if is_member(user.id, group_id):
+        return None, "You are already a member."
+    try:
+        with transaction.atomic():
+            membership = GroupMembership.objects.create(user_id=user.id, group_id=group_id)
+            Group.objects.filter(id=group_id).update(member_count=F('member_count') + 1)
+    except IntegrityError:
+        # Group không tồn tại hoặc đã join ở request song song
+        return None, "Could not join this group."
+    invalidate_membership(user.id)
+    return membership, None
+
+
+def leave_group(user, group_id):
+    if has_role(user.id, group_id, GroupRole.OWNER):
+        return False, "The owner cannot leave the group."
+    with transaction.atomic():
+        deleted, _ = GroupMembership.objects.filter(user_id=user.id, group_id=group_id).delete()
+        if deleted:
+            Group.objects.filter(id=group_id).update(member_count=F('member_count') - 1)
+    invalidate_membership(user.id)
+    if not deleted:
+        return False, "You are not a member of this group."
+    return True, "You left the group."
+
+
+def set_member_roles(actor, group_id, user_id, roles):
+    """Admin đổi quyền của thành viên; không ai được đụng tới quyền OWNER"""
+    if not has_role(actor.id, group_id, GroupRole.ADMIN):
+        return False, "You don't have permission."
+    roles = GroupRole(int(roles) & ASSIGNABLE_ROLES) | GroupRole.MEMBER
+    membership = GroupMembership.objects.filter(user_id=user_id, group_id=group_id).first()
+    if membership is None:
+        return False, "Member not found."
+    if membership.has_role(GroupRole.OWNER):
+        return False, "The owner's roles cannot be changed."
+    membership.roles = int(roles)
+    membership.save(update_fields=['roles'])
+    invalidate_membership(user_id)
+    return True, "Roles updated."
+
+
+def get_user_groups(user):
+    """Group của tôi: id từ membership map, hydrate bằng 1 query"""
+    group_ids = list(get_membership_map(user.id))
+    if not group_ids:
+        return []
+    return list(Group.objects.filter(id__in=group_ids).order_by('name', 'id'))
+
+
+def get_group_post_page(user, group_id, cursor=None, page_size=20):
+    """1 trang post của group; None nếu user không phải thành viên"""
+    if not is_member(user.id, group_id):
+        return None
+    queryset = Post.objects.filter(group_id=group_id, is_hidden=False).select_related('author')
+    return paginate(queryset, cursor, page_size)
+
+
+def create_group_post(user, group_id, content):
+    if not has_role(user.id, group_id, GroupRole.POSTER):
+        return None, "You don't have permission to post in this group."
+    group = Group.objects.filter(id=group_id).first()
+    if group is None:
+        return None, "Group not found."
+    return create_post(user, content, group=group)
+
+
+def delete_group_post(user, group_id, post_id):
+    """Tác giả hoặc moderator được xoá post trong group"""
+    queryset = Post.objects.filter(id=post_id, group_id=group_id)
+    if not has_role(user.id, group_id, GroupRole.MODERATOR):
+        queryset = queryset.filter(author_id=user.id)
+    deleted, _ = queryset.delete()
+    if not deleted:
+        return False, "Post not found."
+    return True, "Post deleted."
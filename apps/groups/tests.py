@@ -1,3 +1,122 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import User
+from apps.posts.models import TimelineEntry
+from . import services
+from .models import Group, GroupMembership, GroupRole
+from .services import (
+    create_group,
+    create_group_post,
+    delete_group_post,
+    get_group_post_page,
+    get_membership_map,
+    get_roles,
+    get_user_groups,
+    has_role,
+    is_member,
+    join_group,
+    leave_group,
+    set_member_roles,
+)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class GroupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner, self.member, self.outsider = [
+            User.objects.create_user(email=f"{name}@example.com", username=name, password="x")
+            for name in ("owner", "member", "outsider")
+        ]
+        self.group, error = create_group(self.owner, " Hội đạp xe ")
+        self.assertIsNone(error)
+        self.assertEqual(self.group.name, "Hội đạp xe")
+
+    def test_role_bitmask(self):
+        roles = get_roles(self.owner.id, self.group.id)
+        for role in GroupRole:
+            self.assertIn(role, roles)
+        self.assertEqual(get_roles(self.outsider.id, self.group.id), GroupRole(0))
+        self.assertFalse(has_role(self.outsider.id, self.group.id, GroupRole.MEMBER))
+
+        join_group(self.member, self.group.id)
+        self.assertEqual(get_roles(self.member.id, self.group.id), GroupRole.default())
+        self.assertFalse(has_role(self.member.id, self.group.id, GroupRole.MODERATOR))
+
+    def test_membership_map_is_cached(self):
+        get_membership_map(self.owner.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(is_member(self.owner.id, self.group.id))
+            self.assertTrue(has_role(self.owner.id, self.group.id, GroupRole.ADMIN))
+
+    def test_join_and_leave_invalidate_membership(self):
+        self.assertFalse(is_member(self.member.id, self.group.id))
+        _, error = join_group(self.member, self.group.id)
+        self.assertIsNone(error)
+        self.assertTrue(is_member(self.member.id, self.group.id))
+        self.assertEqual(join_group(self.member, self.group.id)[1], "You are already a member.")
+        self.assertEqual([g.id for g in get_user_groups(self.member)], [self.group.id])
+        self.assertEqual(Group.objects.get(id=self.group.id).member_count, 2)
+
+        self.assertEqual(leave_group(self.member, self.group.id), (True, "You left the group."))
+        self.assertFalse(is_member(self.member.id, self.group.id))
+        self.assertEqual(get_user_groups(self.member), [])
+        self.assertEqual(Group.objects.get(id=self.group.id).member_count, 1)
+        self.assertFalse(leave_group(self.owner, self.group.id)[0])
+
+    def test_promote_invalidates_membership(self):
+        join_group(self.member, self.group.id)
+        self.assertFalse(has_role(self.member.id, self.group.id, GroupRole.MODERATOR))
+        self.assertEqual(set_member_roles(self.member, self.group.id, self.owner.id, 0)[1], "You don't have permission.")
+
+        # OWNER không gán được, MEMBER luôn giữ lại
+        ok, _ = set_member_roles(self.owner, self.group.id, self.member.id, GroupRole.MODERATOR | GroupRole.OWNER)
+        self.assertTrue(ok)
+        self.assertEqual(get_roles(self.member.id, self.group.id), GroupRole.MEMBER | GroupRole.MODERATOR)
+        self.assertEqual(
+            set_member_roles(self.owner, self.group.id, self.owner.id, GroupRole.MEMBER)[1],
+            "The owner's roles cannot be changed.",
+        )
+
+    def test_invalidation_during_read_is_not_lost(self):
+        """Membership đổi giữa lúc đọc DB và cache.set: map cũ không được phục vụ tiếp"""
+        original_set = services.cache.set
+        raced = []
+
+        def racing_set(key, *args, **kwargs):
+            if not raced and key.startswith("groups:member:") and "version" not in key:
+                raced.append(key)
+                GroupMembership.objects.create(user_id=self.member.id, group_id=self.group.id)
+                services.invalidate_membership(self.member.id)
+            return original_set(key, *args, **kwargs)
+
+        with mock.patch.object(services.cache, "set", racing_set):
+            self.assertEqual(get_membership_map(self.member.id), {})
+        self.assertTrue(raced)
+        self.assertTrue(is_member(self.member.id, self.group.id))
+
+    def test_group_scoped_posts(self):
+        post, error = create_group_post(self.owner, self.group.id, "Chủ nhật đạp xe")
+        self.assertIsNone(error)
+        self.assertEqual(post.group_id, self.group.id)
+        # Post trong group không fan-out vào timeline
+        self.assertFalse(TimelineEntry.objects.filter(post_id=post.id).exists())
+
+        self.assertIsNone(get_group_post_page(self.outsider, self.group.id))
+        self.assertEqual(
+            create_group_post(self.outsider, self.group.id, "spam")[1],
+            "You don't have permission to post in this group.",
+        )
+
+        join_group(self.member, self.group.id)
+        page = get_group_post_page(self.member, self.group.id)
+        self.assertEqual([p.id for p in page.items], [post.id])
+
+        # Member thường không xoá được post của người khác, moderator thì được
+        self.assertFalse(delete_group_post(self.member, self.group.id, post.id)[0])
+        set_member_roles(self.owner, self.group.id, self.member.id, GroupRole.MODERATOR)
+        self.assertTrue(delete_group_post(self.member, self.group.id, post.id)[0])
+        self.assertEqual(get_group_post_page(self.member, self.group.id).items, [])
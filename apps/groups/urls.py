@@ -0,0 +1,13 @@
+from django.urls import path
+from .views import *
+
+app_name = "groups"
+
+urlpatterns = [
+    path("", group_list_view, name="list"),
+    path("<int:group_id>/", group_detail_view, name="detail"),
+    path("<int:group_id>/join/", join_group_view, name="join"),
+    path("<int:group_id>/leave/", leave_group_view, name="leave"),
+    path("<int:group_id>/post/", group_post_view, name="post"),
+    path("<int:group_id>/post/<int:post_id>/delete/", delete_group_post_view, name="delete_post"),
+]
@@ -1,3 +1,85 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import csrf_exempt
+from django.contrib import messages
+from .models import Group, GroupRole
+from .services import (
+    create_group,
+    create_group_post,
+    delete_group_post,
+    get_group_post_page,
+    get_roles,
+    get_user_groups,
+    join_group,
+    leave_group,
+)
 
-# Create your views here.
+PAGE_SIZE = 20
+
+@login_required
+@csrf_exempt
+def group_list_view(request):
+    if request.method == "POST":
+        group, error = create_group(request.user, request.POST.get("name"), request.POST.get("description"))
+        if error:
+            messages.error(request, error)
+            return redirect("groups:list")
+        return redirect("groups:detail", group_id=group.id)
+
+    my_groups = get_user_groups(request.user)
+    return render(request, "groups/group_list.html", {
+        "my_groups": my_groups,
+        "discover": Group.objects.exclude(id__in=[g.id for g in my_groups]).order_by('-member_count', '-id')[:10],
+    })
+
+@login_required
+def group_detail_view(request, group_id):
+    group = get_object_or_404(Group, id=group_id)
+    roles = get_roles(request.user.id, group.id)
+    page = get_group_post_page(request.user, group.id, request.GET.get("cursor"), PAGE_SIZE)
+
+    return render(request, "groups/group_detail.html", {
+        "group": group,
+        "is_member": bool(roles),
+        "can_post": bool(roles & GroupRole.POSTER),
+        "can_moderate": bool(roles & GroupRole.MODERATOR),
+        "is_owner": bool(roles & GroupRole.OWNER),
+        "posts": page.items if page else [],
+        "next_cursor": page.next_cursor if page else None,
+    })
+
+@login_required
+@csrf_exempt
+def join_group_view(request, group_id):
+    if request.method == "POST":
+        _, error = join_group(request.user, group_id)
+        if error:
+            messages.error(request, error)
+    return redirect("groups:detail", group_id=group_id)
+
+@login_required
+@csrf_exempt
+def leave_group_view(request, group_id):
+    if request.method == "POST":
+        success, msg = leave_group(request.user, group_id)
+        if not success:
+            messages.error(request, msg)
+    return redirect("groups:detail", group_id=group_id)
+
+@login_required
+@csrf_exempt
+def group_post_view(request, group_id):
+    if request.method == "POST":
+        _, error = create_group_post(request.user, group_id, request.POST.get("content"))
+        if error:
+            messages.error(request, error)
+    return redirect("groups:detail", group_id=group_id)
+
+@login_required
+@csrf_exempt
+def delete_group_post_view(request, group_id, post_id):
+    if request.method == "POST":
+        success, msg = delete_group_post(request.user, group_id, post_id)
+        if not success:
+            messages.error(request, msg)
+    return redirect("groups:detail", group_id=group_id)
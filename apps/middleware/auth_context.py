@@ -0,0 +1,101 @@
+# apps/middleware/auth_context.py
+"""
+Auth context dùng chung cho middleware và view.
+
+Access cookie chỉ được decode 1 lần mỗi request, kết quả gắn vào request.
+Thông tin user cơ bản được phục vụ từ LRU cache trong process (UserSnapshot)
+và bị xoá khi User.save() (xem apps/accounts/signals.py).
+"""
+from typing import NamedTuple
+
+import jwt
+from django.conf import settings
+
+from apps.accounts.models import User
+from apps.core.utils import LRUCache
+
+_UNSET = object()
+
+
+class UserSnapshot(NamedTuple):
+    id: int
+    email: str
+    username: str
+    is_banned: bool
+    is_active: bool
+
+    @property
+    def is_authenticated(self):
+        return True
+
+
+SNAPSHOT_FIELDS = UserSnapshot._fields
+
+_snapshots = LRUCache(
+    maxsize=settings.USER_SNAPSHOT_CACHE_SIZE,
+    ttl=settings.USER_SNAPSHOT_TTL,
+)
+
+
+def decode_access_token(token):
+    """Trả về (payload, expired)"""
+    if not token:
+        return None, False
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        return payload, False
+    except jwt.ExpiredSignatureError:
+        return None, True
+    except jwt.InvalidTokenError:
+        return None, False
+
+
+def get_access_payload(request):
+    """Payload của access cookie, decode tối đa 1 lần cho mỗi request"""
+    payload = getattr(request, "_access_payload", _UNSET)
+    if payload is _UNSET:
+        payload, expired = decode_access_token(request.COOKIES.get("access"))
+        request._access_payload = payload
+        request._access_expired = expired
+    return payload
+
+
+def is_access_expired(request):
+    get_access_payload(request)
+    return request._access_expired
+
+
+def get_user_snapshot(user_id):
+    snapshot = _snapshots.get(user_id)
+    if snapshot is None:
+        row = User.objects.filter(id=user_id).values_list(*SNAPSHOT_FIELDS).first()
+        if row is None:
+            return None
+        snapshot = UserSnapshot(*row)
+        _snapshots.set(user_id, snapshot)
+    return snapshot
+
+
+async def aget_user_snapshot(user_id):
+    snapshot = _snapshots.get(user_id)
+    if snapshot is None:
+        row = await User.objects.filter(id=user_id).values_list(*SNAPSHOT_FIELDS).afirst()
+        if row is None:
+            return None
+        snapshot = UserSnapshot(*row)
+        _snapshots.set(user_id, snapshot)
+    return snapshot
+
+
+def invalidate_user_snapshot(user_id):
+    _snapshots.delete(user_id)
+
+
+def get_request_user(request):
+    """UserSnapshot của request hiện tại, None nếu chưa đăng nhập"""
+    snapshot = getattr(request, "_user_snapshot", _UNSET)
+    if snapshot is _UNSET:
+        payload = get_access_payload(request)
+        snapshot = get_user_snapshot(payload.get("user_id")) if payload else None
+        request._user_snapshot = snapshot
+    return snapshot
@@ -1,11 +1,18 @@
 # apps/accounts/middleware.py
-import jwt
 from django.conf import settings
 from django.shortcuts import redirect
 from django.utils.deprecation import MiddlewareMixin
 from django.utils import timezone
-from apps.accounts.models import RefreshToken, User
-from apps.middleware.utils import generate_access_token
+from django.utils.functional import SimpleLazyObject
+from apps.accounts.models import RefreshToken, User, hash_token
+from apps.accounts.revocation import (
+    ais_refresh_token_revoked, ais_user_banned, is_refresh_token_revoked, is_user_banned,
+)
+from apps.middleware.auth_context import (
+    aget_user_snapshot, decode_access_token, get_access_payload, get_user_snapshot,
+    is_access_expired,
+)
+from apps.middleware.utils import decode_refresh_token, generate_access_token
 
 
 PUBLIC_PATHS = [
@@ -19,8 +26,120 @@ PUBLIC_PATHS = [
     "/admin"
 ]
 
+# Khách (không có cookie nào) vẫn vào được, có cookie thì xác thực như thường
+OPTIONAL_AUTH_PATHS = ["/"]
+
+def verify_refresh_token(user_id, refresh):
+    """Refresh cookie còn hiệu lực cho user_id (dùng chung cho HTTP và WebSocket)"""
+    if settings.JWT_STATELESS_AUTH:
+        return _verify_refresh_stateless(user_id, refresh)
+
+    try:
+        snapshot = get_user_snapshot(user_id)
+        if snapshot is None:
+            return False
+
+        # Check refresh còn tồn tại DB
+        return RefreshToken.objects.filter(
+            user_id=snapshot.id,
+            token_hash=hash_token(refresh),
+            is_revoked=False,
+            expires_at__gt=timezone.now()
+        ).exists()
+    except Exception:
+        return False
+
+
+def _verify_refresh_stateless(user_id, refresh):
+    # Fast path: revoke/ban đọc qua cache, chỉ query DB khi cache chưa có kết quả
+    refresh_payload = decode_refresh_token(refresh)
+    if not refresh_payload or refresh_payload.get("user_id") != user_id:
+        return False
+    return not (is_user_banned(user_id) or is_refresh_token_revoked(refresh))
+
+
+async def _averify_refresh_stateless(user_id, refresh):
+    refresh_payload = decode_refresh_token(refresh)
+    if not refresh_payload or refresh_payload.get("user_id") != user_id:
+        return False
+    return not (await ais_user_banned(user_id) or await ais_refresh_token_revoked(refresh))
+
+
+async def averify_refresh_token(user_id, refresh):
+    """Bản async của verify_refresh_token (async ORM)"""
+    if settings.JWT_STATELESS_AUTH:
+        return await _averify_refresh_stateless(user_id, refresh)
+
+    try:
+        snapshot = await aget_user_snapshot(user_id)
+        if snapshot is None:
+            return False
+
+        return await RefreshToken.objects.filter(
+            user_id=snapshot.id,
+            token_hash=hash_token(refresh),
+            is_revoked=False,
+            expires_at__gt=timezone.now()
+        ).aexists()
+    except Exception:
+        return False
+
+
+def authenticate_cookies(cookies):
+    """
+    user_id từ cặp cookie access/refresh, None nếu không hợp lệ.
+    Không tự refresh access hết hạn: client cần gọi 1 request HTTP để lấy access mới.
+    """
+    access = cookies.get("access")
+    refresh = cookies.get("refresh")
+    if not access or not refresh:
+        return None
+
+    payload, _ = decode_access_token(access)
+    if payload is None:
+        return None
+
+    user_id = payload.get("user_id")
+    if not verify_refresh_token(user_id, refresh):
+        return None
+    return user_id
+
+
+class LazyUser(SimpleLazyObject):
+    """
+    User chỉ được load khi view cần tới field khác ngoài id:
+    login_required và các service chỉ dùng user.id không tốn query.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id):
+        self.__dict__["_user_id"] = user_id
+        super().__init__(lambda: User.objects.get(id=user_id))
+
+    @property
+    def id(self):
+        return self.__dict__["_user_id"]
+
+    pk = id
+
+
+async def _auser(user):
+    return user
+
+
 class JWTAuthMiddleware(MiddlewareMixin):
-    def process_request(self, request):
+    """
+    Chạy được cả sync (WSGI) lẫn async (ASGI). Ở chế độ async, xác thực dùng
+    async ORM trực tiếp thay vì để MiddlewareMixin bọc process_request trong
+    sync_to_async, nên 1 worker ASGI xử lý chồng được nhiều request chờ I/O.
+    """
+
+    def _route(self, request):
+        """
+        Bước cần làm với request: None (route public), "login", "refresh" hoặc
+        "access" (có đủ access + refresh)
+        """
         # Bỏ qua route public
         if any(request.path.startswith(p) for p in PUBLIC_PATHS):
             return None
@@ -30,84 +149,133 @@ class JWTAuthMiddleware(MiddlewareMixin):
 
         # ❌ Không có token nào
         if not access and not refresh:
-            return redirect("/accounts/login/")
+            return None if request.path in OPTIONAL_AUTH_PATHS else "login"
 
         # 🟡 Có refresh nhưng không có access
         if refresh and not access:
-            return self._refresh_access_token(request, refresh)
+            return "refresh"
 
         # 🔴 Có access nhưng không có refresh → nghi leak
         if access and not refresh:
-            return redirect("/accounts/login/")
+            return "login"
 
         # ✅ Có đủ cả hai
-        return self._authenticate_access(request, access, refresh)
+        return "access"
+
+    def process_request(self, request):
+        step = self._route(request)
+        if step is None:
+            return None
+        if step == "login":
+            return redirect("/accounts/login/")
+
+        refresh = request.COOKIES["refresh"]
+        if step == "refresh":
+            return self._refresh_access_token(request, refresh)
+        return self._authenticate_access(request, refresh)
+
+    async def __acall__(self, request):
+        response = await self.aprocess_request(request)
+        return response or await self.get_response(request)
+
+    async def aprocess_request(self, request):
+        step = self._route(request)
+        if step is None:
+            return None
+        if step == "login":
+            return redirect("/accounts/login/")
+
+        refresh = request.COOKIES["refresh"]
+        if step == "refresh":
+            return await self._arefresh_access_token(request, refresh)
+        return await self._aauthenticate_access(request, refresh)
 
     # ------------------------------------------------
 
-    def _authenticate_access(self, request, access, refresh):
-        try:
-            payload = jwt.decode(
-                access,
-                settings.SECRET_KEY,
-                algorithms=["HS256"]
-            )
-            user_id = payload.get("user_id")
+    def _authenticate_access(self, request, refresh):
+        # Access cookie được decode 1 lần qua auth context, view dùng lại payload
+        payload = get_access_payload(request)
+        if payload is None:
+            if is_access_expired(request):
+                return self._refresh_access_token(request, refresh)
+            return redirect("/accounts/login/")
 
-            user = User.objects.get(id=user_id)
+        user_id = payload.get("user_id")
+        if not verify_refresh_token(user_id, refresh):
+            return redirect("/accounts/login/")
 
-            # Check refresh còn tồn tại DB
-            if not RefreshToken.objects.filter(
-                user=user,
-                token=refresh,
-                is_revoked=False,
-                expires_at__gt=timezone.now()
-            ).exists():
-                return redirect("/accounts/login/")
+        self._set_user(request, self._lazy_user(user_id))
+        return None
 
-            request.user = user
-            # request.is_authenticated = True
-            return None
+    async def _aauthenticate_access(self, request, refresh):
+        payload = get_access_payload(request)
+        if payload is None:
+            if is_access_expired(request):
+                return await self._arefresh_access_token(request, refresh)
+            return redirect("/accounts/login/")
 
-        except jwt.ExpiredSignatureError:
-            return self._refresh_access_token(request, refresh)
-        except Exception:
+        user_id = payload.get("user_id")
+        if not await averify_refresh_token(user_id, refresh):
             return redirect("/accounts/login/")
 
+        self._set_user(request, self._lazy_user(user_id))
+        return None
+
+    def _lazy_user(self, user_id):
+        # Chỉ load User khi view thực sự cần đến
+        return LazyUser(user_id)
+
+    def _set_user(self, request, user):
+        # login_required của view async đọc request.auser() chứ không đọc request.user
+        request.user = user
+        request.auser = lambda: _auser(user)
+
     # ------------------------------------------------
 
     def _refresh_access_token(self, request, refresh):
         try:
-            rt = RefreshToken.objects.get(
-                token=refresh,
+            rt = RefreshToken.objects.select_related("user").get(
+                token_hash=hash_token(refresh),
                 is_revoked=False,
                 expires_at__gt=timezone.now()
             )
+            return self._refreshed_response(request, rt.user)
 
-            user = rt.user
-            new_access = generate_access_token(user)
-
-            request.user = user
-            # request.is_authenticated = True
+        except RefreshToken.DoesNotExist:
+            return redirect("/accounts/login/")
+        except Exception:
+            return redirect("/accounts/login/")
 
-            response = redirect(request.path)
-            response.set_cookie(
-                "access",
-                new_access,
-                httponly=True,
-                max_age=5 * 60,
-                samesite="Lax"
-            )
-            response.set_cookie(
-                "email",
-                user.email,
-                max_age=7 * 24 * 60 * 60,
-                samesite="Lax"
+    async def _arefresh_access_token(self, request, refresh):
+        try:
+            rt = await RefreshToken.objects.select_related("user").aget(
+                token_hash=hash_token(refresh),
+                is_revoked=False,
+                expires_at__gt=timezone.now()
             )
-            request.user = user
-            return response
+            return self._refreshed_response(request, rt.user)
 
         except RefreshToken.DoesNotExist:
             return redirect("/accounts/login/")
         except Exception:
-            return redirect("/accounts/login/")
\ No newline at end of file
+            return redirect("/accounts/login/")
+
+    def _refreshed_response(self, request, user):
+        new_access = generate_access_token(user)
+        self._set_user(request, user)
+
+        response = redirect(request.path)
+        response.set_cookie(
+            "access",
+            new_access,
+            httponly=True,
+            max_age=5 * 60,
+            samesite="Lax"
+        )
+        response.set_cookie(
+            "email",
+            user.email,
+            max_age=7 * 24 * 60 * 60,
+            samesite="Lax"
+        )
+        return response
@@ -0,0 +1,264 @@
+# apps/middleware/perf.py
+"""
+Đo hiệu năng theo request: wall time, số query + thời gian DB, thời gian render
+template và cache hit/miss. Kết quả trả về qua header Server-Timing và được
+gộp thành histogram theo view, xem tại /internal/stats/ (chỉ staff).
+
+Chỉ dùng extension point công khai của Django, không monkeypatch:
+- DB: connection.execute_wrapper() trên các connection của thread chạy query;
+- template: backend InstrumentedDjangoTemplates (TEMPLATES["BACKEND"]);
+- cache: backend có CacheMetricsMixin (CACHES["BACKEND"]), vd. InstrumentedLocMemCache.
+Ngoài request đang được đo, backend template / cache chỉ tốn 1 lần đọc ContextVar.
+
+Khi PERF_INSTRUMENTATION tắt, middleware raise MiddlewareNotUsed lúc khởi động
+nên Django bỏ hẳn nó khỏi chain: không tốn gì cho mỗi request. Middleware hỗ trợ
+cả sync lẫn async để không ép các view async dưới ASGI chạy qua 1 thread.
+"""
+import bisect
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template as DjangoTemplate
+
+# Biên trên của các bucket (ms), bucket cuối là +inf
+BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current = ContextVar("perf_metrics", default=None)
+# Đang ở trong 1 lần render / get_many đã được đo: lời gọi lồng bên trong không tính lại
+_in_template = ContextVar("perf_in_template", default=False)
+_in_cache = ContextVar("perf_in_cache", default=False)
+_MISSING = object()
+
+
+class RequestMetrics:
+    """Số đo của 1 request; view async cập nhật từ cả event loop lẫn thread của sync_to_async"""
+
+    __slots__ = ("db_queries", "db_time", "template_time", "cache_hits", "cache_misses", "_lock")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.Lock()
+
+    def add(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def time_query(self, execute, sql, params, many, context):
+        """Dùng cho connection.execute_wrapper()"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add(db_queries=1, db_time=time.perf_counter() - start)
+
+
+class ViewStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def add(self, wall_ms, metrics):
+        self.count += 1
+        self.total_ms += wall_ms
+        self.max_ms = max(self.max_ms, wall_ms)
+        self.db_queries += metrics.db_queries
+        self.db_ms += metrics.db_time * 1000
+        self.template_ms += metrics.template_time * 1000
+        self.cache_hits += metrics.cache_hits
+        self.cache_misses += metrics.cache_misses
+        self.histogram[bisect.bisect_left(BUCKETS, wall_ms)] += 1
+
+    def percentile(self, q):
+        """Ước lượng percentile bằng biên trên của bucket chứa nó"""
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.histogram):
+            seen += n
+            if seen >= rank and n:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max_ms
+        return 0
+
+    def as_dict(self):
+        count = self.count or 1
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / count, 3),
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "avg_db_queries": round(self.db_queries / count, 2),
+            "avg_db_ms": round(self.db_ms / count, 3),
+            "avg_template_ms": round(self.template_ms / count, 3),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "histogram": dict(zip([f"le_{b}" for b in BUCKETS] + ["le_inf"], self.histogram)),
+        }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def record(view_name, wall_ms, metrics):
+    with _stats_lock:
+        stats = _stats.get(view_name)
+        if stats is None:
+            stats = _stats[view_name] = ViewStats()
+        stats.add(wall_ms, metrics)
+
+
+def get_stats():
+    with _stats_lock:
+        return {name: stats.as_dict() for name, stats in sorted(_stats.items())}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# ------------------------------------------------
+# Backend template / cache có đo, và execute_wrapper cho DB
+
+class InstrumentedTemplate(DjangoTemplate):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        # render_to_string lồng trong template khác (vd. trong template tag) đã được tính
+        if metrics is None or _in_template.get():
+            return super().render(context, request)
+        token = _in_template.set(True)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            _in_template.reset(token)
+            metrics.add(template_time=time.perf_counter() - start)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates đo thời gian render của template gốc ({% include %} tính vào template cha)"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return InstrumentedTemplate(super().get_template(template_name).template, self)
+
+
+class CacheMetricsMixin:
+    """Đếm hit / miss của get / get_many, dùng kèm 1 cache backend (xem InstrumentedLocMemCache)"""
+
+    def get(self, key, default=None, version=None):
+        metrics = _current.get()
+        if metrics is None or _in_cache.get():
+            return super().get(key, default, version)
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            metrics.add(cache_misses=1)
+            return default
+        metrics.add(cache_hits=1)
+        return value
+
+    def get_many(self, keys, version=None):
+        metrics = _current.get()
+        if metrics is None or _in_cache.get():
+            return super().get_many(keys, version)
+        keys = list(keys)
+        # BaseCache.get_many gọi lại self.get, không đếm 2 lần
+        token = _in_cache.set(True)
+        try:
+            found = super().get_many(keys, version)
+        finally:
+            _in_cache.reset(token)
+        metrics.add(cache_hits=len(found), cache_misses=len(keys) - len(found))
+        return found
+
+
+class InstrumentedLocMemCache(CacheMetricsMixin, LocMemCache):
+    pass
+
+
+def _time_queries(metrics):
+    """
+    Gắn metrics.time_query vào mọi connection của thread hiện tại (connection là
+    riêng từng thread), trả về ExitStack để gỡ ra khi xong request.
+    """
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(metrics.time_query))
+    return stack
+
+
+# ------------------------------------------------
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with _time_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        # Query của view async (async ORM, sync_to_async) chạy trong thread sync của
+        # request (thread_sensitive): gắn execute_wrapper vào connection của thread đó
+        queries = await sync_to_async(_time_queries)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(queries.close)()
+            _current.reset(token)
+        return self._finish(request, response, metrics, start)
+
+    def _finish(self, request, response, metrics, start):
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        record(match.view_name if match else "<unresolved>", wall_ms, metrics)
+
+        response["Server-Timing"] = ", ".join([
+            f"total;dur={wall_ms:.2f}",
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.db_queries} queries"',
+            f"tpl;dur={metrics.template_time * 1000:.2f}",
+            f'cache;desc="hit={metrics.cache_hits} miss={metrics.cache_misses}"',
+        ])
+        return response
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from apps.accounts.models import User
+from apps.accounts.services import _jwt_pair
+
+from . import auth_context
+from .auth_context import get_access_payload, get_request_user, get_user_snapshot, is_access_expired
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class AuthContextTests(TestCase):
+    def setUp(self):
+        auth_context._snapshots.clear()
+        self.user = User.objects.create_user(email="mai@example.com", username="mai", password="x", is_active=True)
+        self.access, _ = _jwt_pair(self.user)
+
+    def request(self, access=None):
+        request = RequestFactory().get("/")
+        if access:
+            request.COOKIES["access"] = access
+        return request
+
+    def test_access_cookie_is_decoded_once_per_request(self):
+        request = self.request(self.access)
+        with mock.patch.object(auth_context, "decode_access_token", wraps=auth_context.decode_access_token) as decode:
+            self.assertEqual(get_access_payload(request)["user_id"], self.user.id)
+            self.assertEqual(get_access_payload(request)["user_id"], self.user.id)
+            self.assertFalse(is_access_expired(request))
+            get_request_user(request)
+        self.assertEqual(decode.call_count, 1)
+
+    def test_invalid_cookie_gives_no_user(self):
+        request = self.request("not-a-token")
+        self.assertIsNone(get_access_payload(request))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_request_user(request))
+
+    def test_snapshot_is_served_from_lru(self):
+        with self.assertNumQueries(1):
+            snapshot = get_user_snapshot(self.user.id)
+        self.assertEqual((snapshot.id, snapshot.username, snapshot.is_banned), (self.user.id, "mai", False))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_snapshot(self.user.id), snapshot)
+            self.assertEqual(get_request_user(self.request(self.access)), snapshot)
+
+    def test_user_save_invalidates_snapshot(self):
+        get_user_snapshot(self.user.id)
+        self.user.username = "mai2"
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_snapshot(self.user.id).username, "mai2")
+
+        user_id = self.user.id
+        self.user.delete()
+        self.assertIsNone(get_user_snapshot(user_id))
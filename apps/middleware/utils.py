@@ -12,6 +12,13 @@ def decode_access_token(token):
         return None
 
 
+def decode_refresh_token(token):
+    payload = decode_access_token(token)
+    if not payload or payload.get("type") != "refresh":
+        return None
+    return payload
+
+
 def generate_access_token(user):
     payload = {
         "user_id": user.id,
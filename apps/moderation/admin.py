@@ -1,3 +1,13 @@
 from django.contrib import admin
+from .models import BlocklistRule, ModerationTask
 
-# Register your models here.
+@admin.register(BlocklistRule)
+class BlocklistRuleAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'pattern', 'action', 'is_active', 'created_at')
+    list_filter = ('kind', 'action', 'is_active')
+    search_fields = ('pattern',)
+
+@admin.register(ModerationTask)
+class ModerationTaskAdmin(admin.ModelAdmin):
+    list_display = ('content_kind', 'object_id', 'status', 'decision', 'attempts', 'created_at', 'processed_at')
+    list_filter = ('content_kind', 'status', 'decision')
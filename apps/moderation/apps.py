@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ModerationConfig(AppConfig):
     name = "apps.moderation"
+
+    def ready(self):
+        from . import signals  # noqa: F401
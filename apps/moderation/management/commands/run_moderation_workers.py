@@ -0,0 +1,35 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.moderation.services import process_batch
+
+
+class Command(BaseCommand):
+    help = "Quét nội dung mới theo blocklist (keyword/regex/image hash) bằng 1 pool thread"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Số thread quét song song")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--max-attempts", type=int, default=3)
+        parser.add_argument("--loop", action="store_true", help="Chạy liên tục như 1 worker thay vì quét hết rồi thoát")
+        parser.add_argument("--interval", type=float, default=2.0, help="Số giây nghỉ khi hàng đợi rỗng")
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                try:
+                    done, failed = process_batch(executor, options["batch_size"], options["max_attempts"])
+                except Exception as e:
+                    # Lỗi DB / rule: task đã nhận được quét lại khi hết lease, worker chạy tiếp
+                    print("[ERROR] Lỗi xử lý batch moderation:", e)
+                    done = failed = 0
+                if done or failed:
+                    self.stdout.write(f"done={done} failed={failed}")
+
+                # Batch đầy nghĩa là còn task đến hạn: quét tiếp ngay
+                if done + failed < options["batch_size"]:
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["interval"])
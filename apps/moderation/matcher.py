@@ -0,0 +1,120 @@
+"""
+Matcher cho blocklist.
+
+- AhoCorasick: mọi keyword được build thành 1 automaton, quét text 1 lượt
+  O(len(text) + số match) bất kể có bao nhiêu keyword.
+- RuleSet gom keyword (Aho-Corasick), regex (compile riêng từng rule) và
+  image hash (so khoảng cách Hamming) thành 1 object compile sẵn cho worker.
+  Regex không gộp thành 1 alternation: alternation chỉ báo 1 nhánh cho mỗi vị trí
+  nên rule chồng nhau ("bad" / "bad word") sẽ bị mất.
+"""
+import re
+from collections import deque
+
+from PIL import Image
+
+
+class AhoCorasick:
+    def __init__(self, patterns):
+        """patterns: iterable (keyword, value); trả về value khi keyword xuất hiện"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for keyword, value in patterns:
+            keyword = keyword.casefold()
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(value)
+
+        # BFS để tính fail link (state độ sâu 1 fail về root);
+        # output của fail state được gộp sẵn vào state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self):
+        return len(self._goto) - 1
+
+    def search(self, text):
+        """Tập value của mọi keyword xuất hiện trong text (không phân biệt hoa thường)"""
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for char in text.casefold():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+def average_hash(image_file, size=8):
+    """aHash 64 bit: ảnh thu nhỏ 8x8 grayscale, bit = pixel sáng hơn trung bình"""
+    with Image.open(image_file) as image:
+        pixels = list(image.convert("L").resize((size, size), Image.Resampling.LANCZOS).getdata())
+    mean = sum(pixels) / len(pixels)
+    value = 0
+    for pixel in pixels:
+        value = (value << 1) | (pixel > mean)
+    return value
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class RuleSet:
+    def __init__(self, rules, max_distance=5):
+        """rules: iterable (rule_id, kind, pattern, action); rule không compile được bị bỏ qua"""
+        keywords = []
+        self.regexes = []
+        self.image_hashes = []
+        self.actions = {}
+        for rule_id, kind, pattern, action in rules:
+            if kind == "keyword":
+                keywords.append((pattern, rule_id))
+            elif kind == "regex":
+                try:
+                    self.regexes.append((re.compile(pattern, re.IGNORECASE), rule_id))
+                except re.error as e:
+                    print(f"[ERROR] Regex rule {rule_id} không hợp lệ: {e}")
+                    continue
+            elif kind == "image_hash":
+                try:
+                    self.image_hashes.append((int(pattern, 16), rule_id))
+                except ValueError:
+                    print(f"[ERROR] Image hash rule {rule_id} không hợp lệ: {pattern!r}")
+                    continue
+            self.actions[rule_id] = action
+
+        self.keywords = AhoCorasick(keywords)
+        self.max_distance = max_distance
+
+    def match_text(self, text):
+        if not text:
+            return set()
+        matched = self.keywords.search(text)
+        matched.update(rule_id for regex, rule_id in self.regexes if regex.search(text))
+        return matched
+
+    def match_image_hash(self, value):
+        return {rule_id for rule_hash, rule_id in self.image_hashes if hamming(value, rule_hash) <= self.max_distance}
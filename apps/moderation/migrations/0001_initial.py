@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlocklistRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('keyword', 'Keyword'), ('regex', 'Regex'), ('image_hash', 'Image hash')], max_length=20)),
+                ('pattern', models.CharField(max_length=500)),
+                ('action', models.CharField(choices=[('flag', 'Flag for review'), ('block', 'Hide content')], default='flag', max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ModerationTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_kind', models.CharField(choices=[('post', 'Post'), ('profile', 'User profile')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('decision', models.CharField(blank=True, choices=[('approved', 'Approved'), ('flagged', 'Flagged'), ('blocked', 'Blocked')], max_length=10)),
+                ('matched_rules', models.JSONField(default=list)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='moderation_due_idx'), models.Index(fields=['content_kind', 'object_id'], name='moderation_object_idx')],
+            },
+        ),
+    ]
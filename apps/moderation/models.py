@@ -1,3 +1,67 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class BlocklistRule(models.Model):
+    KIND_CHOICES = (
+        ('keyword', 'Keyword'),
+        ('regex', 'Regex'),
+        # pattern là aHash 64 bit dạng hex (xem matcher.average_hash)
+        ('image_hash', 'Image hash'),
+    )
+    ACTION_CHOICES = (
+        ('flag', 'Flag for review'),
+        ('block', 'Hide content'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    pattern = models.CharField(max_length=500)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default='flag')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Cùng với số rule tạo thành version của rule set (xem services.get_ruleset)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind}: {self.pattern} ({self.action})"
+
+
+class ModerationTask(models.Model):
+    """
+    Hàng đợi quét nội dung: tạo khi có nội dung mới, worker `run_moderation_workers`
+    nhận theo batch (lease qua next_attempt_at như outbox email) và ghi kết quả.
+    """
+    CONTENT_CHOICES = (
+        ('post', 'Post'),
+        ('profile', 'User profile'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    DECISION_CHOICES = (
+        ('approved', 'Approved'),
+        ('flagged', 'Flagged'),
+        ('blocked', 'Blocked'),
+    )
+
+    content_kind = models.CharField(max_length=20, choices=CONTENT_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    decision = models.CharField(max_length=10, choices=DECISION_CHOICES, blank=True)
+    matched_rules = models.JSONField(default=list)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='moderation_due_idx'),
+            models.Index(fields=['content_kind', 'object_id'], name='moderation_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_kind}#{self.object_id} ({self.status} {self.decision})"
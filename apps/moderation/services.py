@@ -0,0 +1,179 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from apps.accounts.models import UserProfile
+from apps.posts.models import Post, TimelineEntry
+from .matcher import RuleSet, average_hash
+from .models import BlocklistRule, ModerationTask
+
+# Thời gian 1 worker "giữ" task trước khi worker khác được nhận lại
+SCAN_LEASE = timedelta(minutes=5)
+
+
+def enqueue(content_kind, object_id):
+    return ModerationTask.objects.create(content_kind=content_kind, object_id=object_id)
+
+
+# ---------------------------------------------------------------------------
+# Rule set compile sẵn, mỗi worker giữ 1 bản và build lại khi version đổi.
+# Version đọc từ DB (updated_at mới nhất + số rule) nên mọi process đều thấy
+# rule vừa sửa / xoá; 1 query aggregate rẻ hơn nhiều so với compile lại.
+# ---------------------------------------------------------------------------
+
+def _rules_version():
+    stats = BlocklistRule.objects.aggregate(updated_at=Max('updated_at'), count=Count('id'))
+    return stats['updated_at'], stats['count']
+
+
+_ruleset = None
+_ruleset_version = None
+
+
+def get_ruleset():
+    global _ruleset, _ruleset_version
+    version = _rules_version()
+    if _ruleset is None or version != _ruleset_version:
+        _ruleset = RuleSet(
+            BlocklistRule.objects.filter(is_active=True).values_list('id', 'kind', 'pattern', 'action'),
+            max_distance=settings.MODERATION_IMAGE_HASH_DISTANCE,
+        )
+        _ruleset_version = version
+    return _ruleset
+
+
+# ---------------------------------------------------------------------------
+# Loại nội dung: load (text, ảnh) theo batch và hành động khi bị block
+# ---------------------------------------------------------------------------
+
+def _load_posts(ids):
+    return {
+        post_id: ([content], [])
+        for post_id, content in Post.objects.filter(id__in=ids).values_list('id', 'content')
+    }
+
+
+def _hide_posts(ids):
+    Post.objects.filter(id__in=ids).update(is_hidden=True)
+    TimelineEntry.objects.filter(post_id__in=ids).delete()
+
+
+def _load_profiles(ids):
+    return {
+        profile.id: (
+            [profile.full_name, profile.bio],
+            [image for image in (profile.avatar, profile.cover_image) if image],
+        )
+        for profile in UserProfile.objects.filter(id__in=ids)
+    }
+
+
+# kind -> (load, block); block=None nghĩa là chỉ ghi decision để admin xử lý
+CONTENT_TYPES = {
+    'post': (_load_posts, _hide_posts),
+    'profile': (_load_profiles, None),
+}
+
+
+def scan(ruleset, texts, images):
+    """Rule id khớp với nội dung; chạy trong thread của worker pool, không đụng ORM"""
+    matched = set()
+    for text in texts:
+        matched |= ruleset.match_text(text)
+    if ruleset.image_hashes:
+        for image in images:
+            with image.storage.open(image.name, 'rb') as f:
+                matched |= ruleset.match_image_hash(average_hash(f))
+    return matched
+
+
+def decide(ruleset, matched):
+    if not matched:
+        return 'approved'
+    if any(ruleset.actions.get(rule_id) == 'block' for rule_id in matched):
+        return 'blocked'
+    return 'flagged'
+
+
+# ---------------------------------------------------------------------------
+
+def _claim_batch(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            ModerationTask.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for task in batch:
+            task.attempts += 1
+            task.next_attempt_at = now + SCAN_LEASE
+        ModerationTask.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+
+def _mark_failure(task, error, max_attempts):
+    task.last_error = str(error)
+    if task.attempts >= max_attempts:
+        task.status = 'failed'
+    else:
+        task.next_attempt_at = timezone.now() + timedelta(minutes=2 ** (task.attempts - 1))
+
+
+def process_batch(executor, batch_size=100, max_attempts=3):
+    """
+    Quét 1 batch task bằng thread pool `executor`, ghi kết quả bằng bulk_update.
+    Trả về (done, failed) của batch.
+    """
+    # Load rule trước khi nhận task: lỗi ở đây không để lại task đang bị giữ lease
+    ruleset = get_ruleset()
+    batch = _claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    # Load nội dung: 1 query cho mỗi loại
+    contents = {}
+    for kind, (load, _) in CONTENT_TYPES.items():
+        ids = [task.object_id for task in batch if task.content_kind == kind]
+        if ids:
+            contents[kind] = load(ids)
+
+    futures = {}
+    for task in batch:
+        content = contents.get(task.content_kind, {}).get(task.object_id)
+        if content is not None:
+            futures[task.id] = executor.submit(scan, ruleset, *content)
+
+    done = failed = 0
+    blocked = {kind: [] for kind in CONTENT_TYPES}
+    now = timezone.now()
+    for task in batch:
+        future = futures.get(task.id)
+        try:
+            # Nội dung đã bị xoá: không còn gì để quét
+            matched = future.result() if future else set()
+        except Exception as e:
+            _mark_failure(task, e, max_attempts)
+            failed += 1
+            continue
+        task.status = 'done'
+        task.decision = decide(ruleset, matched)
+        task.matched_rules = sorted(matched)
+        task.processed_at = now
+        task.last_error = ''
+        if task.decision == 'blocked' and future:
+            blocked[task.content_kind].append(task.object_id)
+        done += 1
+
+    with transaction.atomic():
+        ModerationTask.objects.bulk_update(
+            batch, ['status', 'decision', 'matched_rules', 'processed_at', 'last_error', 'next_attempt_at']
+        )
+        for kind, ids in blocked.items():
+            block = CONTENT_TYPES[kind][1]
+            if ids and block is not None:
+                block(ids)
+    return done, failed
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from apps.accounts.models import UserProfile
+from apps.posts.models import Post
+from .services import enqueue
+
+# Field của profile được quét (xem services._load_profiles)
+MODERATED_PROFILE_FIELDS = ('full_name', 'bio', 'avatar', 'cover_image')
+
+
+def _moderated_values(profile):
+    # Đọc thẳng __dict__: field bị defer không kéo thêm query, ảnh so theo tên file
+    values = []
+    for field in MODERATED_PROFILE_FIELDS:
+        value = profile.__dict__.get(field)
+        values.append(getattr(value, 'name', value) or "")
+    return tuple(values)
+
+
+@receiver(post_save, sender=Post)
+def enqueue_post(sender, instance, created, **kwargs):
+    if created:
+        enqueue('post', instance.id)
+
+
+@receiver(post_init, sender=UserProfile)
+def remember_moderated_values(sender, instance, **kwargs):
+    instance._moderated_values = _moderated_values(instance)
+
+
+@receiver(post_save, sender=UserProfile)
+def enqueue_profile(sender, instance, created, update_fields=None, **kwargs):
+    """Chỉ quét lại khi tên / bio / ảnh đổi, không quét mỗi lần lưu profile"""
+    if update_fields is not None and not set(MODERATED_PROFILE_FIELDS) & set(update_fields):
+        return
+    values = _moderated_values(instance)
+    previous = ("",) * len(values) if created else instance._moderated_values
+    instance._moderated_values = values
+    if values != previous:
+        enqueue('profile', instance.id)
@@ -1,3 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from django.test import TestCase
 
-# Create your tests here.
+from apps.accounts.models import User, UserProfile
+from apps.posts.models import Post
+from .matcher import AhoCorasick, RuleSet
+from .models import BlocklistRule, ModerationTask
+from .services import decide, get_ruleset, process_batch
+
+
+class AhoCorasickTests(TestCase):
+    def test_finds_overlapping_keywords_case_insensitive(self):
+        automaton = AhoCorasick([("he", 1), ("she", 2), ("hers", 3), ("xyz", 4)])
+        self.assertEqual(automaton.search("uSHERS"), {1, 2, 3})
+        self.assertEqual(automaton.search(""), set())
+
+
+class RuleSetTests(TestCase):
+    def test_overlapping_regex_rules_all_match(self):
+        ruleset = RuleSet([(1, "regex", r"bad", "flag"), (2, "regex", r"bad\s+word", "block")])
+        matched = ruleset.match_text("a BAD word")
+        self.assertEqual(matched, {1, 2})
+        self.assertEqual(decide(ruleset, matched), "blocked")
+
+    def test_inline_flags_and_invalid_rules(self):
+        ruleset = RuleSet([
+            (1, "regex", r"(?i)foo", "flag"),
+            (2, "regex", r"([unclosed", "block"),
+            (3, "image_hash", "not-hex", "block"),
+            (4, "keyword", "spam", "flag"),
+        ])
+        self.assertEqual(ruleset.match_text("Foo and SPAM"), {1, 4})
+        self.assertNotIn(2, ruleset.actions)
+        self.assertEqual(ruleset.image_hashes, [])
+
+    def test_decide(self):
+        ruleset = RuleSet([(1, "keyword", "meh", "flag")])
+        self.assertEqual(decide(ruleset, set()), "approved")
+        self.assertEqual(decide(ruleset, {1}), "flagged")
+
+
+class ProcessBatchTests(TestCase):
+    def test_blocks_post_matching_overlapping_rules(self):
+        BlocklistRule.objects.create(kind="regex", pattern=r"bad", action="flag")
+        BlocklistRule.objects.create(kind="regex", pattern=r"(?i)bad word", action="block")
+        author = User.objects.create_user(email="mod@example.com", username="mod", password="x")
+        clean = Post.objects.create(author=author, content="hello")
+        bad = Post.objects.create(author=author, content="a bad word")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(process_batch(executor), (2, 0))
+
+        task = ModerationTask.objects.get(content_kind="post", object_id=bad.id)
+        self.assertEqual(task.decision, "blocked")
+        self.assertEqual(len(task.matched_rules), 2)
+        self.assertEqual(ModerationTask.objects.get(content_kind="post", object_id=clean.id).decision, "approved")
+        self.assertTrue(Post.objects.get(id=bad.id).is_hidden)
+
+
+class RuleReloadTests(TestCase):
+    def test_ruleset_follows_rule_edits(self):
+        rule = BlocklistRule.objects.create(kind="keyword", pattern="spam", action="flag")
+        self.assertEqual(get_ruleset().match_text("spam"), {rule.id})
+        self.assertIs(get_ruleset(), get_ruleset())
+
+        rule.pattern = "scam"
+        rule.save()
+        self.assertEqual(get_ruleset().match_text("spam scam"), {rule.id})
+        self.assertEqual(get_ruleset().match_text("spam"), set())
+
+        other = BlocklistRule.objects.create(kind="keyword", pattern="junk", action="block")
+        self.assertEqual(get_ruleset().match_text("junk scam"), {rule.id, other.id})
+        rule.delete()
+        self.assertEqual(get_ruleset().match_text("junk scam"), {other.id})
+
+
+class ProfileEnqueueTests(TestCase):
+    def tasks(self):
+        return ModerationTask.objects.filter(content_kind="profile", object_id=self.profile.id).count()
+
+    def test_only_moderated_changes_are_enqueued(self):
+        user = User.objects.create_user(email="bio@example.com", username="bio", password="x")
+        self.profile = UserProfile.objects.create(user=user, bio="hello")
+        self.assertEqual(self.tasks(), 1)
+
+        self.profile.save()
+        self.profile.image_variants = {"avatar": {}}
+        self.profile.save(update_fields=["image_variants"])
+        UserProfile.objects.get(id=self.profile.id).save()
+        self.assertEqual(self.tasks(), 1)
+
+        self.profile.bio = "hello world"
+        self.profile.save()
+        self.assertEqual(self.tasks(), 2)
+
+        profile = UserProfile.objects.get(id=self.profile.id)
+        profile.avatar = "avatars/new.jpg"
+        profile.save(update_fields=["avatar"])
+        self.assertEqual(self.tasks(), 3)
@@ -1,3 +1,7 @@
 from django.contrib import admin
+from .models import Notification
 
-# Register your models here.
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'verb', 'actor_count', 'is_read', 'updated_at')
+    list_filter = ('verb', 'is_read')
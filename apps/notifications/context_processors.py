@@ -0,0 +1,13 @@
+from django.utils.functional import SimpleLazyObject
+
+from apps.middleware.auth_context import get_request_user
+from .services import get_unread_count
+
+
+def unread_notifications(request):
+    """Badge navbar: chỉ đọc counter trong cache khi template thực sự dùng tới"""
+    def count():
+        snapshot = get_request_user(request)
+        return get_unread_count(snapshot.id) if snapshot else 0
+
+    return {"unread_notifications": SimpleLazyObject(count)}
@@ -1,3 +1,34 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+User = settings.AUTH_USER_MODEL
+
+class Notification(models.Model):
+    """
+    1 dòng có thể gộp nhiều sự kiện cùng loại ("5 people sent you friend requests"):
+    sự kiện mới trong cửa sổ coalesce được cộng vào dòng chưa đọc thay vì tạo dòng mới.
+    """
+    VERB_CHOICES = (
+        ('friend_request', 'Friend request'),
+        ('friend_accepted', 'Friend request accepted'),
+    )
+
+    recipient = models.ForeignKey(User, related_name='notifications', on_delete=models.CASCADE)
+    verb = models.CharField(max_length=30, choices=VERB_CHOICES)
+    # Các actor gần nhất (mới nhất trước), tối đa MAX_ACTORS id để hiển thị
+    actor_ids = models.JSONField(default=list)
+    actor_count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    MAX_ACTORS = 3
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', '-updated_at', '-id'], name='notification_recent_idx'),
+            models.Index(fields=['recipient', 'verb', 'is_read'], name='notification_coalesce_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.verb} x{self.actor_count} -> {self.recipient_id}"
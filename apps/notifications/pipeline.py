@@ -0,0 +1,64 @@
+"""
+Buffer sự kiện notification trong process.
+
+notify() chỉ append vào buffer; buffer được ghi xuống DB (services.deliver) khi đủ
+NOTIFICATION_BATCH_SIZE sự kiện hoặc sau NOTIFICATION_FLUSH_INTERVAL giây, nên
+nhiều sự kiện dồn dập chỉ tốn 1 transaction và được gộp thành ít dòng.
+Sự kiện còn trong buffer bị mất nếu process chết trước khi flush.
+"""
+import atexit
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from .services import deliver
+
+_lock = threading.Lock()
+_events = []
+_timer = None
+
+
+def notify(recipient_id, verb, actor_id):
+    global _timer
+    if recipient_id == actor_id:
+        return
+
+    interval = settings.NOTIFICATION_FLUSH_INTERVAL
+    with _lock:
+        _events.append((recipient_id, verb, actor_id))
+        full = len(_events) >= settings.NOTIFICATION_BATCH_SIZE
+        if not full and interval > 0 and _timer is None:
+            _timer = threading.Timer(interval, _flush_in_thread)
+            _timer.daemon = True
+            _timer.start()
+
+    if full or interval <= 0:
+        flush()
+
+
+def flush():
+    """Ghi mọi sự kiện đang chờ, trả về số notification mới"""
+    global _timer
+    with _lock:
+        events = _events[:]
+        _events.clear()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+
+    try:
+        return deliver(events)
+    except Exception as e:
+        print("[ERROR] Lỗi ghi notification:", e)
+        return 0
+
+
+def _flush_in_thread():
+    try:
+        flush()
+    finally:
+        connection.close()
+
+
+atexit.register(flush)
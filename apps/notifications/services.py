@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.pagination import paginate
+from .models import Notification
+
+User = get_user_model()
+
+UNREAD_KEY = "notifications:unread:{}"
+
+VERB_TEXT = {
+    'friend_request': ("sent you a friend request", "sent you friend requests"),
+    'friend_accepted': ("accepted your friend request", "accepted your friend requests"),
+}
+
+
+def _merge_actors(new_ids, old_ids):
+    """Actor mới lên đầu, bỏ trùng, giữ tối đa MAX_ACTORS"""
+    merged = []
+    for actor_id in list(new_ids) + list(old_ids):
+        if actor_id not in merged:
+            merged.append(actor_id)
+    return merged[:Notification.MAX_ACTORS]
+
+
+def _group_events(events):
+    """[(recipient_id, verb, actor_id)] -> {(recipient_id, verb): [actor_id mới nhất trước]}"""
+    groups = {}
+    for recipient_id, verb, actor_id in reversed(events):
+        actors = groups.setdefault((recipient_id, verb), [])
+        if actor_id not in actors:
+            actors.append(actor_id)
+    return groups
+
+
+def deliver(events):
+    """
+    Ghi 1 loạt sự kiện: gộp theo (recipient, verb), cộng dồn vào notification chưa đọc
+    còn trong cửa sổ coalesce, phần còn lại bulk_create. Trả về số dòng mới.
+    """
+    if not events:
+        return 0
+
+    groups = _group_events(events)
+    since = timezone.now() - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW)
+    recipient_ids = {recipient_id for recipient_id, _ in groups}
+
+    with transaction.atomic():
+        existing = {}
+        for notification in (
+            Notification.objects.select_for_update()
+            .filter(recipient_id__in=recipient_ids, verb__in={verb for _, verb in groups},
+                    is_read=False, updated_at__gte=since)
+            .order_by('updated_at')
+        ):
+            # Giữ dòng mới nhất cho mỗi (recipient, verb)
+            existing[(notification.recipient_id, notification.verb)] = notification
+
+        to_update = []
+        to_create = []
+        now = timezone.now()
+        for key, actor_ids in groups.items():
+            notification = existing.get(key)
+            if notification is None:
+                to_create.append(Notification(
+                    recipient_id=key[0],
+                    verb=key[1],
+                    actor_ids=actor_ids[:Notification.MAX_ACTORS],
+                    actor_count=len(actor_ids),
+                ))
+                continue
+            added = [actor_id for actor_id in actor_ids if actor_id not in notification.actor_ids]
+            notification.actor_ids = _merge_actors(actor_ids, notification.actor_ids)
+            notification.actor_count += len(added)
+            notification.updated_at = now
+            to_update.append(notification)
+
+        Notification.objects.bulk_update(to_update, ['actor_ids', 'actor_count', 'updated_at'])
+        Notification.objects.bulk_create(to_create)
+
+    # Chỉ dòng mới làm tăng badge; dòng được gộp vốn đã tính là chưa đọc
+    for notification in to_create:
+        _incr_unread(notification.recipient_id)
+    return len(to_create)
+
+
+def _incr_unread(user_id):
+    try:
+        cache.incr(UNREAD_KEY.format(user_id))
+    except ValueError:
+        # Chưa có counter: lần đọc tới sẽ tự tính lại
+        pass
+
+
+def get_unread_count(user_id):
+    """Badge trên navbar, chỉ đếm DB khi cache chưa có counter"""
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        cache.add(key, count, None)
+    return count
+
+
+def mark_all_read(user):
+    Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+    cache.set(UNREAD_KEY.format(user.id), 0, None)
+
+
+def get_notification_page(user, cursor=None, page_size=20):
+    queryset = Notification.objects.filter(recipient=user)
+    page = paginate(queryset, cursor, page_size, ordering=('-updated_at', '-id'))
+    _attach_text(page.items)
+    return page
+
+
+def _attach_text(notifications):
+    """Gắn notification.text, username của mọi actor được lấy bằng 1 query"""
+    actor_ids = {actor_id for n in notifications for actor_id in n.actor_ids}
+    names = dict(User.objects.filter(id__in=actor_ids).values_list('id', 'username'))
+
+    for notification in notifications:
+        actors = [names[actor_id] for actor_id in notification.actor_ids if actor_id in names] or ["Someone"]
+        single, plural = VERB_TEXT[notification.verb]
+        others = notification.actor_count - 1
+        if others <= 0:
+            notification.text = f"{actors[0]} {single}"
+        elif others == 1 and len(actors) > 1:
+            notification.text = f"{actors[0]} and {actors[1]} {plural}"
+        else:
+            notification.text = f"{actors[0]} and {others} others {plural}"
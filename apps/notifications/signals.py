@@ -0,0 +1,15 @@
+from django.dispatch import receiver
+
+from apps.friends.signals import friend_request_sent, friendship_accepted
+from .pipeline import notify
+
+
+@receiver(friend_request_sent)
+def notify_friend_request(sender, from_user_id, to_user_id, **kwargs):
+    notify(to_user_id, 'friend_request', from_user_id)
+
+
+@receiver(friendship_accepted)
+def notify_friend_accepted(sender, user_id, friend_id, **kwargs):
+    # user_id là người vừa accept, báo cho người đã gửi lời mời
+    notify(friend_id, 'friend_accepted', user_id)
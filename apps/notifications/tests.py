@@ -1,3 +1,76 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import User
+from . import pipeline
+from .models import Notification
+from .services import deliver, get_notification_page, get_unread_count, mark_all_read
+
+
+@override_settings(
+    NOTIFICATION_COALESCE_WINDOW=600,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class CoalescingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.me, *self.others = [
+            User.objects.create_user(email=f"u{i}@example.com", username=f"u{i}", password="x")
+            for i in range(6)
+        ]
+
+    def request_from(self, *actors):
+        return [(self.me.id, "friend_request", actor.id) for actor in actors]
+
+    def test_batch_is_grouped_per_recipient_and_verb(self):
+        a, b, c = self.others[:3]
+        created = deliver(self.request_from(a, b, a) + [
+            (self.me.id, "friend_accepted", c.id),
+            (a.id, "friend_request", b.id),
+        ])
+        self.assertEqual(created, 3)
+        notification = Notification.objects.get(recipient=self.me, verb="friend_request")
+        self.assertEqual((notification.actor_ids, notification.actor_count), ([a.id, b.id], 2))
+
+    def test_merges_into_unread_notification_within_window(self):
+        a, b, c, d, e = self.others
+        self.assertEqual(get_unread_count(self.me.id), 0)
+        deliver(self.request_from(a))
+        self.assertEqual(deliver(self.request_from(b, c, a)), 0)
+        deliver(self.request_from(d, e))
+
+        notification = Notification.objects.get(recipient=self.me)
+        # Mới nhất trước, tối đa MAX_ACTORS id; actor_count đếm mọi người khác nhau
+        self.assertEqual(notification.actor_ids, [e.id, d.id, a.id])
+        self.assertEqual(notification.actor_count, 5)
+        self.assertEqual(get_unread_count(self.me.id), 1)
+
+        page = get_notification_page(self.me)
+        self.assertEqual(page.items[0].text, "u5 and 4 others sent you friend requests")
+
+    def test_read_or_old_notifications_are_not_merged(self):
+        a, b, c = self.others[:3]
+        deliver(self.request_from(a))
+        mark_all_read(self.me)
+        self.assertEqual(deliver(self.request_from(b)), 1)
+
+        Notification.objects.filter(is_read=False).update(updated_at=timezone.now() - timedelta(seconds=601))
+        self.assertEqual(deliver(self.request_from(c)), 1)
+        self.assertEqual(Notification.objects.filter(recipient=self.me).count(), 3)
+        self.assertEqual(get_unread_count(self.me.id), 2)
+
+    @override_settings(NOTIFICATION_FLUSH_INTERVAL=60, NOTIFICATION_BATCH_SIZE=3)
+    def test_pipeline_buffers_until_batch_is_full(self):
+        a, b = self.others[:2]
+        pipeline.notify(self.me.id, "friend_request", a.id)
+        pipeline.notify(self.me.id, "friend_request", self.me.id)  # tự gửi cho mình: bỏ qua
+        pipeline.notify(self.me.id, "friend_accepted", a.id)
+        self.assertFalse(Notification.objects.exists())
+
+        pipeline.notify(self.me.id, "friend_request", b.id)
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(Notification.objects.get(verb="friend_request").actor_ids, [b.id, a.id])
+        self.assertEqual(pipeline.flush(), 0)
@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import *
+
+app_name = "notifications"
+
+urlpatterns = [
+    path("", notification_list_view, name="list"),
+    path("read-all/", mark_all_read_view, name="read_all"),
+]
@@ -1,3 +1,22 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import csrf_exempt
+from .pipeline import flush
+from .services import get_notification_page, mark_all_read
 
-# Create your views here.
+@login_required
+def notification_list_view(request):
+    page = get_notification_page(request.user, request.GET.get("cursor"))
+    return render(request, "notifications/notification_list.html", {
+        "notifications": page.items,
+        "next_cursor": page.next_cursor,
+    })
+
+@login_required
+@csrf_exempt
+def mark_all_read_view(request):
+    if request.method == "POST":
+        # Sự kiện còn trong buffer cũng phải được tính là đã đọc
+        flush()
+        mark_all_read(request.user)
+    return redirect("notifications:list")
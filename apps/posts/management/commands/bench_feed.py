@@ -0,0 +1,104 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from apps.accounts.models import User
+from apps.core.bench import benchmark_database, measure, random_pairs, seed_friendships, seed_users
+from apps.friends.graph import forget_users
+from apps.friends.models import Friendship, FriendEdge
+from apps.posts.models import Post, TimelineEntry
+from apps.posts.services import create_post, get_home_timeline
+
+SHAPES = ("uniform", "celebrity", "powerlaw")
+
+
+def celebrity_pairs(user_ids, avg_degree, hubs, hub_reach, rng):
+    """Graph đều + vài hub nối tới hub_reach (tỉ lệ) toàn bộ user"""
+    pairs = random_pairs(user_ids, avg_degree, rng)
+    for hub in user_ids[:hubs]:
+        for uid in rng.sample(user_ids, int(len(user_ids) * hub_reach)):
+            if uid != hub:
+                pairs.add((hub, uid) if hub < uid else (uid, hub))
+    return pairs
+
+
+def powerlaw_pairs(user_ids, avg_degree, alpha, rng):
+    """Đầu mút cạnh chọn theo phân phối Zipf: ít user rất nhiều bạn, đa số ít bạn"""
+    weights = [1 / (rank + 1) ** alpha for rank in range(len(user_ids))]
+    target = len(user_ids) * avg_degree // 2
+    pairs = set()
+    attempts = 0
+    while len(pairs) < target and attempts < target * 10:
+        a = rng.choices(user_ids, weights)[0]
+        b = rng.choice(user_ids)
+        if a != b:
+            pairs.add((a, b) if a < b else (b, a))
+        attempts += 1
+    return pairs
+
+
+class Command(BaseCommand):
+    help = "So sánh write amplification và latency đọc feed giữa push / hybrid / pull trên nhiều dạng graph"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--friends", type=int, default=20, help="Số bạn trung bình mỗi user")
+        parser.add_argument("--hubs", type=int, default=5, help="Số hub cho graph celebrity")
+        parser.add_argument("--hub-reach", type=float, default=0.5, help="Tỉ lệ user là bạn của mỗi hub")
+        parser.add_argument("--alpha", type=float, default=1.2, help="Số mũ Zipf cho graph powerlaw")
+        parser.add_argument("--posts", type=int, default=300)
+        parser.add_argument("--reads", type=int, default=200)
+        parser.add_argument("--threshold", type=int, default=200, help="FEED_FANOUT_THRESHOLD cho chiến lược hybrid")
+        parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        strategies = {
+            "push": 10 ** 9,
+            "hybrid": options["threshold"],
+            "pull": -1,
+        }
+        with benchmark_database():
+            user_ids = seed_users(options["users"])
+            self.stdout.write(
+                f"{'shape':<10}{'strategy':<9}{'rows/post':>10}{'write p50':>11}{'write p99':>11}"
+                f"{'read p50':>10}{'read p99':>10}{'read q':>8}"
+            )
+            for shape in options["shapes"]:
+                rng = random.Random(options["seed"])
+                pairs = self.build_graph(shape, user_ids, options, rng)
+                for strategy, threshold in strategies.items():
+                    with override_settings(FEED_FANOUT_THRESHOLD=threshold):
+                        row = self.run(user_ids, pairs, options, random.Random(options["seed"]))
+                    self.stdout.write(
+                        f"{shape:<10}{strategy:<9}{row['rows_per_post']:>10.1f}"
+                        f"{row['write']['p50_ms']:>11.2f}{row['write']['p99_ms']:>11.2f}"
+                        f"{row['read']['p50_ms']:>10.2f}{row['read']['p99_ms']:>10.2f}"
+                        f"{row['read']['avg_queries']:>8.1f}"
+                    )
+
+    def build_graph(self, shape, user_ids, options, rng):
+        if shape == "celebrity":
+            return celebrity_pairs(user_ids, options["friends"], options["hubs"], options["hub_reach"], rng)
+        if shape == "powerlaw":
+            return powerlaw_pairs(user_ids, options["friends"], options["alpha"], rng)
+        return random_pairs(user_ids, options["friends"], rng)
+
+    def run(self, user_ids, pairs, options, rng):
+        TimelineEntry.objects.all().delete()
+        Post.objects.all().delete()
+        FriendEdge.objects.all().delete()
+        Friendship.objects.all().delete()
+        # Chỉ bỏ cache graph của user benchmark, không xoá cả cache dùng chung
+        forget_users(user_ids)
+        seed_friendships(pairs)
+
+        users = User.objects.in_bulk(user_ids)
+        authors = [users[uid] for uid in rng.choices(user_ids, k=options["posts"])]
+        readers = [users[uid] for uid in rng.choices(user_ids, k=options["reads"])]
+
+        write = measure(lambda i: create_post(authors[i], f"post {i}"), len(authors))
+        rows_per_post = TimelineEntry.objects.count() / max(len(authors), 1)
+        read = measure(lambda i: get_home_timeline(readers[i]), len(readers))
+        return {"write": write, "read": read, "rows_per_post": rows_per_post}
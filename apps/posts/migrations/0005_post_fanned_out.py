@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:04
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_pulled_posts(apps, schema_editor):
+    """Post đã đăng ở chế độ pull: không có trong inbox của ai ngoài tác giả"""
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    pushed = TimelineEntry.objects.exclude(user_id=F('author_id')).values('post_id')
+    Post.objects.filter(group__isnull=True).exclude(id__in=pushed).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_is_hidden'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='fanned_out',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(mark_pulled_posts, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,50 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+User = settings.AUTH_USER_MODEL
+
+class Post(models.Model):
+    author = models.ForeignKey(User, related_name='posts', on_delete=models.CASCADE)
+    # Post trong group không vào home timeline, chỉ hiển thị ở trang group
+    group = models.ForeignKey('groups.Group', related_name='posts', null=True, blank=True, on_delete=models.CASCADE)
+    content = models.TextField()
+    # Bị ẩn bởi moderation (apps/moderation), không hiển thị ở feed / group
+    is_hidden = models.BooleanField(default=False)
+    # False: tác giả đang ở chế độ pull lúc đăng, post chỉ nằm trong inbox của tác giả.
+    # Được chép cho bạn bè (và set True) khi tác giả về lại dưới FEED_FANOUT_THRESHOLD
+    fanned_out = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_recent_idx'),
+            models.Index(fields=['group', '-created_at', '-id'], name='post_group_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id}: {self.content[:50]}"
+
+
+class TimelineEntry(models.Model):
+    """
+    Inbox của home timeline: mỗi post được ghi sẵn cho từng người xem lúc đăng
+    (fan-out on write), đọc 1 trang chỉ là 1 range read trên (user, post).
+    """
+    user = models.ForeignKey(User, related_name='timeline_entries', on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='+', on_delete=models.CASCADE)
+    # Lưu lại tác giả để gỡ post khỏi inbox khi unfriend mà không cần join
+    author = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='timeline_entry_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_recent_idx'),
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} <- {self.post_id}"
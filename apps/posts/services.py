@@ -0,0 +1,147 @@
+import heapq
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.core.pagination import Page, apply_cursor, decode_cursor, encode_cursor
+from apps.friends.graph import get_degrees, get_friend_ids
+from apps.friends.models import FriendEdge
+from .models import Post, TimelineEntry
+
+MAX_POST_LENGTH = 5000
+FANOUT_BATCH_SIZE = 1000
+# Số post gần nhất được chép vào inbox khi 2 người vừa kết bạn
+BACKFILL_SIZE = 20
+
+
+def _fan_out(post, recipient_ids):
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=uid, post_id=post.id, author_id=post.author_id, created_at=post.created_at)
+            for uid in recipient_ids
+        ],
+        batch_size=FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def create_post(author, content, group=None):
+    content = (content or "").strip()
+    if not content:
+        return None, "Post content cannot be empty."
+    if len(content) > MAX_POST_LENGTH:
+        return None, f"Post is too long (max {MAX_POST_LENGTH} characters)."
+
+    if group is not None:
+        # Post trong group không fan-out, chỉ đọc qua trang group
+        return Post.objects.create(author=author, content=content, group=group), None
+
+    friend_ids = get_friend_ids(author.id)
+    pull = is_pull_author(len(friend_ids))
+    with transaction.atomic():
+        post = Post.objects.create(author=author, content=content, fanned_out=not pull)
+        if pull:
+            # Tài khoản nhiều bạn: không push, bạn bè tự kéo post lúc đọc feed
+            _fan_out(post, [author.id])
+        else:
+            # Fan-out on write: ghi vào inbox của tác giả và toàn bộ bạn bè
+            _fan_out(post, [author.id, *friend_ids])
+    return post, None
+
+
+def is_pull_author(degree):
+    return degree > settings.FEED_FANOUT_THRESHOLD
+
+
+def push_pulled_posts(author_id):
+    """
+    Tác giả không còn ở chế độ pull (vd. vừa unfriend xuống dưới ngưỡng): timeline
+    không kéo post của họ nữa, nên chép các post đăng lúc pull vào inbox của bạn bè
+    hiện tại. Trả về số post được chép.
+    """
+    pulled = list(
+        Post.objects.filter(author_id=author_id, group__isnull=True, fanned_out=False)
+        .values_list('id', 'created_at', 'is_hidden')
+    )
+    if not pulled:
+        return 0
+    # Đọc từ DB: cache số bạn có thể chưa được xoá nếu đang trong transaction
+    friend_ids = list(FriendEdge.objects.filter(user_id=author_id).values_list('friend_id', flat=True))
+    if is_pull_author(len(friend_ids)):
+        return 0
+
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=uid, post_id=post_id, author_id=author_id, created_at=created_at)
+                for post_id, created_at, is_hidden in pulled if not is_hidden
+                for uid in friend_ids
+            ],
+            batch_size=FANOUT_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        Post.objects.filter(id__in=[post_id for post_id, _, _ in pulled]).update(fanned_out=True)
+    return len(pulled)
+
+
+def delete_post(user, post_id):
+    deleted, _ = Post.objects.filter(id=post_id, author=user).delete()
+    if not deleted:
+        return False, "Post not found."
+    return True, "Post deleted."
+
+
+FEED_ORDERING = ('-created_at', '-id')
+INBOX_ORDERING = ('-created_at', '-post_id')
+
+
+def _recent_posts(author_id, limit, after):
+    posts = apply_cursor(Post.objects.filter(author_id=author_id, group__isnull=True, is_hidden=False), after, FEED_ORDERING)
+    return list(posts.values_list('created_at', 'id')[:limit])
+
+
+def get_home_timeline(user, limit=20, cursor=None):
+    """
+    1 trang home timeline (Page), mới nhất trước, keyset theo (created_at, id).
+    Inbox (post đã được push) được merge k-way với post gần nhất của các bạn
+    nhiều bạn bè (không push).
+    """
+    after = decode_cursor(cursor, Post, FEED_ORDERING)
+    entries = apply_cursor(TimelineEntry.objects.filter(user=user), after, INBOX_ORDERING)
+    streams = [list(entries.values_list('created_at', 'post_id')[:limit + 1])]
+
+    friend_ids = get_friend_ids(user.id)
+    if friend_ids:
+        for friend_id, degree in get_degrees(list(friend_ids)).items():
+            if is_pull_author(degree):
+                streams.append(_recent_posts(friend_id, limit + 1, after))
+
+    keys = []
+    seen = set()
+    for key in heapq.merge(*streams, reverse=True):
+        if key[1] not in seen:
+            seen.add(key[1])
+            keys.append(key)
+            if len(keys) > limit:
+                break
+
+    next_cursor = encode_cursor(keys[limit - 1]) if len(keys) > limit else None
+    post_ids = [post_id for _, post_id in keys[:limit]]
+    posts = Post.objects.filter(is_hidden=False).select_related('author__profile').in_bulk(post_ids)
+    return Page([posts[pid] for pid in post_ids if pid in posts], next_cursor)
+
+
+def backfill_timeline(user_id, author_id, limit=BACKFILL_SIZE):
+    """Chép các post gần nhất của author vào inbox của user"""
+    recent = Post.objects.filter(author_id=author_id, group__isnull=True, is_hidden=False).order_by('-created_at').values_list('id', 'created_at')[:limit]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, created_at in recent
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def remove_author_from_timeline(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
@@ -0,0 +1,19 @@
+from django.dispatch import receiver
+
+from apps.friends.signals import friendship_accepted, friendship_removed
+from .services import backfill_timeline, push_pulled_posts, remove_author_from_timeline
+
+
+@receiver(friendship_accepted)
+def backfill_new_friend(sender, user_id, friend_id, **kwargs):
+    backfill_timeline(user_id, friend_id)
+    backfill_timeline(friend_id, user_id)
+
+
+@receiver(friendship_removed)
+def drop_old_friend(sender, user_id, friend_id, **kwargs):
+    remove_author_from_timeline(user_id, friend_id)
+    remove_author_from_timeline(friend_id, user_id)
+    # Mất 1 bạn có thể đưa tác giả từ pull về push
+    push_pulled_posts(user_id)
+    push_pulled_posts(friend_id)
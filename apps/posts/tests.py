@@ -1,3 +1,94 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from apps.accounts.models import User
+from apps.friends.graph import forget_users
+from apps.friends.models import Friendship, FriendEdge
+from apps.friends.services import unfriend_user
+from .models import Post, TimelineEntry
+from .services import create_post, get_home_timeline
+
+
+@override_settings(FEED_FANOUT_THRESHOLD=2, PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class HybridFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.star, self.reader, self.friend, self.fan1, self.fan2 = [
+            User.objects.create_user(email=f"{name}@example.com", username=name, password="x")
+            for name in ("star", "reader", "friend", "fan1", "fan2")
+        ]
+        self.befriend(self.reader, self.star)
+        self.befriend(self.reader, self.friend)
+
+    def befriend(self, user, other):
+        Friendship.objects.create(from_user=user, to_user=other, status="accepted")
+        FriendEdge.objects.bulk_create([
+            FriendEdge(user_id=user.id, friend_id=other.id),
+            FriendEdge(user_id=other.id, friend_id=user.id),
+        ])
+        forget_users([user.id, other.id])
+
+    def post(self, author, content):
+        post, error = create_post(author, content)
+        self.assertIsNone(error)
+        return post
+
+    def feed(self, user, limit=20):
+        pages, cursor = [], None
+        while True:
+            page = get_home_timeline(user, limit=limit, cursor=cursor)
+            pages.append([post.content for post in page.items])
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_small_author_is_pushed(self):
+        self.post(self.friend, "hello")
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post__content="hello").exists())
+        self.assertEqual(self.feed(self.reader), [["hello"]])
+
+    def test_cutover_merges_pushed_and_pulled_posts(self):
+        self.post(self.star, "star-1")          # 1 bạn: push
+        self.post(self.friend, "friend-1")
+        self.befriend(self.star, self.fan1)
+        self.befriend(self.star, self.fan2)     # 3 bạn > threshold: chuyển sang pull
+        self.post(self.star, "star-2")
+        self.post(self.friend, "friend-2")
+        self.post(self.star, "star-3")
+
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post__content="star-2").exists())
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post__content="star-1").exists())
+        expected = ["star-3", "friend-2", "star-2", "friend-1", "star-1"]
+        self.assertEqual(self.feed(self.reader), [expected])
+        # Phân trang qua ranh giới push / pull: không trùng, không sót
+        self.assertEqual(self.feed(self.reader, limit=2), [expected[:2], expected[2:4], expected[4:]])
+        # Tài khoản pull: bạn mới cũng thấy cả post trước khi kết bạn
+        self.assertEqual(self.feed(self.fan1), [["star-3", "star-2", "star-1"]])
+
+    def test_downward_cutover_pushes_pulled_posts(self):
+        self.befriend(self.star, self.fan1)
+        self.befriend(self.star, self.fan2)     # 3 bạn: pull
+        post = self.post(self.star, "pulled-post")
+        self.assertFalse(post.fanned_out)
+        self.assertEqual(self.feed(self.reader), [["pulled-post"]])
+
+        # Về lại 2 bạn (= threshold): timeline không kéo post của star nữa
+        with self.captureOnCommitCallbacks(execute=True):
+            unfriend_user(self.star, self.fan1.id)
+        self.assertEqual(self.feed(self.reader), [["pulled-post"]])
+        self.assertEqual(self.feed(self.fan2), [["pulled-post"]])
+        self.assertEqual(self.feed(self.fan1), [[]])
+        self.assertTrue(Post.objects.get(id=post.id).fanned_out)
+
+        self.post(self.star, "pushed-post")
+        self.assertEqual(self.feed(self.reader), [["pushed-post", "pulled-post"]])
+
+    def test_hidden_posts_are_excluded(self):
+        self.befriend(self.star, self.fan1)
+        self.befriend(self.star, self.fan2)
+        self.post(self.star, "visible")
+        hidden = self.post(self.star, "hidden")
+        Post.objects.filter(id=hidden.id).update(is_hidden=True)
+        self.post(self.friend, "pushed-hidden")
+        Post.objects.filter(content="pushed-hidden").update(is_hidden=True)
+        self.assertEqual(self.feed(self.reader), [["visible"]])
@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import *
+
+app_name = "posts"
+
+urlpatterns = [
+    path("", feed_view, name="feed"),
+    path("delete/<int:post_id>/", delete_post_view, name="delete"),
+]
@@ -1,3 +1,32 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import csrf_exempt
+from django.contrib import messages
+from .services import create_post, delete_post, get_home_timeline
 
-# Create your views here.
+PAGE_SIZE = 20
+
+@login_required
+@csrf_exempt
+def feed_view(request):
+    if request.method == "POST":
+        _, error = create_post(request.user, request.POST.get("content"))
+        if error:
+            messages.error(request, error)
+        return redirect("posts:feed")
+
+    page = get_home_timeline(request.user, PAGE_SIZE, request.GET.get("cursor"))
+
+    return render(request, "posts/feed.html", {
+        "posts": page.items,
+        "next_cursor": page.next_cursor,
+    })
+
+@login_required
+@csrf_exempt
+def delete_post_view(request, post_id):
+    if request.method == "POST":
+        success, msg = delete_post(request.user, post_id)
+        if not success:
+            messages.error(request, msg)
+    return redirect("posts:feed")
@@ -46,12 +46,15 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # ---------------------------
 MIDDLEWARE = [
+    # Đứng đầu để đo toàn bộ request; tự gỡ khỏi chain khi PERF_INSTRUMENTATION tắt
+    "apps.middleware.perf.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "apps.middleware.jwt_auth.JWTAuthMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Chạy sau AuthenticationMiddleware để request.user không bị ghi đè bởi session user
+    "apps.middleware.jwt_auth.JWTAuthMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -63,7 +66,8 @@ ROOT_URLCONF = "config.urls"
 # ---------------------------
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates có đo thời gian render cho PerformanceMiddleware
+        "BACKEND": "apps.middleware.perf.InstrumentedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -72,6 +76,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "apps.notifications.context_processors.unread_notifications",
             ],
         },
     },
@@ -119,13 +124,124 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.CommonPasswordValidator"},
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
+# ---------------------------
+# CACHE
+# ---------------------------
+# LocMemCache chỉ có hiệu lực trong 1 process; production nên dùng backend chung
+CACHES = {
+    "default": {
+        # LocMemCache có đếm hit / miss cho PerformanceMiddleware (apps/middleware/perf.py)
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "apps.middleware.perf.InstrumentedLocMemCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "social-media"),
+    }
+}
+
+# ---------------------------
+# JWT AUTH
+# ---------------------------
+# Bật để middleware tin access token hợp lệ mà không load User.
+# Logout / refresh rotation / ban được enforce qua apps/accounts/revocation.py
+# (DB là nguồn gốc, cache chỉ nhớ kết quả)
+JWT_STATELESS_AUTH = os.getenv("JWT_STATELESS_AUTH", "False").lower() == "true"
+# Số giây cache nhớ kết quả đọc từ DB của revocation.py (token chưa revoke / user chưa ban)
+JWT_REVOCATION_CACHE_TTL = int(os.getenv("JWT_REVOCATION_CACHE_TTL", 60))
+
+# LRU cache trong process cho UserSnapshot (apps/middleware/auth_context.py)
+USER_SNAPSHOT_CACHE_SIZE = int(os.getenv("USER_SNAPSHOT_CACHE_SIZE", 10000))
+USER_SNAPSHOT_TTL = int(os.getenv("USER_SNAPSHOT_TTL", 30))
+
+# ---------------------------
+# LOGIN THROTTLING
+# ---------------------------
+# Token bucket (số lần, trong bao nhiêu giây) theo IP và theo (IP, tài khoản)
+# (apps/accounts/throttle.py), kiểm tra trước khi hash password
+LOGIN_THROTTLE_IP = (int(os.getenv("LOGIN_THROTTLE_IP_ATTEMPTS", 20)), int(os.getenv("LOGIN_THROTTLE_IP_PERIOD", 60)))
+LOGIN_THROTTLE_ACCOUNT = (int(os.getenv("LOGIN_THROTTLE_ACCOUNT_ATTEMPTS", 5)), int(os.getenv("LOGIN_THROTTLE_ACCOUNT_PERIOD", 300)))
+
+# Số thread hash password cùng lúc và số lần chờ tối đa (apps/accounts/hashing.py);
+# vượt quá thì login bị từ chối ngay thay vì chiếm CPU của request khác
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 16))
+
+# ---------------------------
+# HOME PAGE
+# ---------------------------
+# Trang chủ cho khách được render 1 lần và giữ trong cache (giây), kèm ETag / Last-Modified;
+# fragment theo user được đánh version nên TTL chỉ để dọn key cũ (apps/core/pagecache.py)
+HOME_ANON_CACHE_TTL = int(os.getenv("HOME_ANON_CACHE_TTL", 300))
+HOME_FRAGMENT_TTL = int(os.getenv("HOME_FRAGMENT_TTL", 3600))
+
+# ---------------------------
+# FEED
+# ---------------------------
+# Tác giả có nhiều bạn hơn ngưỡng này không fan-out on write;
+# post của họ được kéo và merge lúc đọc feed (apps/posts/services.py)
+FEED_FANOUT_THRESHOLD = int(os.getenv("FEED_FANOUT_THRESHOLD", 1000))
+
+# ---------------------------
+# USER SEARCH
+# ---------------------------
+# File index trigram được mmap (apps/accounts/search.py), build bằng:
+# python manage.py build_user_search_index
+USER_SEARCH_INDEX_PATH = os.getenv("USER_SEARCH_INDEX_PATH", str(BASE_DIR / "var" / "user_search.idx"))
+
+# ---------------------------
+# FRIENDS
+# ---------------------------
+# TTL (giây) của HTML đã render cho các section trang bạn bè (apps/friends/fragments.py).
+# Thay đổi của chính user được phản ánh ngay qua version key; TTL chỉ giới hạn
+# độ cũ của dữ liệu phụ thuộc người khác (bạn chung, gợi ý)
+FRIENDS_FRAGMENT_TTL = int(os.getenv("FRIENDS_FRAGMENT_TTL", 300))
+
+# ---------------------------
+# GROUPS
+# ---------------------------
+# TTL (giây) của map {group_id: roles} mỗi user trong cache; bị xoá ngay khi membership đổi
+GROUP_MEMBERSHIP_TTL = int(os.getenv("GROUP_MEMBERSHIP_TTL", 3600))
+
+# ---------------------------
+# MODERATION
+# ---------------------------
+# Ảnh có aHash cách rule image_hash không quá số bit này được coi là khớp
+MODERATION_IMAGE_HASH_DISTANCE = int(os.getenv("MODERATION_IMAGE_HASH_DISTANCE", 5))
+
+# ---------------------------
+# CHAT
+# ---------------------------
+# Pub/sub cho WebSocket (apps/chat/pubsub.py). InMemoryBroker chỉ đúng khi
+# chạy 1 process ASGI; nhiều worker cần backend chung cùng interface BaseBroker
+CHAT_BROKER = os.getenv("CHAT_BROKER", "apps.chat.pubsub.InMemoryBroker")
+# Số frame tối đa chờ gửi cho mỗi kết nối, client chậm hơn sẽ bị bỏ frame
+CHAT_QUEUE_SIZE = int(os.getenv("CHAT_QUEUE_SIZE", 100))
+# Message gửi trong cùng cửa sổ (giây) được ghi bằng 1 bulk_create mỗi conversation
+CHAT_BATCH_WINDOW = float(os.getenv("CHAT_BATCH_WINDOW", 0.01))
+CHAT_BATCH_SIZE = int(os.getenv("CHAT_BATCH_SIZE", 100))
+
+# ---------------------------
+# NOTIFICATIONS
+# ---------------------------
+# Sự kiện cùng loại trong cửa sổ này (giây) được gộp vào 1 notification chưa đọc
+NOTIFICATION_COALESCE_WINDOW = int(os.getenv("NOTIFICATION_COALESCE_WINDOW", 600))
+# Buffer trong process được ghi xuống DB sau chừng này giây hoặc khi đủ batch (0 = ghi ngay)
+NOTIFICATION_FLUSH_INTERVAL = float(os.getenv("NOTIFICATION_FLUSH_INTERVAL", 2))
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", 500))
+
+# ---------------------------
+# PERFORMANCE INSTRUMENTATION
+# ---------------------------
+# Server-Timing header + histogram theo view tại /internal/stats/
+# Số hit / miss cache chỉ có với backend kế thừa perf.CacheMetricsMixin (mặc định có)
+PERF_INSTRUMENTATION = os.getenv("PERF_INSTRUMENTATION", "False").lower() == "true"
+
 # Security
 CSRF_COOKIE_SECURE = False
 SESSION_COOKIE_SECURE = False
 SECURE_SSL_REDIRECT = False
 
 # Email
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Request chỉ enqueue vào outbox (apps.core.models.OutboundEmail),
+# gửi bằng: python manage.py send_queued_emails --loop
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
 EMAIL_USE_TLS = True
@@ -149,4 +265,10 @@ STATIC_ROOT = BASE_DIR / "static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Số thread sinh ảnh thu nhỏ / WebP cho avatar, cover (apps/accounts/images.py)
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# User model của app accounts (login, JWT, friends... đều dùng model này)
+AUTH_USER_MODEL = "accounts.User"
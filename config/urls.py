@@ -23,4 +23,8 @@ urlpatterns = [
     path("", include("apps.core.urls")),
     path('accounts/', include('apps.accounts.urls')),
     path('friends/', include('apps.friends.urls')),
+    path('posts/', include('apps.posts.urls')),
+    path('groups/', include('apps.groups.urls')),
+    path('chat/', include('apps.chat.urls')),
+    path('notifications/', include('apps.notifications.urls')),
 ]